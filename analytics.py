@@ -9,26 +9,71 @@ this module will not render anything. All rendering happens inside
 
 The analytics presented are intentionally simple: for each trip recorded in
 the session state, the function computes the number of sessions, total
-profit, current bankroll and inferred starting bankroll. It then displays a
+profit, current bankroll and inferred starting bankroll. The per-trip
+aggregation is a single vectorized groupby, memoized against the session
+log version so unchanged reruns are a cache lookup. It then displays a
 summary table and a bar chart of profits by trip. Streamlit's native
 components are used throughout to avoid raw HTML markup.
 """
 
 from __future__ import annotations
 
+import numpy as np
 import streamlit as st
 import pandas as pd
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional
 
+from session_log import SessionLog
 from trip_manager import initialize_trip_state
 
 
+SUMMARY_COLUMNS = [
+    "trip_id", "num_sessions", "profit",
+    "current_bankroll", "starting_bankroll", "casino"
+]
+_CACHE_KEY = "_trip_summary_cache"
+
+
+def _aggregate_sessions(sessions: pd.DataFrame) -> pd.DataFrame:
+    """Per-trip session count, total profit and casino in one groupby."""
+    return sessions.groupby("trip_id", sort=False).agg(
+        num_sessions=("profit", "size"),
+        profit=("profit", "sum"),
+        casino=("casino", "first"),
+    )
+
+
+def _trip_aggregates(session_log: SessionLog, cache: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    """Session aggregates per trip, reusing ``cache`` where it is still valid.
+
+    A cache built from the same log only needs the trips that received
+    sessions since its version; anything else is a full recomputation.
+    """
+    if cache is None or cache["log"] is not session_log:
+        return _aggregate_sessions(session_log.to_frame(("trip_id", "profit", "casino")))
+
+    changed = session_log.trips_changed_since(cache["version"])
+    blocks = [session_log.block(trip_id) for trip_id in changed]
+    rows = pd.DataFrame({
+        "num_sessions": [len(block) for block in blocks],
+        "profit": [float(np.sum(block.columns["profit"])) for block in blocks],
+        "casino": [block.columns["casino"][0] for block in blocks],
+    }, index=pd.Index(changed, name="trip_id"))
+    unchanged = cache["aggregates"].drop(index=changed, errors="ignore")
+    return pd.concat([unchanged, rows]) if len(unchanged) else rows
+
+
 def _compute_trip_summaries() -> pd.DataFrame:
     """Aggregate session data into a DataFrame of trip summaries.
 
-    This helper function looks at ``st.session_state.session_log`` and
-    ``st.session_state.trip_bankrolls`` to build a summary for each trip. If
-    there are no recorded trips yet, an empty DataFrame is returned.
+    This helper function looks at ``st.session_state.session_log`` (already
+    partitioned by trip) and ``st.session_state.trip_bankrolls`` to build a
+    summary for each trip. If there are no recorded trips yet, an empty
+    DataFrame is returned.
+
+    The result is memoized in session state against the session log's
+    version: reruns where nothing changed return the cached frame, and new
+    sessions only recompute the trips they belong to.
 
     Returns
     -------
@@ -40,36 +85,42 @@ def _compute_trip_summaries() -> pd.DataFrame:
     """
     initialize_trip_state()
 
-    session_log: List[Dict[str, Any]] = st.session_state.get("session_log", [])
+    session_log: SessionLog = st.session_state.session_log
     trip_bankrolls: Dict[int, float] = st.session_state.get("trip_bankrolls", {})
 
+    cache = st.session_state.get(_CACHE_KEY)
+    if (
+        cache is not None
+        and cache["log"] is session_log
+        and cache["version"] == session_log.version
+        and cache["bankrolls"] == trip_bankrolls
+    ):
+        return cache["summary"]
+
     if not trip_bankrolls:
-        return pd.DataFrame(columns=[
-            "trip_id", "num_sessions", "profit",
-            "current_bankroll", "starting_bankroll", "casino"
-        ])
-
-    trips: Dict[int, List[Dict[str, Any]]] = {}
-    for session in session_log:
-        tid = session.get("trip_id")
-        trips.setdefault(tid, []).append(session)
-
-    data: List[Dict[str, Any]] = []
-    for trip_id, current_bankroll in trip_bankrolls.items():
-        sessions_for_trip = trips.get(trip_id, [])
-        profit = sum(s.get("profit", 0.0) for s in sessions_for_trip)
-        starting_bankroll = current_bankroll - profit
-        num_sessions = len(sessions_for_trip)
-        casino = sessions_for_trip[0].get("casino") if sessions_for_trip else "N/A"
-        data.append({
-            "trip_id": trip_id,
-            "num_sessions": num_sessions,
-            "profit": profit,
-            "current_bankroll": current_bankroll,
-            "starting_bankroll": starting_bankroll,
-            "casino": casino,
-        })
-    return pd.DataFrame(data)
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    aggregates = _trip_aggregates(session_log, cache)
+    trips = aggregates.reindex(list(trip_bankrolls))
+    profit = trips["profit"].fillna(0.0).to_numpy(dtype=float)
+    current_bankroll = np.fromiter(trip_bankrolls.values(), dtype=float, count=len(trip_bankrolls))
+    summary = pd.DataFrame({
+        "trip_id": list(trip_bankrolls),
+        "num_sessions": trips["num_sessions"].fillna(0).to_numpy(dtype=int),
+        "profit": profit,
+        "current_bankroll": current_bankroll,
+        "starting_bankroll": current_bankroll - profit,
+        "casino": trips["casino"].fillna("N/A").to_numpy(dtype=object),
+    }, columns=SUMMARY_COLUMNS)
+
+    st.session_state[_CACHE_KEY] = {
+        "log": session_log,
+        "version": session_log.version,
+        "bankrolls": dict(trip_bankrolls),
+        "aggregates": aggregates,
+        "summary": summary,
+    }
+    return summary
 
 
 def render_analytics() -> None:
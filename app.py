@@ -1,49 +1,33 @@
 import streamlit as st
 import numpy as np
-from ui_templates import get_css, get_header
-from trip_manager import initialize_trip_state, render_sidebar, get_session_bankroll, get_current_bankroll, blacklist_game, get_blacklisted_games
-from data_loader import load_game_data
+from ui_templates import get_css, get_header, game_card, game_grid, session_risk_details
+from trip_manager import initialize_trip_state, render_sidebar, get_session_bankroll, get_current_bankroll, replace_unavailable_game, get_blacklisted_games
+from data_loader import load_game_data, get_game_tip, catalog_hash, catalog_refresher
 from analytics import render_analytics
 from session_manager import render_session_tracker
-from utils import map_volatility, map_advantage, map_bonus_freq
+from filter_index import ALL, ADVANTAGE_BUCKETS, VOLATILITY_BUCKETS, get_filter_index
+from search_index import get_search_index
+from simulator import get_session_risk
+from scoring import get_game_features, rank_games, min_bet_threshold_factor
+from ranking import (RANKING_CACHE, Ranking, RankedCandidates, get_ranked_candidates,
+                     ranking_cache_stats, ranking_key)
+from strategy import bankroll_strategy
+from whatif import sweep_bankrolls, what_if_sweep
+from profiler import finish_rerun, render_diagnostics, stage, start_rerun
 
 st.set_page_config(layout="wide", initial_sidebar_state="expanded", 
                   page_title="Profit Hopper Casino Manager")
 
+# Opt-in stage timings (PROFIT_HOPPER_PROFILE, or ?profile=1 with the PROFIT_HOPPER_PROFILE_KEY key)
+rerun_profile = start_rerun()
+
 initialize_trip_state()
 
 st.markdown(get_css(), unsafe_allow_html=True)
 st.markdown(get_header(), unsafe_allow_html=True)
 
-render_sidebar()
-
-current_bankroll = get_current_bankroll()
-session_bankroll = get_session_bankroll()
-
-# Enhanced bankroll-sensitive calculations
-if session_bankroll < 20:
-    strategy_type = "Conservative"
-    max_bet = max(0.01, session_bankroll * 0.10)
-    stop_loss = session_bankroll * 0.40
-    bet_unit = max(0.01, session_bankroll * 0.02)
-elif session_bankroll < 100:
-    strategy_type = "Moderate"
-    max_bet = session_bankroll * 0.15
-    stop_loss = session_bankroll * 0.50
-    bet_unit = max(0.05, session_bankroll * 0.03)
-elif session_bankroll < 500:
-    strategy_type = "Standard"
-    max_bet = session_bankroll * 0.25
-    stop_loss = session_bankroll * 0.60
-    bet_unit = max(0.10, session_bankroll * 0.05)
-else:
-    strategy_type = "Aggressive"
-    max_bet = session_bankroll * 0.30
-    stop_loss = session_bankroll * 0.70
-    bet_unit = max(0.25, session_bankroll * 0.06)
-
-# Calculate session duration estimate
-estimated_spins = int(session_bankroll / bet_unit) if bet_unit > 0 else 0
+with stage("sidebar"):
+    render_sidebar()
 
 # Display compact session summary with icons
 strategy_classes = {
@@ -53,52 +37,73 @@ strategy_classes = {
     "Aggressive": "strategy-aggressive"
 }
 
-# Create the HTML content for the summary
-summary_html = f"""
-<div style='display:grid;grid-template-columns:repeat(auto-fit,minmax(120px,1fr));gap:8px;margin-bottom:10px;'>
-    <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
-        <div style='font-size:1.5rem;margin-bottom:5px;'>💰</div>
-        <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Bankroll</div>
-        <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>${current_bankroll:,.2f}</div>
-    </div>
-    <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
-        <div style='font-size:1.5rem;margin-bottom:5px;'>💵</div>
-        <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Session</div>
-        <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>${session_bankroll:,.2f}</div>
-    </div>
-    <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
-        <div style='font-size:1.5rem;margin-bottom:5px;'>🪙</div>
-        <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Unit</div>
-        <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>{bet_unit:,.2f}</div>
-    </div>
-    <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
-        <div style='font-size:1.5rem;margin-bottom:5px;'>⬆️</div>
-        <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Max Bet</div>
-        <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>{max_bet:,.2f}</div>
-    </div>
-    <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
-        <div style='font-size:1.5rem;margin-bottom:5px;'>🛑</div>
-        <div style='font-size:0.7rem;color:#e74c3c;margin-bottom:3px;'>Stop Loss</div>
-        <div style='font-size:0.95rem;font-weight:bold;color:#e74c3c;'>{stop_loss:,.2f}</div>
-    </div>
-    <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
-        <div style='font-size:1.5rem;margin-bottom:5px;'>🌀</div>
-        <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Spins</div>
-        <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>{estimated_spins}</div>
+# Each fragment below re-reads the bankroll itself, so a session save or a
+# blacklist click reruns only the fragments that depend on it (see
+# session_manager.SESSION_FRAGMENTS) instead of the whole script
+@st.fragment(key="header_summary")
+@stage("header_summary")
+def render_bankroll_summary():
+    current_bankroll = get_current_bankroll()
+    session_bankroll = get_session_bankroll()
+    strategy = bankroll_strategy(session_bankroll)
+    strategy_type, max_bet, stop_loss, bet_unit = (
+        strategy.strategy_type, strategy.max_bet, strategy.stop_loss, strategy.bet_unit)
+    
+    # Calculate session duration estimate
+    estimated_spins = strategy.estimated_spins
+    
+    # Create the HTML content for the summary
+    summary_html = f"""
+    <div style='display:grid;grid-template-columns:repeat(auto-fit,minmax(120px,1fr));gap:8px;margin-bottom:10px;'>
+        <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
+            <div style='font-size:1.5rem;margin-bottom:5px;'>💰</div>
+            <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Bankroll</div>
+            <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>${current_bankroll:,.2f}</div>
+        </div>
+        <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
+            <div style='font-size:1.5rem;margin-bottom:5px;'>💵</div>
+            <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Session</div>
+            <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>${session_bankroll:,.2f}</div>
+        </div>
+        <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
+            <div style='font-size:1.5rem;margin-bottom:5px;'>🪙</div>
+            <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Unit</div>
+            <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>{bet_unit:,.2f}</div>
+        </div>
+        <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
+            <div style='font-size:1.5rem;margin-bottom:5px;'>⬆️</div>
+            <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Max Bet</div>
+            <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>{max_bet:,.2f}</div>
+        </div>
+        <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
+            <div style='font-size:1.5rem;margin-bottom:5px;'>🛑</div>
+            <div style='font-size:0.7rem;color:#e74c3c;margin-bottom:3px;'>Stop Loss</div>
+            <div style='font-size:0.95rem;font-weight:bold;color:#e74c3c;'>{stop_loss:,.2f}</div>
+        </div>
+        <div style='background:#fff;border-radius:10px;padding:8px;box-shadow:0 2px 5px rgba(0,0,0,0.05);border:1px solid #e0e0e0;text-align:center;'>
+            <div style='font-size:1.5rem;margin-bottom:5px;'>🌀</div>
+            <div style='font-size:0.7rem;color:#7f8c8d;margin-bottom:3px;'>Spins</div>
+            <div style='font-size:0.95rem;font-weight:bold;color:#2c3e50;'>{estimated_spins}</div>
+        </div>
     </div>
-</div>
-"""
-
-
-# Render the HTML summary
-st.markdown(summary_html, unsafe_allow_html=True)
-
-tab1, tab2, tab3 = st.tabs(["🎮 Game Plan", "📊 Session Tracker", "📈 Trip Analytics"])
+    """
+    
+    # Render the HTML summary
+    st.markdown(summary_html, unsafe_allow_html=True)
 
-with tab1:
+@st.fragment(key="game_plan")
+@stage("game_plan")
+def render_game_plan():
+    session_bankroll = get_session_bankroll()
+    strategy = bankroll_strategy(session_bankroll)
+    strategy_type, max_bet, stop_loss, bet_unit = (
+        strategy.strategy_type, strategy.max_bet, strategy.stop_loss, strategy.bet_unit)
+    estimated_spins = strategy.estimated_spins
+    
     st.info("Find the best games for your bankroll based on RTP, volatility, and advantage play potential")
     
-    game_df = load_game_data()
+    with stage("load_game_data"):
+        game_df = load_game_data()
     
     if not game_df.empty:
         with st.expander("🔍 Game Filters", expanded=False):
@@ -106,7 +111,7 @@ with tab1:
             
             with col1:
                 min_rtp = st.slider("Minimum RTP (%)", 85.0, 99.9, 92.0, step=0.1)
-                game_type = st.selectbox("Game Type", ["All"] + list(game_df['type'].unique()))
+                game_type = st.selectbox("Game Type", [ALL] + list(game_df['type'].unique()))
                 
             with col2:
                 max_min_bet = st.slider("Max Min Bet", 
@@ -115,110 +120,82 @@ with tab1:
                                        float(max_bet), 
                                        step=1.0)
                 advantage_filter = st.selectbox("Advantage Play Potential", 
-                                              ["All", "High (4-5)", "Medium (3)", "Low (1-2)"])
+                                              [ALL] + list(ADVANTAGE_BUCKETS))
                 
             with col3:
                 volatility_filter = st.selectbox("Volatility", 
-                                               ["All", "Low (1-2)", "Medium (3)", "High (4-5)"])
+                                               [ALL] + list(VOLATILITY_BUCKETS))
                 search_query = st.text_input("Search Game Name")
         
-        # Apply filters
-        filtered_games = game_df[
-            (game_df['min_bet'] <= max_min_bet) &
-            (game_df['rtp'] >= min_rtp)
-        ]
-        
-        if game_type != "All":
-            filtered_games = filtered_games[filtered_games['type'] == game_type]
-            
-        if advantage_filter == "High (4-5)":
-            filtered_games = filtered_games[filtered_games['advantage_play_potential'] >= 4]
-        elif advantage_filter == "Medium (3)":
-            filtered_games = filtered_games[filtered_games['advantage_play_potential'] == 3]
-        elif advantage_filter == "Low (1-2)":
-            filtered_games = filtered_games[filtered_games['advantage_play_potential'] <= 2]
-            
-        if volatility_filter == "Low (1-2)":
-            filtered_games = filtered_games[filtered_games['volatility'] <= 2]
-        elif volatility_filter == "Medium (3)":
-            filtered_games = filtered_games[filtered_games['volatility'] == 3]
-        elif volatility_filter == "High (4-5)":
-            filtered_games = filtered_games[filtered_games['volatility'] >= 4]
-            
+        search_rows = None
+        fuzzy_search = False
         if search_query:
-            filtered_games = filtered_games[
-                filtered_games['game_name'].str.contains(search_query, case=False)
-            ]
+            search_index = get_search_index(game_df)
+            search_rows = search_index.search(search_query)
+            # No exact match: fall back to typo-tolerant suggestions among
+            # the games that pass the other filters
+            fuzzy_search = len(search_rows) == 0
         
-        # Exclude blacklisted games
-        blacklisted = get_blacklisted_games()
-        if blacklisted:
-            filtered_games = filtered_games[~filtered_games['game_name'].isin(blacklisted)]
+        num_sessions = st.session_state.trip_settings['num_sessions']
+        casino = st.session_state.trip_settings['casino']
+        filter_index = get_filter_index(game_df)
+        game_features = get_game_features(game_df)
         
-        if not filtered_games.empty:
-            # When assigning new columns on a filtered DataFrame, pandas can raise
-            # a ``SettingWithCopyWarning`` because the filtered result may be a view
-            # on the original ``game_df``. Make a shallow copy to ensure
-            # modifications don't propagate unintendedly and avoid the warning.
-            filtered_games = filtered_games.copy()
-
-            # Enhanced scoring algorithm
-            # Normalize factors to comparable scales
-            rtp_normalized = (filtered_games['rtp'] - 85) / (99.9 - 85)
-            bonus_normalized = filtered_games['bonus_frequency']  # Already 0-1
-            app_normalized = filtered_games['advantage_play_potential'] / 5
-            volatility_normalized = (5 - filtered_games['volatility']) / 4  # Invert scale
-            
-            # Bankroll-adjusted factors
-            bankroll_factor = np.log10(session_bankroll) / 3  # Scale based on bankroll size
-            
-            # Risk-adjusted bet comfort
-            bet_comfort = np.clip((max_bet - filtered_games['min_bet']) / max_bet, 0, 1)
-            
-            # Calculate score with dynamic weights
-            filtered_games['Score'] = (
-                (rtp_normalized * 0.35) + 
-                (bonus_normalized * 0.20) +
-                (app_normalized * 0.20) +
-                (volatility_normalized * 0.15) +
-                (bet_comfort * 0.10)
-            ) * 10
-            
-            # Penalize games that don't fit bankroll strategy
-            # Higher penalty for small bankrolls
-            bankroll_penalty_factor = 1.5 if session_bankroll < 20 else 1.0
-            
-            # Define threshold for min_bet penalty based on strategy
-            if strategy_type == "Aggressive":
-                threshold_factor = 0.75
-            else:
-                threshold_factor = 0.5
-                
-            # Min bet penalty
-            min_bet_penalty = np.where(
-                filtered_games['min_bet'] > max_bet * threshold_factor,
-                0.6 * bankroll_penalty_factor,
-                1.0
-            )
-            
-            # Volatility penalty
-            volatility_penalty = np.where(
-                (session_bankroll < 50) & (filtered_games['volatility'] >= 4),
-                0.7,
-                1.0
-            )
-            
-            # Apply penalties
-            filtered_games['Score'] = filtered_games['Score'] * min_bet_penalty
-            filtered_games['Score'] = filtered_games['Score'] * volatility_penalty
-            
-            # Sort by score descending
-            filtered_games = filtered_games.sort_values('Score', ascending=False)
+        # Ranked once per filter state and session bankroll for the whole
+        # process (ranking.RANKING_CACHE); each session only applies its
+        # blacklist, and a "Not Available" pick promotes the next candidate
+        # instead of refiltering and rescoring
+        ranking_state = ranking_key(filter_index, catalog_hash(game_df), max_min_bet, min_rtp, game_type,
+                                    advantage_filter, volatility_filter, search_query, session_bankroll,
+                                    casino)
+        
+        def rank_filtered_games():
+            # Apply filters through the index built once per catalog load
+            with stage("filter"):
+                filtered_rows = filter_index.query(
+                    max_min_bet,
+                    min_rtp,
+                    game_type=game_type,
+                    advantage=advantage_filter,
+                    volatility=volatility_filter,
+                    casino=casino,
+                )
+                if fuzzy_search:
+                    filtered_rows = np.sort(search_index.fuzzy(search_query, limit=50, rows=filtered_rows))
+                elif search_rows is not None:
+                    filtered_rows = np.intersect1d(filtered_rows, search_rows, assume_unique=True)
+            # Score against the feature matrix built once per catalog load
+            with stage("score"):
+                rows, scores = rank_games(game_features, session_bankroll, max_bet, strategy_type,
+                                          rows=filtered_rows)
+                return Ranking(rows, scores)
+        
+        def rank_candidates():
+            ranking = RANKING_CACHE.get_or_compute(ranking_state, rank_filtered_games)
+            return RankedCandidates(ranking.rows, ranking.scores, size=num_sessions + 20, ranked=True)
+        
+        candidates = get_ranked_candidates(ranking_state + (num_sessions,), rank_candidates,
+                                           get_blacklisted_games(), filter_index.name_positions)
+        
+        if len(candidates):
+            if fuzzy_search:
+                st.caption(f"No exact matches for '{search_query}', showing closest names")
+            filtered_games = game_df.iloc[candidates.rows].assign(Score=candidates.scores)
+            threshold_factor = min_bet_threshold_factor(strategy_type)
             
             # Get recommended games for the number of sessions
-            num_sessions = st.session_state.trip_settings['num_sessions']
             recommended_games = filtered_games.head(num_sessions)
             
+            # Simulate sessions for every card shown below (plan + 20 extras)
+            with stage("simulate"):
+                session_risk = get_session_risk(
+                    game_df,
+                    filtered_games.index.to_numpy(),
+                    session_bankroll,
+                    bet_unit,
+                    stop_loss,
+                )
+            
             # Display bankroll management strategy
             st.markdown(f"""
             <div class="trip-info-box">
@@ -238,104 +215,101 @@ with tab1:
             # Consolidated game recommendations
             st.subheader(f"🎯 Recommended Play Order ({len(recommended_games)} games for {num_sessions} sessions)")
             st.info("Play games in this order for optimal results:")
-            st.caption("Don't see a game at your casino? Swipe left (click 'Not Available') to replace it")
+            st.caption("Don't see a game at your casino? Pick it under 'Not Available' to replace it")
+            
+            # Risk details per game, keyed by catalog row
+            risk_html = {idx: session_risk_details(**risk)
+                         for idx, risk in session_risk.to_dict('index').items()}
+            
+            def render_cards(games, numbered=False):
+                # Zips plain column arrays (labels precomputed at catalog load)
+                # rather than building a Series per row with iterrows()
+                columns = (games.index, games['game_name'], games['Score'], games['type'],
+                           games['min_bet'], games['advantage_label'], games['volatility_label'],
+                           games['bonus_label'], games['rtp'])
+                for i, (idx, name, score, game_type, min_bet, advantage, volatility, bonus, rtp) in enumerate(
+                        zip(*columns), start=1):
+                    yield game_card(name, score, game_type, min_bet, advantage, volatility, bonus, rtp,
+                                    get_game_tip(game_df, idx), risk_html[idx], i if numbered else None)
             
             if not recommended_games.empty:
-                # Display games in play order with session numbers
-                st.markdown('<div class="ph-game-grid">', unsafe_allow_html=True)
-                for i, (_, row) in enumerate(recommended_games.iterrows(), start=1):
-                    # Add session number to game card
-                    session_card = f"""
-                    <div class="ph-game-card" style="border-left: 6px solid #1976d2; position:relative;">
-                        <div style="position:absolute; top:10px; right:10px; background:#1976d2; color:white; 
-                                    border-radius:50%; width:30px; height:30px; display:flex; 
-                                    align-items:center; justify-content:center; font-weight:bold;">
-                            {i}
-                        </div>
-                        <div class="ph-game-title">🎰 {row['game_name']} <span style="font-size:0.9rem; color:#27ae60;">⭐ Score: {row['Score']:.1f}/10</span></div>
-                        <div class="ph-game-detail">
-                            <strong>🗂️ Type:</strong> {row['type']}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>💸 Min Bet:</strong> ${row['min_bet']:,.2f}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🧠 Advantage Play:</strong> {map_advantage(int(row['advantage_play_potential']))}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🎲 Volatility:</strong> {map_volatility(int(row['volatility']))}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🎁 Bonus Frequency:</strong> {map_bonus_freq(row['bonus_frequency'])}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🔢 RTP:</strong> {row['rtp']:.2f}%
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>💡 Tips:</strong> {row['tips']}
-                        </div>
-                    </div>
-                    """
-                    st.markdown(session_card, unsafe_allow_html=True)
-                    
-                    # Add swipe/not available button
-                    if st.button(f"🚫 Not Available - {row['game_name']}", 
-                                key=f"not_available_{row['game_name']}_{i}",
-                                use_container_width=True,
-                                type="primary"):
-                        blacklist_game(row['game_name'])
-                        st.success(f"Replaced {row['game_name']} with a new recommendation")
-                        st.rerun()
+                # Display games in play order with session numbers, the whole
+                # grid as one element instead of one per card
+                with stage("render_cards"):
+                    st.markdown(game_grid(render_cards(recommended_games, numbered=True)),
+                                unsafe_allow_html=True)
                 
-                st.markdown('</div>', unsafe_allow_html=True)
+                # One control for the whole plan instead of a button per card
+                st.pills(
+                    "🚫 Not Available",
+                    options=list(recommended_games['game_name']),
+                    key="not_available_pick",
+                    on_change=replace_unavailable_game,
+                    args=("not_available_pick",),
+                )
+                if st.session_state.get('replaced_game'):
+                    st.success(f"Replaced {st.session_state.pop('replaced_game')} with a new recommendation")
             else:
                 st.warning("Not enough games match your criteria for all sessions")
             
             # Show additional matching games
-            extra_games = filtered_games[~filtered_games.index.isin(recommended_games.index)]
+            extra_games = filtered_games.iloc[len(recommended_games):]
             if not extra_games.empty:
-                st.subheader(f"➕ {len(extra_games)} Additional Recommended Games")
+                st.subheader(f"➕ {len(candidates) - len(recommended_games)} Additional Recommended Games")
                 st.caption("These games also match your criteria but aren't in your session plan:")
-                
-                st.markdown('<div class="ph-game-grid">', unsafe_allow_html=True)
-                for _, row in extra_games.head(20).iterrows():
-                    # Create a standard game card for additional games
-                    game_card = f"""
-                    <div class="ph-game-card">
-                        <div class="ph-game-title">🎰 {row['game_name']} <span style="font-size:0.9rem; color:#27ae60;">⭐ Score: {row['Score']:.1f}/10</span></div>
-                        <div class="ph-game-detail">
-                            <strong>🗂️ Type:</strong> {row['type']}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>💸 Min Bet:</strong> ${row['min_bet']:,.2f}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🧠 Advantage Play:</strong> {map_advantage(int(row['advantage_play_potential']))}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🎲 Volatility:</strong> {map_volatility(int(row['volatility']))}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🎁 Bonus Frequency:</strong> {map_bonus_freq(row['bonus_frequency'])}
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>🔢 RTP:</strong> {row['rtp']:.2f}%
-                        </div>
-                        <div class="ph-game-detail">
-                            <strong>💡 Tips:</strong> {row['tips']}
-                        </div>
-                    </div>
-                    """
-                    st.markdown(game_card, unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
+                with stage("render_cards"):
+                    st.markdown(game_grid(render_cards(extra_games.head(20))), unsafe_allow_html=True)
+            
+            # The same filtered games scored across a range of bankrolls in
+            # one call, to see where the tier boundaries reshuffle the plan
+            with st.expander("🔀 What-If: Bankroll Sweep", expanded=False):
+                sweep_low, sweep_high = st.slider("Session Bankroll Range ($)", 5.0, 1000.0, (10.0, 600.0),
+                                                  step=5.0, key="whatif_range")
+                if st.toggle("Show how the play order changes", key="whatif_enabled"):
+                    with stage("what_if"):
+                        sweep = what_if_sweep(
+                            game_features,
+                            np.sort(candidates.remaining_rows()),
+                            sweep_bankrolls(sweep_low, sweep_high, include=[session_bankroll]),
+                            limit=num_sessions,
+                        )
+                        st.dataframe(
+                            sweep.play_order_table(game_df['game_name'].to_numpy(), current=session_bankroll),
+                            width="stretch",
+                        )
+                    st.caption("Rows either side of $20, $100 and $500 show the tier changes. "
+                               "Changes counts plan positions that differ from the row above; "
+                               "the filters, including Max Min Bet, are held fixed.")
         else:
             st.warning("No games match your current filters. Try adjusting your criteria.")
     else:
         st.error("Failed to load game data. Please check the CSV format and column names.")
 
-with tab2:
+@st.fragment(key="session_tracker")
+@stage("session_tracker")
+def render_session_tab():
     game_df = load_game_data()
-    render_session_tracker(game_df, session_bankroll)
+    render_session_tracker(game_df, get_session_bankroll())
+
+@st.fragment(key="trip_analytics")
+@stage("analytics")
+def render_analytics_tab():
+    render_analytics()
+
+render_bankroll_summary()
+
+tab1, tab2, tab3 = st.tabs(["🎮 Game Plan", "📊 Session Tracker", "📈 Trip Analytics"])
+
+with tab1:
+    render_game_plan()
+
+with tab2:
+    render_session_tab()
 
 with tab3:
-    render_analytics()
\ No newline at end of file
+    render_analytics_tab()
+
+render_diagnostics(finish_rerun(), counters={
+    "Ranking cache": ranking_cache_stats(),
+    "Game catalog": catalog_refresher.status(),
+})
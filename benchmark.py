@@ -0,0 +1,234 @@
+"""
+Synthetic-data benchmarks for the core per-rerun paths.
+
+Run outside a Streamlit server (``st.session_state`` and the caches work in
+bare mode)::
+
+    python benchmark.py                          # 1k, 10k, 100k, 1M rows
+    python benchmark.py --sizes 1000 10000 --output results.json
+    python benchmark.py --save-baseline          # record this machine's numbers
+    python benchmark.py --baseline .benchmark_baseline.json --threshold 0.25
+
+Each size generates a synthetic catalog (realistic RTP, min-bet,
+volatility, advantage-play and bonus-frequency distributions, raw column
+names so the alias mapping is exercised) and a synthetic session log spread
+over many trips, then times:
+
+* ``normalize``: ``data_loader.normalize_game_data`` + ``compact_game_data``;
+* ``filter_build`` / ``filter``: building the filter index and one query;
+* ``score``: ``scoring.rank_games`` over the filtered rows;
+* ``trip_getters``: ``get_trip_profit`` + ``get_session_bankroll``;
+* ``trip_summaries_cold`` / ``trip_summaries_warm``:
+  ``analytics._compute_trip_summaries`` without and with its memo.
+
+Results are written as JSON. With ``--baseline`` each median is compared to
+the stored one and the run exits with status 1 if any benchmark is slower by
+more than ``--threshold`` (a fraction, 0.25 = 25%). Baselines are machine
+specific, so they are not committed (``.benchmark_baseline.json`` is
+gitignored).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit import logger as streamlit_logger
+
+from analytics import _CACHE_KEY, _compute_trip_summaries
+from data_loader import compact_game_data, normalize_game_data
+from filter_index import ALL, build_filter_index
+from scoring import build_game_features, rank_games
+from session_log import SessionLog
+from trip_manager import get_session_bankroll, get_trip_profit, rebuild_trip_stats
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".benchmark_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+MIN_REPEAT = 5
+TARGET_SECONDS = 1.0
+
+GAME_TYPES = ["Slot", "Video Poker", "Table Game", "Keno", "Electronic Table"]
+DENOMINATIONS = np.array([0.01, 0.05, 0.25, 0.40, 0.50, 1.0, 2.0, 5.0, 10.0, 25.0])
+DENOMINATION_WEIGHTS = np.array([0.30, 0.10, 0.15, 0.10, 0.10, 0.10, 0.05, 0.05, 0.03, 0.02])
+CASINOS = ["Delta Downs", "Coushatta", "Island View", "Paragon Marksville"]
+
+
+def synthetic_catalog(n_games: int, seed: int = 0) -> pd.DataFrame:
+    """A raw catalog as it would arrive from the CSV, before normalization."""
+    rng = np.random.default_rng(seed)
+    rtp = np.clip(99.5 - rng.gamma(2.0, 2.5, n_games), 85.0, 99.8).round(2)
+    min_bet = rng.choice(DENOMINATIONS, n_games, p=DENOMINATION_WEIGHTS)
+    return pd.DataFrame({
+        "Game Name": [f"Game {i:07d}" for i in range(n_games)],
+        "Game Type": rng.choice(GAME_TYPES, n_games, p=[0.6, 0.15, 0.15, 0.05, 0.05]),
+        "RTP": rtp.astype(str),
+        "Min Bet": min_bet.astype(str),
+        "Advantage Play Potential": rng.choice(np.arange(1, 6), n_games, p=[0.35, 0.25, 0.2, 0.12, 0.08]),
+        "Volatility": rng.choice(np.arange(1, 6), n_games, p=[0.1, 0.2, 0.3, 0.25, 0.15]),
+        "Bonus Frequency": rng.beta(2.0, 6.0, n_games).round(3),
+        "Tips": "Play max lines when the progressive is high",
+    })
+
+
+def synthetic_sessions(n_sessions: int, n_trips: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Session dicts spread over ``n_trips`` trips, in random order."""
+    rng = np.random.default_rng(seed)
+    trip_ids = rng.integers(1, n_trips + 1, n_sessions)
+    days = rng.integers(0, 365, n_sessions)
+    dates = (np.datetime64("2024-01-01") + days).astype(str)
+    money_in = rng.choice([20.0, 50.0, 100.0, 200.0], n_sessions)
+    money_out = np.round(money_in * rng.gamma(1.5, 0.6, n_sessions), 2)
+    casinos = rng.choice(CASINOS, n_sessions)
+    return [
+        {"trip_id": int(trip_id), "date": date, "casino": casino, "game": f"Game {i % 5000:07d}",
+         "money_in": float(m_in), "money_out": float(m_out), "profit": float(m_out - m_in), "notes": ""}
+        for i, (trip_id, date, casino, m_in, m_out)
+        in enumerate(zip(trip_ids, dates, casinos, money_in, money_out))
+    ]
+
+
+def time_call(func: Callable[[], Any], setup: Optional[Callable[[], Any]] = None,
+              min_repeat: int = MIN_REPEAT, target_seconds: float = TARGET_SECONDS) -> Dict[str, Any]:
+    """Time ``func`` at least ``min_repeat`` times, or for about ``target_seconds``."""
+    timings: List[float] = []
+    deadline = time.perf_counter() + target_seconds
+    while len(timings) < min_repeat or (time.perf_counter() < deadline and len(timings) < 1000):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "repeat": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+    }
+
+
+def _init_session_state(session_log: SessionLog, n_trips: int) -> None:
+    st.session_state.session_log = session_log
+    st.session_state.trip_bankrolls = {trip_id: 100.0 for trip_id in range(1, n_trips + 1)}
+    st.session_state.trip_settings = {"casino": CASINOS[0], "starting_bankroll": 100.0, "num_sessions": 10}
+    st.session_state.current_trip_id = 1
+    rebuild_trip_stats()
+
+
+def run_size(n: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """Run every benchmark for catalogs and session logs of ``n`` rows."""
+    results: Dict[str, Dict[str, Any]] = {}
+    raw = synthetic_catalog(n, seed)
+
+    results["normalize"] = time_call(lambda: compact_game_data(normalize_game_data(raw)))
+    game_df = compact_game_data(normalize_game_data(raw))
+
+    results["filter_build"] = time_call(lambda: build_filter_index(game_df))
+    index = build_filter_index(game_df)
+    query = dict(max_min_bet=25.0, min_rtp=92.0, game_type=ALL, advantage=ALL, volatility=ALL,
+                 exclude_names={"Game 0000001", "Game 0000002"})
+    results["filter"] = time_call(lambda: game_df.iloc[index.query(**query)])
+    filtered = game_df.iloc[index.query(**query)]
+
+    features = build_game_features(game_df)
+    rows = filtered.index.to_numpy()
+
+    def score():
+        ranked_rows, scores = rank_games(features, 100.0, 25.0, "Standard", rows=rows)
+        return game_df.iloc[ranked_rows].assign(Score=scores)
+
+    results["score"] = time_call(score)
+
+    n_trips = max(10, n // 100)
+    session_log = SessionLog(synthetic_sessions(n, n_trips, seed))
+    _init_session_state(session_log, n_trips)
+    results["trip_getters"] = time_call(lambda: (get_trip_profit(), get_session_bankroll()))
+
+    def clear_summary_cache():
+        st.session_state.pop(_CACHE_KEY, None)
+
+    results["trip_summaries_cold"] = time_call(_compute_trip_summaries, setup=clear_summary_cache)
+    _compute_trip_summaries()
+    results["trip_summaries_warm"] = time_call(_compute_trip_summaries)
+    return results
+
+
+def run(sizes: List[int], seed: int = 0) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for n in sizes:
+        for name, timing in run_size(n, seed).items():
+            results[f"{name}[{n}]"] = timing
+            print(f"{name + f'[{n}]':<32} median {timing['median_s'] * 1000:>10.3f} ms "
+                  f"(min {timing['min_s'] * 1000:.3f} ms, {timing['repeat']} runs)")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "sizes": sizes,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Names of benchmarks whose median regressed by more than ``threshold``."""
+    regressions = []
+    for name, timing in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = timing["median_s"] / previous["median_s"] if previous["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:<32} {ratio:6.2f}x baseline {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="catalog / session log sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing, as a fraction (default 0.25)")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"also write the results as the new baseline (default {DEFAULT_BASELINE})")
+    args = parser.parse_args(argv)
+
+    # Bare mode: keep Streamlit's "no runtime" warnings out of the report
+    streamlit_logger.set_log_level("error")
+
+    report = run(args.sizes, args.seed)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: "
+                  + ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+Local snapshot cache for the remote game catalog.
+
+:func:`fetch_catalog` keeps the last normalized catalog on disk as an
+uncompressed NumPy ``.npz`` file named after the SHA-256 of the raw CSV it
+was built from. A small JSON manifest records that hash together with the
+HTTP validators (``ETag`` / ``Last-Modified``) of the download, so that:
+
+* cold starts within ``max_age`` seconds of the last check load the snapshot
+  without touching the network;
+* after ``max_age`` the source is revalidated with a conditional request and
+  only downloaded and re-normalized when it has actually changed;
+* network failures fall back to the last good snapshot, so the app keeps
+  working offline.
+
+When the catalog changes, the previous snapshot is kept alongside the new
+one for processes that read the old manifest, and a load whose snapshot was
+removed anyway is retried once against the current manifest.
+
+The cache directory defaults to ``.catalog_cache`` next to this module and can
+be moved with the ``PROFIT_HOPPER_CACHE_DIR`` environment variable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get(
+    "PROFIT_HOPPER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".catalog_cache"),
+)
+MANIFEST_NAME = "manifest.json"
+
+# Bump whenever the normalization or the on-disk layout changes so that old
+# snapshots are rebuilt instead of being loaded with the wrong shape.
+SNAPSHOT_VERSION = 2
+
+# DataFrame attribute with the in-memory bytes per row of the raw CSV the
+# catalog was normalized from (before any columns were dropped or compacted)
+RAW_BYTES_ATTR = "raw_bytes_per_game"
+
+_COLUMNS_KEY = "__columns__"
+_NULLS_PREFIX = "__nulls__"
+
+
+def _cache_path(name: str, cache_dir: Optional[str] = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, name)
+
+
+def _atomic_write(path: str, write: Callable[[io.BufferedWriter], None]) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_manifest(cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Return the cache manifest, or an empty dict if there is no usable one."""
+    try:
+        with open(_cache_path(MANIFEST_NAME, cache_dir), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        return {}
+    return manifest
+
+
+def _write_manifest(manifest: Dict[str, Any], cache_dir: Optional[str] = None) -> None:
+    payload = json.dumps(dict(manifest, version=SNAPSHOT_VERSION), indent=2).encode("utf-8")
+    _atomic_write(_cache_path(MANIFEST_NAME, cache_dir), lambda fh: fh.write(payload))
+
+
+def snapshot_name(content_hash: str) -> str:
+    return f"catalog_{content_hash[:16]}.npz"
+
+
+def write_snapshot(df: pd.DataFrame, path: str) -> None:
+    """Store ``df`` column by column in an uncompressed ``.npz`` file.
+
+    Text columns are written as fixed-width unicode arrays (no pickling), with
+    a separate null mask so that missing values survive the round trip.
+    """
+    arrays: Dict[str, np.ndarray] = {_COLUMNS_KEY: np.array(list(df.columns), dtype=str)}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if not pd.api.types.is_numeric_dtype(series.dtype):
+            nulls = series.isna().to_numpy()
+            if nulls.any():
+                arrays[f"{_NULLS_PREFIX}{i}"] = nulls
+            arrays[str(i)] = np.array(series.fillna("").astype(str).tolist(), dtype=str)
+        else:
+            arrays[str(i)] = series.to_numpy()
+    _atomic_write(path, lambda fh: np.savez(fh, **arrays))
+
+
+def read_snapshot(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Load a DataFrame written by :func:`write_snapshot`.
+
+    ``.npz`` members are read lazily, so passing ``columns`` only pays for the
+    requested columns.
+    """
+    with np.load(path, allow_pickle=False) as npz:
+        stored = npz[_COLUMNS_KEY].tolist()
+        columns = stored if columns is None else list(columns)
+        data = {}
+        for col in columns:
+            i = stored.index(col)
+            values = npz[str(i)]
+            if values.dtype.kind == "U":
+                series = pd.Series(values)
+                null_key = f"{_NULLS_PREFIX}{i}"
+                if null_key in npz.files:
+                    series = series.mask(npz[null_key])
+                data[col] = series
+            else:
+                data[col] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+def _snapshot_path(manifest: Dict[str, Any], cache_dir: Optional[str]) -> Optional[str]:
+    content_hash = manifest.get("content_hash")
+    if not content_hash:
+        return None
+    path = _cache_path(snapshot_name(content_hash), cache_dir)
+    return path if os.path.exists(path) else None
+
+
+def _remove_stale_snapshots(keep: Sequence[str], cache_dir: Optional[str]) -> None:
+    directory = cache_dir or CACHE_DIR
+    for name in os.listdir(directory):
+        if name.startswith("catalog_") and name.endswith(".npz") and name not in keep:
+            try:
+                os.unlink(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _conditional_get(url: str, manifest: Dict[str, Any], timeout: float) -> Optional[bytes]:
+    """Download ``url`` unless it matches the validators in ``manifest``.
+
+    Returns ``None`` when the server answers ``304 Not Modified``. Local paths
+    are read directly.
+    """
+    if "://" not in url:
+        with open(url, "rb") as fh:
+            return fh.read()
+
+    request = urllib.request.Request(url)
+    if manifest.get("etag"):
+        request.add_header("If-None-Match", manifest["etag"])
+    if manifest.get("last_modified"):
+        request.add_header("If-Modified-Since", manifest["last_modified"])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            manifest["etag"] = response.headers.get("ETag")
+            manifest["last_modified"] = response.headers.get("Last-Modified")
+            return body
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return None
+        raise
+
+
+def fetch_catalog(
+    url: str,
+    normalize: Callable[[pd.DataFrame], pd.DataFrame],
+    max_age: float = 3600,
+    timeout: float = 10,
+    cache_dir: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[pd.DataFrame, str]:
+    """Return the normalized catalog for ``url`` and its content hash.
+
+    Parameters
+    ----------
+    url : str
+        Remote CSV URL (or local path) of the catalog.
+    normalize : callable
+        Turns the raw CSV DataFrame into the normalized catalog. Only called
+        when the source content has changed.
+    max_age : float
+        Seconds a snapshot is trusted before the source is revalidated.
+    timeout : float
+        Network timeout in seconds for the revalidation request.
+    cache_dir : str, optional
+        Override of :data:`CACHE_DIR`.
+    columns : sequence of str, optional
+        Only return these columns of the catalog.
+
+    Raises
+    ------
+    Exception
+        Whatever the download or ``normalize`` raised, but only when there is
+        no snapshot to fall back to.
+
+    The raw CSV's in-memory size per row, recorded in the manifest when it
+    was normalized, is returned in ``df.attrs[RAW_BYTES_ATTR]``.
+    """
+    try:
+        df, content_hash, manifest = _fetch(url, normalize, max_age, timeout, cache_dir, columns)
+    except FileNotFoundError:
+        # Another process replaced the catalog between our manifest read and
+        # the snapshot load; its manifest now names a snapshot that exists
+        logger.info("Catalog snapshot was replaced while loading, retrying")
+        df, content_hash, manifest = _fetch(url, normalize, max_age, timeout, cache_dir, columns)
+    df.attrs[RAW_BYTES_ATTR] = manifest.get(RAW_BYTES_ATTR)
+    return df, content_hash
+
+
+def _fetch(
+    url: str,
+    normalize: Callable[[pd.DataFrame], pd.DataFrame],
+    max_age: float,
+    timeout: float,
+    cache_dir: Optional[str],
+    columns: Optional[Sequence[str]],
+) -> Tuple[pd.DataFrame, str, Dict[str, Any]]:
+    manifest = read_manifest(cache_dir)
+    if manifest.get("url") != url:
+        manifest = {}
+    snapshot = _snapshot_path(manifest, cache_dir)
+    previous_hash = manifest.get("content_hash")
+
+    if snapshot is not None and time.time() - manifest.get("checked_at", 0) < max_age:
+        return read_snapshot(snapshot, columns), previous_hash, manifest
+
+    validators = manifest if snapshot is not None else {}
+    try:
+        body = _conditional_get(url, validators, timeout)
+    except Exception as exc:
+        if snapshot is None:
+            raise
+        logger.warning("Catalog refresh failed (%s), serving snapshot %s", exc, snapshot)
+        return read_snapshot(snapshot, columns), previous_hash, manifest
+
+    manifest = dict(validators, url=url, checked_at=time.time())
+    if body is None:
+        _write_manifest(manifest, cache_dir)
+        return read_snapshot(snapshot, columns), previous_hash, manifest
+
+    content_hash = hashlib.sha256(body).hexdigest()
+    if snapshot is not None and content_hash == previous_hash:
+        _write_manifest(manifest, cache_dir)
+        return read_snapshot(snapshot, columns), content_hash, manifest
+
+    try:
+        raw = pd.read_csv(io.BytesIO(body))
+        raw_bytes = float(raw.memory_usage(index=True, deep=True).sum() / max(len(raw), 1))
+        df = normalize(raw)
+    except Exception as exc:
+        if snapshot is None:
+            raise
+        logger.warning("New catalog could not be normalized (%s), serving snapshot %s", exc, snapshot)
+        return read_snapshot(snapshot, columns), previous_hash, manifest
+
+    name = snapshot_name(content_hash)
+    write_snapshot(df, _cache_path(name, cache_dir))
+    manifest["content_hash"] = content_hash
+    manifest[RAW_BYTES_ATTR] = raw_bytes
+    _write_manifest(manifest, cache_dir)
+    # The previous snapshot stays for processes that read the old manifest
+    _remove_stale_snapshots([name] + ([snapshot_name(previous_hash)] if previous_hash else []), cache_dir)
+    if columns is not None:
+        df = df[list(columns)]
+    return df, content_hash, manifest
@@ -0,0 +1,201 @@
+"""
+Stale-while-revalidate refresh of the shared game catalog.
+
+:class:`CatalogRefresher` is the process-wide holder behind
+``data_loader.load_game_data``. Every call returns the currently published
+catalog (see :mod:`shared_catalog`) straight away; once it is older than the
+TTL, the call also starts a refresh on a background thread and still returns
+the current copy. Only a cold start, with nothing published yet, waits for
+the load.
+
+Refreshes are single-flight at two levels:
+
+* within a process, concurrent callers share one in-flight
+  :class:`concurrent.futures.Future`;
+* across worker processes, the refresh first claims a lock file next to the
+  shared catalog (``O_CREAT | O_EXCL``), so one process downloads and
+  normalizes while the others keep serving and pick the new version up
+  through the pointer file.
+
+The new version is swapped in atomically by ``publish_catalog``. When a
+refresh fails, the last good copy stays in service and the next attempt is
+delayed by ``retry_delay`` seconds; the failure is logged and reported by
+:meth:`CatalogRefresher.status` instead of being shown to users.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from shared_catalog import SHARED_DIR, attach_catalog, attached_pointer, publish_catalog, read_pointer
+
+logger = logging.getLogger(__name__)
+
+CLAIM_NAME = "refresh.lock"
+CLAIM_TIMEOUT = 300.0
+COLD_START_TIMEOUT = 120.0
+POLL_INTERVAL = 0.1
+
+
+class CatalogRefresher:
+    """Serves the shared catalog and refreshes it in the background.
+
+    Parameters
+    ----------
+    load : callable
+        Returns a freshly loaded catalog whose ``attrs`` carry
+        ``catalog_hash`` (``data_loader.read_game_data``).
+    ttl : float
+        Seconds after publication at which the catalog counts as stale.
+    retry_delay : float
+        Seconds to wait after a failed refresh before trying again.
+    directory : str, optional
+        Shared catalog directory; defaults to ``shared_catalog.SHARED_DIR``.
+    """
+
+    def __init__(self, load: Callable[[], pd.DataFrame], ttl: float, retry_delay: float = 60.0,
+                 directory: Optional[str] = None) -> None:
+        self.load = load
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self.directory = directory or SHARED_DIR
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Used only when the catalog can't be published (read-only disk)
+        self._private: Optional[pd.DataFrame] = None
+        self._private_at = 0.0
+        self._retry_at = 0.0
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def _age(self, pointer: Optional[Dict[str, Any]]) -> float:
+        return time.time() - pointer["published_at"] if pointer else float("inf")
+
+    def _private_age(self) -> float:
+        return time.time() - self._private_at if self._private is not None else float("inf")
+
+    def get(self) -> pd.DataFrame:
+        """The current catalog, starting a background refresh if it is stale.
+
+        Raises
+        ------
+        Exception
+            Whatever the load raised, only on a cold start with no catalog
+            to fall back to.
+        """
+        games = attach_catalog(self.directory)
+        age = self._age(attached_pointer())
+        private_age = self._private_age()
+        if private_age < age:
+            # Refreshed, but couldn't publish: newer than the shared copy
+            games, age = self._private, private_age
+        if games is None:
+            return self._cold_start()
+        if age > self.ttl and time.time() >= self._retry_at:
+            self._start_refresh()
+        return games
+
+    def _cold_start(self) -> pd.DataFrame:
+        self._start_refresh().result()
+        deadline = time.time() + COLD_START_TIMEOUT
+        while True:
+            # Another process may hold the claim and publish for everyone
+            games = attach_catalog(self.directory)
+            if games is None:
+                games = self._private
+            if games is not None:
+                return games
+            if time.time() > deadline:
+                raise TimeoutError("Timed out waiting for the game catalog to be published")
+            if not os.path.exists(os.path.join(self.directory, CLAIM_NAME)):
+                # The process that held the claim gave up; try again here
+                self._start_refresh().result()
+            time.sleep(POLL_INTERVAL)
+
+    def _start_refresh(self) -> Future:
+        with self._lock:
+            if self._future is None or self._future.done():
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-refresh")
+                self._future = self._executor.submit(self._refresh)
+            return self._future
+
+    def _refresh(self) -> None:
+        claim = os.path.join(self.directory, CLAIM_NAME)
+        if not _claim(claim):
+            return
+        try:
+            # Someone may have published (or this process refreshed its
+            # private copy) since the catalog was seen stale
+            if min(self._age(read_pointer(self.directory)), self._private_age()) <= self.ttl:
+                return
+            start = time.perf_counter()
+            fresh = self.load()
+            try:
+                publish_catalog(fresh, fresh.attrs["catalog_hash"], self.directory)
+            except OSError as exc:
+                logger.warning("Could not publish the shared catalog (%s), using a private copy", exc)
+                self._private, self._private_at = fresh, time.time()
+                self._retry_at = time.time() + self.retry_delay
+            self.refreshes += 1
+            self.last_error = None
+            logger.info("Catalog refreshed in %.2fs", time.perf_counter() - start)
+        except Exception as exc:
+            self.failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            self._retry_at = time.time() + self.retry_delay
+            logger.warning("Catalog refresh failed (%s), serving the last good copy", exc)
+            raise
+        finally:
+            _release(claim)
+
+    def status(self) -> Dict[str, Any]:
+        """Version, age and refresh counters, for the diagnostics panel."""
+        pointer = attached_pointer()
+        refreshing = self._future is not None and not self._future.done()
+        return {
+            "version": pointer["version"] if pointer else None,
+            "age_s": round(self._age(pointer)) if pointer else None,
+            "refreshing": refreshing,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+def _claim(path: str) -> bool:
+    for _ in range(2):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < CLAIM_TIMEOUT:
+                    return False
+                os.unlink(path)  # left behind by a crashed process
+            except OSError:
+                pass
+            continue
+        except OSError:
+            # Nowhere to coordinate (read-only disk): refresh unclaimed
+            return True
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+
+def _release(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,208 @@
+"""
+Game catalog assembled from several sources.
+
+By default the catalog is one CSV. With ``PROFIT_HOPPER_CATALOG_SOURCES``
+set (to a JSON file, or to the JSON itself) it is merged from a list of
+sources instead::
+
+    {"sources": [
+        {"name": "master", "url": "https://.../extended_game_list.csv"},
+        {"name": "local-additions", "url": "extra_games.csv", "precedence": 10},
+        {"name": "delta-downs", "url": "casinos/delta_downs.csv",
+         "role": "availability", "casino": "Delta Downs"},
+        {"name": "min-bets", "url": "overrides.csv", "role": "overrides"}
+    ]}
+
+Roles:
+
+* ``master`` (default): full game rows. A game listed by several masters is
+  taken from the one with the highest ``precedence``; on a tie, the one
+  listed first.
+* ``overrides``: a game name plus any catalog columns (e.g. ``min_bet``).
+  Each non-empty value replaces the master's, the highest ``precedence``
+  override winning per column.
+* ``availability``: game names offered at a casino, from a ``casino``
+  column or the source's ``casino`` setting. The merged catalog gets a
+  ``casinos`` column (names joined by :data:`CASINO_SEPARATOR`) that the
+  Game Plan filter uses for the trip's casino.
+
+:func:`load_sources` fetches every source concurrently on a thread pool
+(``parallel.run_tasks``), each through ``catalog_cache.fetch_catalog`` with
+its own snapshot directory, so the load takes about as long as the slowest
+source. :func:`merge_sources` then joins them on :func:`game_key` (the
+case- and whitespace-insensitive game name) with vectorized pandas
+operations. Relative paths in a config file are resolved against the file's
+directory.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from catalog_cache import CACHE_DIR, RAW_BYTES_ATTR, fetch_catalog
+from parallel import run_tasks
+
+logger = logging.getLogger(__name__)
+
+SOURCES_ENV = "PROFIT_HOPPER_CATALOG_SOURCES"
+ROLES = ("master", "overrides", "availability")
+CASINOS_COLUMN = "casinos"
+CASINO_SEPARATOR = "|"
+
+Normalizer = Callable[[pd.DataFrame], pd.DataFrame]
+
+
+@dataclass(frozen=True)
+class CatalogSource:
+    """One entry of the sources config."""
+
+    name: str
+    url: str
+    role: str = "master"
+    precedence: int = 0
+    casino: Optional[str] = None
+
+
+def read_source_config(value: Optional[str] = None) -> List[CatalogSource]:
+    """Sources from ``value`` (a JSON file path or JSON text), defaulting to
+    :data:`SOURCES_ENV`. Returns an empty list when nothing is configured.
+
+    Raises
+    ------
+    ValueError
+        If an entry has an unknown role or no source has the ``master`` role.
+    """
+    value = os.environ.get(SOURCES_ENV, "") if value is None else value
+    if not value.strip():
+        return []
+    if value.lstrip().startswith(("{", "[")):
+        config, base = json.loads(value), os.getcwd()
+    else:
+        with open(value) as f:
+            config = json.load(f)
+        base = os.path.dirname(os.path.abspath(value))
+
+    sources = []
+    for entry in config["sources"] if isinstance(config, dict) else config:
+        source = CatalogSource(**entry)
+        if source.role not in ROLES:
+            raise ValueError(f"Catalog source {source.name!r} has unknown role {source.role!r}")
+        if "://" not in source.url and not os.path.isabs(source.url):
+            source = CatalogSource(**{**entry, "url": os.path.join(base, source.url)})
+        sources.append(source)
+    if not any(source.role == "master" for source in sources):
+        raise ValueError("Catalog sources need at least one 'master' source")
+    return sources
+
+
+def game_key(names: pd.Series) -> pd.Series:
+    """Merge key of each game name: trimmed, casefolded, single-spaced."""
+    return names.astype(str).str.strip().str.casefold().str.replace(r"\s+", " ", regex=True)
+
+
+def _source_cache_dir(source: CatalogSource, cache_dir: Optional[str]) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, "sources", re.sub(r"[^A-Za-z0-9_.-]", "_", source.name))
+
+
+def _load_source(task: Tuple[CatalogSource, Normalizer, Optional[str]],
+                 _seed: np.random.SeedSequence) -> Tuple[pd.DataFrame, str]:
+    source, normalize, cache_dir = task
+    return fetch_catalog(source.url, normalize, cache_dir=_source_cache_dir(source, cache_dir))
+
+
+def load_sources(
+    sources: Sequence[CatalogSource],
+    normalize_master: Normalizer,
+    normalize_partial: Normalizer,
+    cache_dir: Optional[str] = None,
+) -> Tuple[pd.DataFrame, str]:
+    """Fetch every source concurrently and merge them.
+
+    Parameters
+    ----------
+    sources : sequence of CatalogSource
+        Output of :func:`read_source_config`.
+    normalize_master : callable
+        Normalization of master sources (``data_loader.normalize_game_data``).
+    normalize_partial : callable
+        Normalization of override and availability sources, which only have
+        some of the columns (``data_loader.normalize_source_data``).
+    cache_dir : str, optional
+        Override of ``catalog_cache.CACHE_DIR``.
+
+    Returns
+    -------
+    tuple of (pandas.DataFrame, str)
+        The merged catalog and a hash of every source's content hash.
+    """
+    tasks = [(source, normalize_master if source.role == "master" else normalize_partial, cache_dir)
+             for source in sources]
+    results = run_tasks(_load_source, tasks, backend="thread", max_workers=len(tasks))
+    digest = hashlib.sha256()
+    for source, (_, content_hash) in zip(sources, results):
+        digest.update(f"{source.name}:{source.role}:{source.precedence}:{source.casino}:{content_hash}\n".encode())
+    merged = merge_sources([(source, df) for source, (df, _) in zip(sources, results)])
+    raw_bytes = [df.attrs.get(RAW_BYTES_ATTR) for df, _ in results]
+    if all(raw_bytes):
+        # Every parsed source, spread over the merged games
+        merged.attrs[RAW_BYTES_ATTR] = sum(size * len(df) for size, (df, _) in zip(raw_bytes, results)) \
+            / max(len(merged), 1)
+    return merged, digest.hexdigest()
+
+
+def _keyed(loaded: Sequence[Tuple[CatalogSource, pd.DataFrame]], role: str) -> Optional[pd.DataFrame]:
+    frames = [df.assign(_key=game_key(df["game_name"]), _precedence=source.precedence)
+              for source, df in loaded if source.role == role]
+    if not frames:
+        return None
+    # Highest precedence first; the stable sort keeps config order on ties
+    return pd.concat(frames, ignore_index=True).sort_values("_precedence", ascending=False, kind="stable")
+
+
+def merge_sources(loaded: Sequence[Tuple[CatalogSource, pd.DataFrame]]) -> pd.DataFrame:
+    """Merge normalized sources into one catalog (see the module docstring)."""
+    masters = _keyed(loaded, "master")
+    catalog = masters.drop_duplicates("_key").sort_index()
+    if len(catalog) < len(masters):
+        logger.info("Catalog sources: %d duplicate games resolved by precedence", len(masters) - len(catalog))
+    keys = catalog["_key"]
+
+    overrides = _keyed(loaded, "overrides")
+    if overrides is not None:
+        columns = [col for col in catalog.columns if col in overrides.columns and col not in ("game_name", "_key",
+                                                                                            "_precedence")]
+        # First non-null value per game and column, by precedence
+        best = overrides.groupby("_key", sort=False)[columns].first().reindex(keys)
+        for col in columns:
+            catalog[col] = best[col].set_axis(catalog.index).combine_first(catalog[col])
+
+    availability = []
+    for source, df in loaded:
+        if source.role != "availability":
+            continue
+        if "casino" in df.columns:
+            casino = df["casino"].where(df["casino"].notna() & (df["casino"].astype(str).str.strip() != ""),
+                                        source.casino)
+        elif source.casino:
+            casino = pd.Series(source.casino, index=df.index)
+        else:
+            raise ValueError(f"Availability source {source.name!r} has no casino column or setting")
+        availability.append(pd.DataFrame({"_key": game_key(df["game_name"]), "casino": casino}))
+    if availability:
+        pairs = pd.concat(availability, ignore_index=True).dropna().drop_duplicates()
+        unknown = ~pairs["_key"].isin(keys)
+        if unknown.any():
+            logger.info("Catalog sources: %d available games are not in any master list", int(unknown.sum()))
+        casinos = pairs.sort_values("casino").groupby("_key")["casino"].agg(CASINO_SEPARATOR.join)
+        catalog[CASINOS_COLUMN] = keys.map(casinos).fillna("")
+
+    return catalog.drop(columns=["_key", "_precedence"]).reset_index(drop=True)
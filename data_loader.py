@@ -1,58 +1,182 @@
+import hashlib
+import logging
+import numpy as np
 import pandas as pd
 import streamlit as st
-from utils import normalize_column_name
+from utils import advantage_labels, bonus_freq_labels, normalize_column_name, volatility_labels
+from catalog_cache import RAW_BYTES_ATTR, fetch_catalog
+from catalog_sources import CASINOS_COLUMN, load_sources, read_source_config
+from catalog_refresh import CatalogRefresher
+
+CATALOG_URL = "https://raw.githubusercontent.com/nwt002tech/profit-hopper/main/extended_game_list.csv"
+CATALOG_HASH_ATTR = "catalog_hash"
+BYTES_PER_GAME_ATTR = "bytes_per_game"
+CATALOG_TTL = 3600
+
+CATALOG_COLUMNS = ['game_name', 'type', 'rtp', 'min_bet', 'advantage_play_potential',
+                   'volatility', 'bonus_frequency', 'tips']
+# 1-5 scales: missing ratings are scored and filtered as the neutral default
+# (as when the whole column is missing); fractional ratings are kept
+SCALE_COLUMNS = {'advantage_play_potential': 3, 'volatility': 3}
+FLOAT32_COLUMNS = ['rtp', 'min_bet', 'bonus_frequency', 'advantage_play_potential', 'volatility']
+
+COLUMN_ALIASES = {
+    'rtp': ['rtp', 'expected_rtp'],
+    'min_bet': ['min_bet', 'minbet', 'minimum_bet', 'min_bet_amount'],
+    'advantage_play_potential': ['advantage_play_potential', 'app', 'advantage_potential'],
+    'volatility': ['volatility', 'vol'],
+    'bonus_frequency': ['bonus_frequency', 'bonus_freq', 'bonus_rate'],
+    'game_name': ['game_name', 'name', 'title', 'game'],
+    'type': ['type', 'game_type', 'category'],
+    'tips': ['tips', 'tip', 'strategy']
+}
+NUMERIC_COLUMNS = ['rtp', 'min_bet', 'advantage_play_potential', 'volatility', 'bonus_frequency']
+
+logger = logging.getLogger(__name__)
+
+class MissingColumnsError(ValueError):
+    pass
+
+def compute_catalog_hash(df):
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+def catalog_hash(df):
+    # Loaded catalogs carry their hash; anything else is hashed on demand
+    cached = df.attrs.get(CATALOG_HASH_ATTR)
+    return cached if cached is not None else compute_catalog_hash(df)
+
+def apply_column_aliases(df):
+    # Standard column names from the accepted spellings in COLUMN_ALIASES;
+    # also used on partial sources (availability lists, overrides)
+    df = df.copy()
+    df.columns = [normalize_column_name(col) for col in df.columns]
+
+    for standard, variants in COLUMN_ALIASES.items():
+        for variant in variants:
+            if variant in df.columns:
+                df[standard] = df[variant]
+                break
+    return df
+
+def normalize_game_data(df):
+    df = apply_column_aliases(df)
+
+    required_cols = ['rtp', 'min_bet']
+    missing = [col for col in required_cols if col not in df.columns]
+    if missing:
+        raise MissingColumnsError(f"Missing required columns: {', '.join(missing)}")
+
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    if 'advantage_play_potential' not in df.columns:
+        df['advantage_play_potential'] = 3
+    if 'volatility' not in df.columns:
+        df['volatility'] = 3
+    if 'bonus_frequency' not in df.columns:
+        df['bonus_frequency'] = 0.2
+
+    if 'game_name' not in df.columns:
+        df['game_name'] = "Unknown Game"
+    if 'type' not in df.columns:
+        df['type'] = "Unknown"
+    if 'tips' not in df.columns:
+        df['tips'] = "No tips available"
+
+    # Only the standardized columns are kept; the alias columns they were
+    # copied from are dropped. Positional index so derived arrays (scoring,
+    # filters) line up by row.
+    return df[CATALOG_COLUMNS].dropna(subset=['rtp', 'min_bet']).reset_index(drop=True)
+
+def normalize_source_data(df):
+    # Override and availability sources: aliases and numeric types only,
+    # since they carry just a game name plus a few columns
+    df = apply_column_aliases(df)
+    if 'game_name' not in df.columns:
+        raise MissingColumnsError("Missing required columns: game_name")
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    keep = [col for col in CATALOG_COLUMNS + ['casino'] if col in df.columns]
+    return df[keep].dropna(subset=['game_name']).reset_index(drop=True)
+
+def read_catalog(url=None, columns=None):
+    # Normalized (not compacted) catalog and its content hash: the sources
+    # configured in PROFIT_HOPPER_CATALOG_SOURCES merged, unless a url is
+    # given or none are configured
+    sources = [] if url else read_source_config()
+    if not sources:
+        return fetch_catalog(url or CATALOG_URL, normalize_game_data, columns=columns)
+    df, content_hash = load_sources(sources, normalize_game_data, normalize_source_data)
+    return (df if columns is None else df[list(columns)]), content_hash
+
+def bytes_per_game(df):
+    return df.memory_usage(index=True, deep=True).sum() / max(len(df), 1)
+
+def compact_game_data(df):
+    # Tips are served separately by get_game_tip(), so the catalog copy handed
+    # to every rerun only carries what filtering, scoring and cards need
+    compact = df.drop(columns=['tips'])
+    compact['type'] = compact['type'].astype('category')
+    if CASINOS_COLUMN in compact.columns:
+        compact[CASINOS_COLUMN] = compact[CASINOS_COLUMN].astype('category')
+    # Card display labels, computed once per load as categoricals (1 byte/game)
+    compact['advantage_label'] = advantage_labels(
+        compact['advantage_play_potential'].fillna(SCALE_COLUMNS['advantage_play_potential']).round().clip(1, 5))
+    compact['volatility_label'] = volatility_labels(
+        compact['volatility'].fillna(SCALE_COLUMNS['volatility']).round().clip(1, 5))
+    compact['bonus_label'] = bonus_freq_labels(compact['bonus_frequency'])
+    for col, default in SCALE_COLUMNS.items():
+        compact[col] = compact[col].fillna(default)
+    for col in FLOAT32_COLUMNS:
+        compact[col] = compact[col].astype(np.float32)
+    return compact
+
+def read_game_data(url=None):
+    # Uncached load, also used outside Streamlit (planner.py). Each source is
+    # served from its local snapshot unless it has changed
+    df, content_hash = read_catalog(url)
+    games = compact_game_data(df)
+    # "Before" is the raw CSV as parsed, alias columns and all
+    before = df.attrs.get(RAW_BYTES_ATTR) or float(bytes_per_game(df))
+    after = float(bytes_per_game(games))
+    logger.info("Game catalog: %d games, %.0f bytes/game (%.0f before compaction)",
+                len(games), after, before)
+    games.attrs[CATALOG_HASH_ATTR] = content_hash
+    games.attrs[BYTES_PER_GAME_ATTR] = {'before': before, 'after': after}
+    return games
+
+# Process-wide holder of the shared catalog: callers get the current copy
+# while a stale one is refreshed by a single background load
+catalog_refresher = CatalogRefresher(read_game_data, ttl=CATALOG_TTL)
 
-@st.cache_data(ttl=3600)
 def load_game_data():
+    # Refresh failures keep the last good copy in service; only a cold start
+    # with nothing to serve reports an error
     try:
-        url = "https://raw.githubusercontent.com/nwt002tech/profit-hopper/main/extended_game_list.csv"
-        df = pd.read_csv(url)
-        
-        df.columns = [normalize_column_name(col) for col in df.columns]
-        
-        col_map = {
-            'rtp': ['rtp', 'expected_rtp'],
-            'min_bet': ['min_bet', 'minbet', 'minimum_bet', 'min_bet_amount'],
-            'advantage_play_potential': ['advantage_play_potential', 'app', 'advantage_potential'],
-            'volatility': ['volatility', 'vol'],
-            'bonus_frequency': ['bonus_frequency', 'bonus_freq', 'bonus_rate'],
-            'game_name': ['game_name', 'name', 'title', 'game'],
-            'type': ['type', 'game_type', 'category'],
-            'tips': ['tips', 'tip', 'strategy']
-        }
-        
-        for standard, variants in col_map.items():
-            for variant in variants:
-                if variant in df.columns:
-                    df[standard] = df[variant]
-                    break
-        
-        required_cols = ['rtp', 'min_bet']
-        missing = [col for col in required_cols if col not in df.columns]
-        if missing:
-            st.error(f"Missing required columns: {', '.join(missing)}")
-            return pd.DataFrame()
-        
-        numeric_cols = ['rtp', 'min_bet', 'advantage_play_potential', 'volatility', 'bonus_frequency']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        if 'advantage_play_potential' not in df.columns:
-            df['advantage_play_potential'] = 3
-        if 'volatility' not in df.columns:
-            df['volatility'] = 3
-        if 'bonus_frequency' not in df.columns:
-            df['bonus_frequency'] = 0.2
-            
-        if 'game_name' not in df.columns:
-            df['game_name'] = "Unknown Game"
-        if 'type' not in df.columns:
-            df['type'] = "Unknown"
-        if 'tips' not in df.columns:
-            df['tips'] = "No tips available"
-        
-        return df.dropna(subset=['rtp', 'min_bet'])
+        return catalog_refresher.get()
+    except MissingColumnsError as e:
+        st.error(str(e))
+        return pd.DataFrame()
     except Exception as e:
         st.error(f"Error loading game data: {str(e)}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+@st.cache_resource(max_entries=2)
+def load_game_tips(content_hash):
+    # Tips by catalog row, read from the local snapshot(s) of that catalog
+    # version: games sharing a name keep their own tips. Raises (so nothing
+    # is cached) if the snapshot has already moved on to another version
+    df, loaded_hash = read_catalog(columns=['tips'])
+    if loaded_hash != content_hash:
+        raise ValueError("Catalog changed since it was loaded")
+    return df['tips'].tolist()
+
+def get_game_tip(game_df, row):
+    try:
+        tip = load_game_tips(catalog_hash(game_df))[row]
+    except Exception:
+        tip = None
+    return tip if isinstance(tip, str) and tip else "No tips available"
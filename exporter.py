@@ -0,0 +1,182 @@
+"""
+Streaming export of recorded session history.
+
+:func:`write_export` writes an iterable of row chunks to a binary stream as
+CSV, gzip-compressed CSV, JSON Lines or Parquet, one chunk at a time, so the
+memory needed is bounded by the chunk size rather than the history size.
+:func:`export_sessions` feeds it from the session database (all trips, one
+trip and/or a date range), or from the in-memory session log when the
+database can't be opened, and returns the file as a ``BytesIO``.
+
+The result is meant for ``st.download_button(data=callable)``: the export is
+only produced when the user clicks, and the file is served from its own URL
+instead of being inlined into the page as a base64 ``data:`` URI. Streamlit
+holds the served file in memory either way, so the output isn't spooled to
+disk; only the rows being written are bounded by the chunk size.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import logging
+import sqlite3
+from typing import IO, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from session_store import SESSION_FIELDS, get_session_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+# format -> (label, MIME type, file extension)
+EXPORT_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    "csv": ("CSV", "text/csv", ".csv"),
+    "csv.gz": ("CSV (gzip)", "application/gzip", ".csv.gz"),
+    "jsonl": ("JSON Lines", "application/x-ndjson", ".jsonl"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet", ".parquet"),
+}
+
+
+# Parquet column types of the session fields; other columns are written as
+# strings. The schema is fixed up front rather than inferred from the first
+# chunk, whose all-null notes or whole-number amounts would not fit later ones
+PARQUET_TYPES: Dict[str, str] = {
+    "trip_id": "int64",
+    "money_in": "float64",
+    "money_out": "float64",
+    "profit": "float64",
+}
+
+
+def parquet_schema(columns: Sequence[str] = SESSION_FIELDS) -> "pa.Schema":
+    """Arrow schema of a Parquet export of ``columns``."""
+    return pa.schema([(col, pa.type_for_alias(PARQUET_TYPES.get(col, "string"))) for col in columns])
+
+
+def available_formats() -> List[str]:
+    """Export formats usable in this environment (Parquet needs pyarrow)."""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pq is not None]
+
+
+def _write_text_chunks(chunks: Iterable[pd.DataFrame], fmt: str, out: IO[bytes]) -> int:
+    rows = 0
+    for chunk in chunks:
+        if fmt == "jsonl":
+            text = chunk.to_json(orient="records", lines=True)
+            if text and not text.endswith("\n"):
+                text += "\n"
+        else:
+            text = chunk.to_csv(index=False, header=rows == 0)
+        out.write(text.encode("utf-8"))
+        rows += len(chunk)
+    return rows
+
+
+def write_export(chunks: Iterable[pd.DataFrame], fmt: str, out: IO[bytes],
+                 columns: Sequence[str] = SESSION_FIELDS) -> int:
+    """Write ``chunks`` to ``out`` in ``fmt`` and return the number of rows.
+
+    An empty export still gets a CSV header / Parquet schema.
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format {fmt!r}")
+
+    def non_empty():
+        yielded = False
+        for chunk in chunks:
+            if len(chunk):
+                yielded = True
+                yield chunk
+        if not yielded:
+            yield pd.DataFrame(columns=list(columns))
+
+    if fmt == "parquet":
+        schema = parquet_schema(columns)
+        rows = 0
+        with pq.ParquetWriter(out, schema) as writer:
+            for chunk in non_empty():
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                rows += len(chunk)
+        return rows
+
+    if fmt == "csv.gz":
+        with gzip.GzipFile(fileobj=out, mode="wb") as gz:
+            return _write_text_chunks(non_empty(), "csv", gz)
+    return _write_text_chunks(non_empty(), fmt, out)
+
+
+def _log_chunks(session_log: Any, trip_id: Optional[int], start_date: Optional[str],
+                end_date: Optional[str], chunk_size: int) -> Iterable[pd.DataFrame]:
+    sessions = session_log.to_frame()
+    keep = pd.Series(True, index=sessions.index)
+    if trip_id is not None:
+        keep &= sessions["trip_id"] == trip_id
+    if start_date is not None:
+        keep &= sessions["date"] >= start_date
+    if end_date is not None:
+        keep &= sessions["date"] <= end_date
+    sessions = sessions[keep].reset_index(drop=True)
+    for start in range(0, len(sessions), chunk_size):
+        yield sessions.iloc[start:start + chunk_size]
+
+
+def session_chunks(
+    user_key: str,
+    trip_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    session_log: Any = None,
+) -> Iterable[pd.DataFrame]:
+    """Yield a user's stored sessions as DataFrames of ``chunk_size`` rows.
+
+    When the session database can't be opened, the sessions of
+    ``session_log`` (a ``session_log.SessionLog``) are exported instead,
+    filtered the same way; without one the export is empty.
+    """
+    try:
+        store = get_session_store()
+    except (sqlite3.Error, OSError):
+        logger.exception("Session database unavailable, exporting the in-memory session log")
+        if session_log is not None:
+            yield from _log_chunks(session_log, trip_id, start_date, end_date, chunk_size)
+        return
+    store.flush()  # include sessions still queued for writing
+    for rows in store.iter_sessions(user_key, trip_id, start_date, end_date, chunk_size):
+        yield pd.DataFrame.from_records(rows, columns=list(SESSION_FIELDS))
+
+
+def export_sessions(
+    user_key: str,
+    fmt: str,
+    trip_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    session_log: Any = None,
+) -> io.BytesIO:
+    """Export a user's sessions and return the file, rewound to the start.
+
+    ``session_log`` is the fallback used when the database is unavailable
+    (see :func:`session_chunks`).
+    """
+    out = io.BytesIO()
+    write_export(session_chunks(user_key, trip_id, start_date, end_date, session_log=session_log), fmt, out)
+    out.seek(0)
+    return out
+
+
+def export_file_name(fmt: str, trip_id: Optional[int] = None,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
+    scope = f"trip_{trip_id}" if trip_id is not None else "all_trips"
+    if start_date or end_date:
+        scope += f"_{start_date or 'start'}_to_{end_date or 'today'}"
+    return f"{scope}_sessions{EXPORT_FORMATS[fmt][2]}"
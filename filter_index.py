@@ -0,0 +1,248 @@
+"""
+Prebuilt indexes for the Game Plan filters.
+
+Instead of chaining boolean masks over the whole catalog on every rerun,
+:func:`build_filter_index` prepares, once per loaded catalog:
+
+* ``min_bet`` and ``rtp`` values in sorted order (with the matching row
+  positions), so the two range sliders become binary searches;
+* packed bitsets (``numpy.packbits``) for each game type, advantage play
+  bucket and volatility bucket, so the select boxes become bitwise ANDs over
+  ``n_games / 8`` bytes;
+* a bitset per casino for catalogs merged with availability lists (see
+  :mod:`catalog_sources`);
+* a game name lookup used to drop blacklisted games by position.
+
+:meth:`FilterIndex.query` combines those into the positional rows of the
+matching games, in catalog order, without allocating a per-game mask for
+the sliders: a selective range is walked row by row (its few positions
+checked against the other filters through each column's rank array and bit
+lookups), and a wide one is turned into a bitset that is cached per slider
+boundary, so repeated reruns only AND cached bitsets.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from catalog_sources import CASINO_SEPARATOR, CASINOS_COLUMN
+from data_loader import catalog_hash
+
+ALL = "All"
+
+# Select box labels mapped to inclusive 1-5 rating ranges, in display order.
+ADVANTAGE_BUCKETS: Dict[str, Tuple[int, int]] = {
+    "High (4-5)": (4, 5),
+    "Medium (3)": (3, 3),
+    "Low (1-2)": (1, 2),
+}
+VOLATILITY_BUCKETS: Dict[str, Tuple[int, int]] = {
+    "Low (1-2)": (1, 2),
+    "Medium (3)": (3, 3),
+    "High (4-5)": (4, 5),
+}
+
+
+# Ranges matching at most this fraction of the catalog are filtered row by
+# row instead of through a catalog-wide bitset
+SPARSE_FRACTION = 1 / 8
+# Slider boundaries whose range bitset is kept per index
+RANGE_CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class SortedColumn:
+    """Column values in ascending order alongside their row positions.
+
+    ``ranks`` is the inverse of ``order``: the sorted position of each row.
+    """
+
+    values: np.ndarray
+    order: np.ndarray
+    ranks: np.ndarray
+
+    @classmethod
+    def build(cls, values: np.ndarray) -> "SortedColumn":
+        order = np.argsort(values, kind="stable")
+        ranks = np.empty_like(order)
+        ranks[order] = np.arange(len(order))
+        return cls(values=values[order], order=order, ranks=ranks)
+
+    def count_at_most(self, limit: float) -> int:
+        """Number of values ``<= limit``: they are ``order[:count]``."""
+        return int(np.searchsorted(self.values, np.asarray(limit, dtype=self.values.dtype), side="right"))
+
+    def start_at_least(self, limit: float) -> int:
+        """Sorted position of the first value ``>= limit``: they are ``order[start:]``."""
+        return int(np.searchsorted(self.values, np.asarray(limit, dtype=self.values.dtype), side="left"))
+
+    def at_most(self, limit: float) -> np.ndarray:
+        """Row positions whose value is ``<= limit``."""
+        return self.order[:self.count_at_most(limit)]
+
+    def at_least(self, limit: float) -> np.ndarray:
+        """Row positions whose value is ``>= limit``."""
+        return self.order[self.start_at_least(limit):]
+
+
+def _bits_at(bits: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Values of the packed bitset ``bits`` at positions ``rows``."""
+    return ((bits[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+
+@dataclass(frozen=True)
+class FilterIndex:
+    """Filter structures for one catalog. Build with :func:`build_filter_index`."""
+
+    n_games: int
+    min_bet: SortedColumn
+    rtp: SortedColumn
+    type_bits: Dict[str, np.ndarray]
+    advantage_bits: Dict[str, np.ndarray]
+    volatility_bits: Dict[str, np.ndarray]
+    name_positions: Dict[str, np.ndarray]
+    casino_bits: Dict[str, np.ndarray] = field(default_factory=dict)
+    _range_bits: "OrderedDict[Tuple[str, int, int], np.ndarray]" = field(default_factory=OrderedDict, repr=False,
+                                                                        compare=False)
+
+    def _range_bitset(self, name: str, column: SortedColumn, start: int, stop: int) -> np.ndarray:
+        # Bitset of the rows at sorted positions [start, stop), built once
+        # per slider boundary
+        key = (name, start, stop)
+        bits = self._range_bits.get(key)
+        if bits is None:
+            mask = np.zeros(self.n_games, dtype=bool)
+            mask[column.order[start:stop]] = True
+            bits = np.packbits(mask)
+            if len(self._range_bits) >= RANGE_CACHE_SIZE:
+                self._range_bits.popitem(last=False)
+            self._range_bits[key] = bits
+        return bits
+
+    def query(
+        self,
+        max_min_bet: float,
+        min_rtp: float,
+        game_type: str = ALL,
+        advantage: str = ALL,
+        volatility: str = ALL,
+        exclude_names: Optional[Iterable[str]] = None,
+        casino: Optional[str] = None,
+    ) -> np.ndarray:
+        """Return the positions of the games that pass every filter.
+
+        ``game_type``, ``advantage`` and ``volatility`` take the select box
+        labels (``"All"`` disables the filter). Unknown labels match nothing.
+        ``casino`` keeps the games on that casino's availability list; a
+        casino without a list isn't filtered.
+        """
+        bitsets = []
+        for choice, choices in (
+            (game_type, self.type_bits),
+            (advantage, self.advantage_bits),
+            (volatility, self.volatility_bits),
+        ):
+            if choice == ALL:
+                continue
+            selected = choices.get(choice)
+            if selected is None:
+                return np.empty(0, dtype=np.intp)
+            bitsets.append(selected)
+        if casino in self.casino_bits:
+            bitsets.append(self.casino_bits[casino])
+
+        # min_bet rows are order[:bet_stop], rtp rows are order[rtp_start:]
+        bet_stop = self.min_bet.count_at_most(max_min_bet)
+        rtp_start = self.rtp.start_at_least(min_rtp)
+        if min(bet_stop, self.n_games - rtp_start) <= self.n_games * SPARSE_FRACTION:
+            # Few matches: check only the rows of the narrower range
+            if bet_stop <= self.n_games - rtp_start:
+                rows = np.sort(self.min_bet.order[:bet_stop])
+                rows = rows[self.rtp.ranks[rows] >= rtp_start]
+            else:
+                rows = np.sort(self.rtp.order[rtp_start:])
+                rows = rows[self.min_bet.ranks[rows] < bet_stop]
+            for selected in bitsets:
+                rows = rows[_bits_at(selected, rows)]
+        else:
+            bits = self._range_bitset("min_bet", self.min_bet, 0, bet_stop) \
+                & self._range_bitset("rtp", self.rtp, rtp_start, self.n_games)
+            for selected in bitsets:
+                np.bitwise_and(bits, selected, out=bits)
+            rows = np.flatnonzero(np.unpackbits(bits, count=self.n_games).view(bool))
+
+        excluded = [self.name_positions[name] for name in exclude_names or () if name in self.name_positions]
+        if excluded:
+            rows = rows[~np.isin(rows, np.concatenate(excluded))]
+        return rows
+
+
+def _bucket_bits(values: np.ndarray, buckets: Dict[str, Tuple[int, int]]) -> Dict[str, np.ndarray]:
+    # Fractional ratings fall in the bucket of their rounded value, as in the
+    # advantage and volatility labels
+    values = np.clip(np.rint(values), 1, 5)
+    return {
+        label: np.packbits((values >= low) & (values <= high))
+        for label, (low, high) in buckets.items()
+    }
+
+
+def _casino_bits(casinos: pd.Series) -> Dict[str, np.ndarray]:
+    # One (position, casino) pair per listed casino; an empty list means the
+    # game isn't restricted and matches no casino bitset
+    pairs = casinos.astype(str).str.split(CASINO_SEPARATOR).explode()
+    pairs = pairs[pairs != ""]
+    positions = pairs.index.to_numpy()
+    codes, labels = pd.factorize(pairs.to_numpy())
+    bits = {}
+    for code, casino in enumerate(labels):
+        mask = np.zeros(len(casinos), dtype=bool)
+        mask[positions[codes == code]] = True
+        bits[str(casino)] = np.packbits(mask)
+    return bits
+
+
+def build_filter_index(game_df: pd.DataFrame) -> FilterIndex:
+    """Build a :class:`FilterIndex` over the positional rows of ``game_df``."""
+    types = game_df["type"].astype(str).to_numpy()
+    type_codes, type_labels = pd.factorize(types)
+    type_bits = {
+        str(label): np.packbits(type_codes == code)
+        for code, label in enumerate(type_labels)
+    }
+
+    names = game_df["game_name"].to_numpy()
+    name_codes, name_labels = pd.factorize(names)
+    order = np.argsort(name_codes, kind="stable")
+    boundaries = np.searchsorted(name_codes[order], np.arange(len(name_labels) + 1))
+    name_positions = {
+        name: order[boundaries[code]:boundaries[code + 1]]
+        for code, name in enumerate(name_labels)
+    }
+
+    return FilterIndex(
+        n_games=len(game_df),
+        min_bet=SortedColumn.build(game_df["min_bet"].to_numpy()),
+        rtp=SortedColumn.build(game_df["rtp"].to_numpy()),
+        type_bits=type_bits,
+        advantage_bits=_bucket_bits(game_df["advantage_play_potential"].to_numpy(), ADVANTAGE_BUCKETS),
+        volatility_bits=_bucket_bits(game_df["volatility"].to_numpy(), VOLATILITY_BUCKETS),
+        name_positions=name_positions,
+        casino_bits=_casino_bits(game_df[CASINOS_COLUMN]) if CASINOS_COLUMN in game_df.columns else {},
+    )
+
+
+@st.cache_resource(max_entries=4)
+def _cached_filter_index(catalog_key: str, _game_df: pd.DataFrame) -> FilterIndex:
+    return build_filter_index(_game_df)
+
+
+def get_filter_index(game_df: pd.DataFrame) -> FilterIndex:
+    """Return the filter index for ``game_df``, built once per catalog."""
+    return _cached_filter_index(catalog_hash(game_df), game_df)
@@ -0,0 +1,313 @@
+"""
+Headless batch trip planner.
+
+Computes the recommended play order of many player profiles at once,
+outside Streamlit, and writes one JSON object per profile::
+
+    python planner.py profiles.csv -o plans.jsonl
+    python planner.py profiles.jsonl -o plans.jsonl --batch-size 512 --backend thread
+
+A profile file (CSV or JSON Lines) has one row per player. Only
+``bankroll`` is required; the other columns default as in the sidebar and
+the Game Plan filters:
+
+* ``id`` (row number), ``casino`` (empty; limits the games to the casino's
+  availability list when the catalog has one, see :mod:`catalog_sources`);
+* ``num_sessions`` (10), ``completed_sessions`` (0);
+* ``min_rtp`` (92.0), ``max_min_bet`` (the strategy's max bet);
+* ``game_type``, ``advantage``, ``volatility`` (``"All"``), taking the
+  select box labels;
+* ``exclude``: blacklisted game names separated by ``|``.
+
+The catalog is loaded and featurized once. Profiles are then planned in
+batches: session bankrolls and strategy tiers are computed for the whole
+batch (:mod:`strategy`), every game is scored for every profile with one
+broadcast (:func:`scoring.score_matrix`), each profile's filters knock its
+filtered-out games out of its row of scores, and the top ``num_sessions``
+games per profile are selected with :func:`scoring.rank_order`. Batches are
+shrunk for large catalogs so a batch's scores stay within
+:data:`MAX_BATCH_CELLS` cells. The play order matches what the
+Game Plan tab shows for the same bankroll and filters; ``completed_sessions``
+only changes the session bankroll, as in the sidebar.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from streamlit import logger as streamlit_logger
+
+from data_loader import read_game_data
+from filter_index import ALL, FilterIndex, build_filter_index
+from parallel import BACKENDS, run_tasks
+from scoring import GameFeatures, build_game_features, rank_order, score_matrix
+from session_import import read_jsonl
+from strategy import bankroll_strategies, session_bankroll_for
+from utils import normalize_column_name
+
+DEFAULT_BATCH_SIZE = 256
+# Upper bound on batch size x catalog size: the scores grid of a batch is
+# this many float64 cells at most (256 MiB), however large the catalog
+MAX_BATCH_CELLS = 1 << 25
+EXCLUDE_SEPARATOR = "|"
+
+# Defaults of the optional profile columns; NaN max_min_bet means "use the
+# strategy's max bet", like the Game Plan slider
+PROFILE_DEFAULTS: Dict[str, Any] = {
+    "casino": "",
+    "num_sessions": 10,
+    "completed_sessions": 0,
+    "min_rtp": 92.0,
+    "max_min_bet": np.nan,
+    "game_type": ALL,
+    "advantage": ALL,
+    "volatility": ALL,
+    "exclude": "",
+}
+NUMERIC_COLUMNS = ("bankroll", "num_sessions", "completed_sessions", "min_rtp", "max_min_bet")
+
+# Accepted spellings of each column, after normalize_column_name()
+COLUMN_ALIASES = {
+    "id": ["id", "profile_id", "player_id", "player"],
+    "bankroll": ["bankroll", "trip_bankroll", "current_bankroll"],
+    "num_sessions": ["num_sessions", "sessions"],
+    "completed_sessions": ["completed_sessions", "sessions_played"],
+    "min_rtp": ["min_rtp", "rtp"],
+    "max_min_bet": ["max_min_bet", "max_bet"],
+    "game_type": ["game_type", "type"],
+    "exclude": ["exclude", "blacklist", "blacklisted_games"],
+}
+
+
+def read_profiles(path: str) -> pd.DataFrame:
+    """Read a ``.csv`` or ``.jsonl`` profile file and fill in the defaults.
+
+    Raises
+    ------
+    ValueError
+        If there is no ``bankroll`` column or a bankroll is not a
+        non-negative number.
+    """
+    if path.lower().endswith((".jsonl", ".json", ".ndjson")):
+        with open(path, encoding="utf-8-sig") as f:
+            df = read_jsonl(f.read()).drop(columns="line")
+        if "_invalid" in df.columns:
+            raise ValueError(f"{path}: every line must be a JSON object")
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+
+    df.columns = [normalize_column_name(str(col)) for col in df.columns]
+    for standard, variants in COLUMN_ALIASES.items():
+        for variant in variants:
+            if variant in df.columns:
+                df[standard] = df[variant]
+                break
+    if "bankroll" not in df.columns:
+        raise ValueError(f"{path}: missing required column 'bankroll'")
+
+    # Missing or blank ids default to the row number
+    row_numbers = pd.Series(np.arange(1, len(df) + 1), index=df.index)
+    if "id" not in df.columns:
+        df["id"] = row_numbers
+    else:
+        blank = df["id"].isna() | (df["id"].astype(str).str.strip() == "")
+        df["id"] = df["id"].astype(object).where(~blank, row_numbers)
+    for col, default in PROFILE_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+        else:
+            blank = df[col].isna() | (df[col].astype(str).str.strip() == "")
+            df[col] = df[col].where(~blank, default)
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    invalid = df["bankroll"].isna() | (df["bankroll"] < 0)
+    if invalid.any():
+        rows = ", ".join(str(i + 1) for i in np.flatnonzero(invalid.to_numpy())[:10])
+        raise ValueError(f"{path}: invalid bankroll in profile(s) {rows}")
+    df["num_sessions"] = df["num_sessions"].fillna(PROFILE_DEFAULTS["num_sessions"]).clip(lower=1).astype(int)
+    df["completed_sessions"] = df["completed_sessions"].fillna(0).clip(lower=0).astype(int)
+    df["min_rtp"] = df["min_rtp"].fillna(PROFILE_DEFAULTS["min_rtp"])
+    for col in ("casino", "game_type", "advantage", "volatility", "exclude"):
+        df[col] = df[col].astype(str).str.strip()
+    return df[["id", "bankroll"] + list(PROFILE_DEFAULTS)].reset_index(drop=True)
+
+
+class Catalog:
+    """The games and their derived structures, shared by every batch."""
+
+    def __init__(self, game_df: pd.DataFrame) -> None:
+        self.game_df = game_df
+        self.features: GameFeatures = build_game_features(game_df)
+        self.index: FilterIndex = build_filter_index(game_df)
+        self.min_bet = game_df["min_bet"].to_numpy()
+        self.rtp = game_df["rtp"].to_numpy()
+        self.names = game_df["game_name"].astype(str).to_numpy()
+        self.types = game_df["type"].astype(str).to_numpy()
+        self._category_masks: Dict[Tuple[str, str, str, str], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.game_df)
+
+    def category_mask(self, game_type: str, advantage: str, volatility: str, casino: str = "") -> np.ndarray:
+        """Boolean mask of the select box and casino filters, memoized per combination."""
+        key = (game_type, advantage, volatility, casino)
+        mask = self._category_masks.get(key)
+        if mask is None:
+            # The range filters are applied per profile; pass the widest ones
+            rows = self.index.query(np.inf, -np.inf, game_type, advantage, volatility, casino=casino)
+            mask = np.zeros(len(self), dtype=bool)
+            mask[rows] = True
+            self._category_masks[key] = mask
+        return mask
+
+
+def _drop_ineligible(catalog: Catalog, profiles: pd.DataFrame, max_bets: np.ndarray,
+                     scores: np.ndarray) -> np.ndarray:
+    # Set the scores of each profile's filtered-out games to -inf, one
+    # profile row at a time so no (n_profiles, n_games) mask is built. The
+    # range limits are cast to the column dtypes like FilterIndex.query
+    # does, so the borders agree. Returns the eligible game count per profile
+    max_min_bet = profiles["max_min_bet"].to_numpy(dtype=np.float64)
+    max_min_bet = np.where(np.isnan(max_min_bet), max_bets, max_min_bet).astype(catalog.min_bet.dtype)
+    min_rtp = profiles["min_rtp"].to_numpy().astype(catalog.rtp.dtype)
+
+    counts = np.zeros(len(profiles), dtype=np.int64)
+    categories = profiles[["game_type", "advantage", "volatility", "casino"]].itertuples(index=False, name=None)
+    for i, (key, exclude) in enumerate(zip(categories, profiles["exclude"])):
+        mask = catalog.min_bet <= max_min_bet[i]
+        mask &= catalog.rtp >= min_rtp[i]
+        mask &= catalog.category_mask(*key)
+        for name in filter(None, (name.strip() for name in exclude.split(EXCLUDE_SEPARATOR))):
+            positions = catalog.index.name_positions.get(name)
+            if positions is not None:
+                mask[positions] = False
+        scores[i, ~mask] = -np.inf
+        counts[i] = np.count_nonzero(mask)
+    return counts
+
+
+def plan_batch(catalog: Catalog, profiles: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Plans for a batch of profiles (rows of :func:`read_profiles`)."""
+    session_bankrolls = session_bankroll_for(
+        profiles["bankroll"].to_numpy(dtype=np.float64),
+        profiles["num_sessions"].to_numpy(),
+        profiles["completed_sessions"].to_numpy(),
+    )
+    strategies = bankroll_strategies(np.atleast_1d(session_bankrolls))
+    scores = score_matrix(catalog.features, strategies.session_bankroll, strategies.max_bet,
+                          strategies.strategy_types)
+    eligible = _drop_ineligible(catalog, profiles, strategies.max_bet, scores)
+
+    num_sessions = profiles["num_sessions"].to_numpy()
+    order = rank_order(scores, int(num_sessions.max()) if len(num_sessions) else 0)
+
+    plans = []
+    for i, profile in enumerate(profiles.itertuples(index=False)):
+        top = order[i, :num_sessions[i]]
+        top = top[np.isfinite(scores[i, top])]
+        strategy = strategies[i]
+        plans.append({
+            "id": profile.id if isinstance(profile.id, str) else int(profile.id),
+            "casino": profile.casino,
+            "bankroll": round(float(profile.bankroll), 2),
+            "session_bankroll": round(strategy.session_bankroll, 2),
+            "strategy": {
+                "type": strategy.strategy_type,
+                "max_bet": round(strategy.max_bet, 2),
+                "stop_loss": round(strategy.stop_loss, 2),
+                "bet_unit": round(strategy.bet_unit, 2),
+                "estimated_spins": strategy.estimated_spins,
+            },
+            "eligible_games": int(eligible[i]),
+            "play_order": [
+                {
+                    "session": n + 1,
+                    "game_name": catalog.names[row],
+                    "type": catalog.types[row],
+                    "score": round(float(scores[i, row]), 2),
+                    "min_bet": round(float(catalog.min_bet[row]), 2),
+                    "rtp": round(float(catalog.rtp[row]), 2),
+                }
+                for n, row in enumerate(top)
+            ],
+        })
+    return plans
+
+
+def _batches(profiles: pd.DataFrame, batch_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(profiles), batch_size):
+        yield profiles.iloc[start:start + batch_size]
+
+
+def _plan_task(task: Tuple[Catalog, pd.DataFrame], _seed: np.random.SeedSequence) -> List[Dict[str, Any]]:
+    return plan_batch(*task)
+
+
+def plan_profiles(
+    catalog: Catalog,
+    profiles: pd.DataFrame,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    backend: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield the plan of every profile, in input order.
+
+    Batches run on a :mod:`parallel` backend; ``"thread"`` is usually the
+    best choice since the scoring and ranking run in NumPy. The scores
+    grid of one batch takes ``batch_size * len(catalog) * 8`` bytes, so
+    ``batch_size`` is lowered for large catalogs to stay within
+    :data:`MAX_BATCH_CELLS`.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_CELLS // max(len(catalog), 1)))
+    tasks = [(catalog, batch) for batch in _batches(profiles, batch_size)]
+    for plans in run_tasks(_plan_task, tasks, backend=backend, max_workers=max_workers):
+        yield from plans
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1].strip())
+    parser.add_argument("profiles", help="profile file (.csv or .jsonl)")
+    parser.add_argument("-o", "--output", help="write the plans here (default: stdout)")
+    parser.add_argument("--catalog", help="game catalog CSV URL (default: the configured catalog sources)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"profiles scored per batch (default {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--backend", choices=BACKENDS, help="parallel backend for the batches")
+    parser.add_argument("--workers", type=int, help="worker count for the thread/process backends")
+    args = parser.parse_args(argv)
+
+    # Bare mode: keep Streamlit's "no runtime" warnings off stderr
+    streamlit_logger.set_log_level("error")
+
+    try:
+        profiles = read_profiles(args.profiles)
+    except (OSError, ValueError) as e:
+        print(f"planner: {e}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    catalog = Catalog(read_game_data(args.catalog))
+    loaded = time.perf_counter()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for plan in plan_profiles(catalog, profiles, max(1, args.batch_size), args.backend, args.workers):
+            out.write(json.dumps(plan) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Planned {len(profiles)} profiles over {len(catalog)} games in "
+          f"{time.perf_counter() - loaded:.2f}s (catalog {loaded - start:.2f}s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Opt-in per-rerun stage profiler.
+
+Wrap the expensive parts of a script run in :func:`stage` (a context manager
+that also works as a decorator) and bracket the run with
+:func:`start_rerun` / :func:`finish_rerun`. Each rerun then records the wall
+time of every stage and, in ``memory`` mode, the net memory allocated inside
+it (via :mod:`tracemalloc`) plus the peak for the whole run.
+
+Profiling is off unless ``PROFIT_HOPPER_PROFILE`` is set, for every session,
+or a session opens the app with the ``?profile=`` query parameter together
+with ``?profile_key=`` matching ``PROFIT_HOPPER_PROFILE_KEY`` (without that
+variable the query parameter is ignored, so visitors can't switch profiling
+on). Both take:
+
+* ``1`` / ``time``: stage timings only;
+* ``memory``: timings plus allocations;
+* ``cprofile``: timings plus a :mod:`cProfile` capture of every rerun,
+  keeping the report of the slowest one seen so far.
+
+Completed reruns are kept in a process-wide ring of the last
+:data:`MAX_RERUNS` and written to a rolling JSON log
+(``PROFIT_HOPPER_PROFILE_LOG``, ``.profile_log.json`` by default) so
+regressions can be spotted in production without a debugger.
+:func:`render_diagnostics` shows both in a collapsible panel, along with any
+process-wide counters passed to it.
+
+A fragment rerun doesn't execute the top of the script, so a :func:`stage`
+entered with no rerun in progress starts (and finishes) one of its own,
+labelled with the stage name.
+
+:mod:`tracemalloc` slows every allocation in the process, so it only traces
+while at least one ``memory`` rerun is in progress and is stopped after the
+last one finishes (or is abandoned by a cut-short run).
+
+When profiling is off, a stage only checks whether it has been switched on.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+MODES = ("time", "memory", "cprofile")
+ENV_VAR = "PROFIT_HOPPER_PROFILE"
+QUERY_PARAM = "profile"
+KEY_ENV_VAR = "PROFIT_HOPPER_PROFILE_KEY"
+KEY_QUERY_PARAM = "profile_key"
+LOG_PATH = os.environ.get(
+    "PROFIT_HOPPER_PROFILE_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profile_log.json"),
+)
+MAX_RERUNS = int(os.environ.get("PROFIT_HOPPER_PROFILE_RERUNS", "50"))
+PROFILE_TOP_N = 30
+
+
+@dataclass
+class StageRecord:
+    """One timed stage of a rerun."""
+
+    name: str
+    depth: int
+    ms: float = 0.0
+    alloc_kb: Optional[float] = None
+
+
+@dataclass
+class RerunProfile:
+    """Stage timings of one script (or fragment) run."""
+
+    label: str
+    mode: str
+    started_at: float = field(default_factory=time.time)
+    total_ms: float = 0.0
+    peak_kb: Optional[float] = None
+    fragment: bool = False
+    stages: List[StageRecord] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_local = threading.local()
+_history: Deque[Dict[str, Any]] = deque(maxlen=MAX_RERUNS)
+_history_lock = threading.Lock()
+_slowest: Dict[str, Any] = {"total_ms": 0.0, "label": None, "report": None}
+# memory-mode reruns in progress; tracemalloc runs while there are any
+_tracing = {"reruns": 0}
+_tracing_lock = threading.Lock()
+
+
+def _normalize_mode(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    if value in ("0", "false", "off", "no"):
+        return None
+    return value if value in MODES else "time"
+
+
+def _query_mode() -> Optional[str]:
+    # The ?profile= mode, only when ?profile_key= matches the configured key
+    key = os.environ.get(KEY_ENV_VAR)
+    if not key:
+        return None
+    try:
+        params = st.query_params
+        mode, given = params.get(QUERY_PARAM), params.get(KEY_QUERY_PARAM)
+    except Exception:  # no script run context
+        return None
+    if not given or not hmac.compare_digest(str(given).encode(), key.encode()):
+        return None
+    return _normalize_mode(mode)
+
+
+def profiling_mode() -> Optional[str]:
+    """The active mode from the (keyed) query string or environment, or ``None``."""
+    return _query_mode() or _normalize_mode(os.environ.get(ENV_VAR))
+
+
+def _hold_tracing() -> None:
+    with _tracing_lock:
+        _tracing["reruns"] += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+    _local.tracing = True
+
+
+def _release_tracing() -> None:
+    # Drop this thread's hold on tracemalloc, stopping it after the last one
+    if not getattr(_local, "tracing", False):
+        return
+    _local.tracing = False
+    with _tracing_lock:
+        _tracing["reruns"] -= 1
+        if _tracing["reruns"] <= 0:
+            _tracing["reruns"] = 0
+            tracemalloc.stop()
+
+
+def _abandon_rerun() -> None:
+    # A rerun that never reached finish_rerun (e.g. cut short by st.rerun)
+    _local.profile = None
+    _release_tracing()
+    profiler = getattr(_local, "profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _local.profiler = None
+
+
+def _in_fragment_rerun() -> bool:
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def current_rerun() -> Optional[RerunProfile]:
+    """The profile being recorded in this thread, if any."""
+    return getattr(_local, "profile", None)
+
+
+def start_rerun(label: str = "app", mode: Optional[str] = None) -> Optional[RerunProfile]:
+    """Begin recording a rerun if profiling is enabled; return its profile."""
+    _abandon_rerun()
+    mode = mode or profiling_mode()
+    if mode is None:
+        return None
+    profile = RerunProfile(label=label, mode=mode, fragment=_in_fragment_rerun())
+    _local.profile = profile
+    _local.stack = []
+    _local.t0 = time.perf_counter()
+    _local.profiler = None
+    if mode == "memory":
+        _hold_tracing()
+    elif mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            _local.profiler = profiler
+        except ValueError:  # another profiler is active in this process
+            logger.warning("cProfile unavailable for rerun %r", label)
+    return profile
+
+
+def finish_rerun() -> Optional[RerunProfile]:
+    """Stop recording, append the rerun to the rolling log and return it."""
+    profile = current_rerun()
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.total_ms = (time.perf_counter() - _local.t0) * 1000
+    if profile.mode == "memory" and tracemalloc.is_tracing():
+        profile.peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+    _release_tracing()
+
+    profiler = getattr(_local, "profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        _local.profiler = None
+        with _history_lock:
+            if profile.total_ms > _slowest["total_ms"]:
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+                _slowest.update(total_ms=profile.total_ms, label=profile.label, report=out.getvalue())
+
+    record = profile.to_dict()
+    with _history_lock:
+        _history.append(record)
+        snapshot = list(_history)
+    _write_log(snapshot)
+    return profile
+
+
+def _write_log(records: List[Dict[str, Any]], path: Optional[str] = None) -> None:
+    path = path or LOG_PATH
+    directory = os.path.dirname(path) or "."
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning("Could not write profile log %s (%s)", path, exc)
+
+
+class stage(contextlib.ContextDecorator):
+    """Time a block or function as a named stage of the current rerun.
+
+    Examples
+    --------
+    >>> with stage("filter"):
+    ...     rows = index.query(...)
+
+    >>> @stage("session_tracker")
+    ... def render_session_tab(): ...
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def _recreate_cm(self) -> "stage":
+        # A fresh instance per call of a decorated function, since several
+        # sessions' script threads may run it at once
+        return type(self)(self.name)
+
+    def __enter__(self) -> "stage":
+        profile = current_rerun()
+        self._owner = False
+        self._record = None
+        if profile is not None and not profile.fragment and _in_fragment_rerun():
+            # Left over from a full run that was cut short (e.g. by st.rerun)
+            _abandon_rerun()
+            profile = None
+        if profile is None:
+            # A fragment rerun: record it as a run of its own
+            if start_rerun(label=self.name) is None:
+                return self
+            self._owner = True
+            return self
+        stack = _local.stack
+        self._record = StageRecord(self.name, depth=len(stack))
+        profile.stages.append(self._record)
+        stack.append(self._record)
+        self._alloc0 = tracemalloc.get_traced_memory()[0] if profile.mode == "memory" else None
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        record = self._record
+        if record is not None:
+            record.ms = (time.perf_counter() - self._t0) * 1000
+            if self._alloc0 is not None:
+                record.alloc_kb = (tracemalloc.get_traced_memory()[0] - self._alloc0) / 1024
+            _local.stack.pop()
+        if self._owner:
+            finish_rerun()
+
+
+def recent_reruns() -> List[Dict[str, Any]]:
+    """Records of the last :data:`MAX_RERUNS` reruns in this process, oldest first."""
+    with _history_lock:
+        return list(_history)
+
+
+def slowest_rerun_report() -> Optional[str]:
+    """cProfile report of the slowest rerun captured in ``cprofile`` mode."""
+    return _slowest["report"]
+
+
+def render_diagnostics(profile: Optional[RerunProfile],
+                       counters: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """Collapsible panel with the latest rerun's stages and the recent history.
+
+    ``counters`` maps a title to a dict of process-wide counters (e.g. cache
+    hits and misses), shown as one single-row table per title.
+    """
+    if profile is None:
+        return
+    with st.expander(f"🩺 Diagnostics: {profile.total_ms:,.0f} ms rerun ({profile.mode})"):
+        rows = [
+            {"stage": "  " * s.depth + s.name, "ms": round(s.ms, 1),
+             **({"alloc_kb": round(s.alloc_kb, 1)} if s.alloc_kb is not None else {})}
+            for s in profile.stages
+        ]
+        st.dataframe(rows, hide_index=True, width="stretch")
+        if profile.peak_kb is not None:
+            st.caption(f"Peak traced memory: {profile.peak_kb:,.0f} KB")
+
+        history = recent_reruns()
+        if len(history) > 1:
+            st.caption(f"Last {len(history)} reruns (ms), logged to {LOG_PATH}")
+            st.line_chart([run["total_ms"] for run in history])
+
+        for title, values in (counters or {}).items():
+            st.caption(f"{title} (process-wide)")
+            st.dataframe([values], hide_index=True, width="stretch")
+
+        report = slowest_rerun_report()
+        if report:
+            st.caption(f"Slowest profiled rerun: {_slowest['label']} ({_slowest['total_ms']:,.0f} ms)")
+            st.code(report, language="text")
@@ -0,0 +1,292 @@
+"""
+Ranked candidates for the recommended play order.
+
+The Game Plan only shows the best ``num_sessions`` games plus a few extra
+cards, yet a full rerun used to filter, score and sort every matching game
+again each time a game was marked "Not Available". :class:`RankedCandidates`
+keeps the ranking of one filter state instead:
+
+* the shown block (the best ``size`` games), selected with
+  ``numpy.argpartition`` through ``scoring.rank_order`` and kept in order;
+* a binary heap (:mod:`heapq`) of the next ``refill`` candidates;
+* the unsorted remainder, from which the heap is refilled a block at a time
+  with another partial selection when it runs dry.
+
+Removing a shown game deletes it from the block and pops the next-best
+candidate off the heap in O(log n); removing any other game is recorded and
+skipped when it reaches the top of the heap. Nothing is rescored.
+
+:func:`get_ranked_candidates` keeps the candidates of the current filter
+state in ``st.session_state`` and rebuilds them only when the state changes.
+
+Building them doesn't have to score anything either: :data:`RANKING_CACHE`
+is a process-wide, size-bounded LRU of full :class:`Ranking` arrays shared
+by every session, keyed by :func:`ranking_key` (catalog hash, the effective
+filters, the search query and the session bankroll). Users with the same
+filters and session bankroll, e.g. everyone on the default trip settings,
+share one ranking; their blacklists are applied afterwards, per session, by
+removing games from the candidates. The cache's hit, miss and
+eviction counters are shown in the diagnostics panel.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import streamlit as st
+
+from scoring import rank_order
+
+DEFAULT_REFILL = 64
+RANKING_CACHE_SIZE = int(os.environ.get("PROFIT_HOPPER_RANKING_CACHE", "32"))
+_CACHE_KEY = "_ranked_candidates"
+
+
+def _heap_keys(scores: np.ndarray) -> List[float]:
+    # Negated scores; NaN never compares, so it is keyed as low as -inf
+    return np.where(np.isnan(scores), np.inf, -scores).tolist()
+
+
+class RankedCandidates:
+    """Best-first candidates of one filter state, with cheap removal.
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+        Catalog positions of the matching games, in catalog order; ties
+        rank in this order.
+    scores : numpy.ndarray
+        Scores aligned with ``rows``.
+    size : int
+        Number of games to keep ranked in :attr:`rows` (plan + extra cards).
+    refill : int
+        Candidates moved into the heap per partial selection.
+    ranked : bool
+        ``rows`` are already best first (e.g. a :class:`Ranking`), so the
+        first selection is skipped.
+    """
+
+    def __init__(self, rows: np.ndarray, scores: np.ndarray, size: int, refill: int = DEFAULT_REFILL,
+                 ranked: bool = False) -> None:
+        rows = np.asarray(rows)
+        scores = np.asarray(scores, dtype=np.float64)
+        self.size = size
+        self.refill = refill
+        self.total = len(rows)
+        self._catalog_rows = rows
+        # Sorted copy for membership tests: blacklisted games outside this
+        # filter state aren't candidates and mustn't count as removed
+        self._sorted_rows = np.sort(rows)
+        self._removed: Set[int] = set()
+        self.excluded_names: Set[str] = set()
+
+        order = np.arange(min(len(rows), size + refill)) if ranked else rank_order(scores, size + refill)
+        shown, queued = order[:size], order[size:size + refill]
+        self._rows: List[int] = rows[shown].tolist()
+        self._scores: List[float] = scores[shown].tolist()
+        # (-score, position, row): ties pop in catalog order, as in a full
+        # sort, and NaN scores (keyed +inf) last. A list sorted best first is
+        # already a valid heap.
+        self._all_scores = scores
+        self._heap: List[Tuple[float, int, int]] = list(zip(_heap_keys(scores[queued]), queued.tolist(),
+                                                            rows[queued].tolist()))
+        rest = np.ones(len(rows), dtype=bool)
+        rest[order] = False
+        self._rest_positions = np.flatnonzero(rest)
+        self._rest_scores = scores[self._rest_positions]
+
+    def __len__(self) -> int:
+        """Matching games not removed."""
+        return self.total - len(self._removed)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Catalog positions of the best remaining games, best first."""
+        return np.asarray(self._rows, dtype=np.intp)
+
+    @property
+    def scores(self) -> np.ndarray:
+        return np.asarray(self._scores, dtype=np.float64)
+
+    def remaining_rows(self) -> np.ndarray:
+        """Catalog positions of every game not removed, in the order given."""
+        if not self._removed:
+            return self._catalog_rows
+        return self._catalog_rows[~np.isin(self._catalog_rows, list(self._removed))]
+
+    def _refill_heap(self) -> None:
+        order = rank_order(self._rest_scores, self.refill)
+        positions = self._rest_positions[order]
+        self._heap = list(zip(_heap_keys(self._rest_scores[order]), positions.tolist(),
+                              self._catalog_rows[positions].tolist()))
+        keep = np.ones(len(self._rest_positions), dtype=bool)
+        keep[order] = False
+        self._rest_positions = self._rest_positions[keep]
+        self._rest_scores = self._rest_scores[keep]
+
+    def _pop_next(self) -> Optional[Tuple[int, float]]:
+        while True:
+            if not self._heap:
+                if not len(self._rest_positions):
+                    return None
+                self._refill_heap()
+            _, position, row = heapq.heappop(self._heap)
+            if row not in self._removed:
+                return row, float(self._all_scores[position])
+
+    def __contains__(self, row: int) -> bool:
+        """Whether catalog position ``row`` is a candidate that hasn't been removed."""
+        i = np.searchsorted(self._sorted_rows, row)
+        return i < len(self._sorted_rows) and self._sorted_rows[i] == row and int(row) not in self._removed
+
+    def remove(self, row: int) -> None:
+        """Drop the game at catalog position ``row`` and promote the next best.
+
+        Rows that aren't candidates are ignored.
+        """
+        row = int(row)
+        if row not in self:
+            return
+        self._removed.add(row)
+        try:
+            i = self._rows.index(row)
+        except ValueError:
+            return  # not shown: skipped lazily when it reaches the heap top
+        del self._rows[i], self._scores[i]
+        promoted = self._pop_next()
+        if promoted is not None:
+            # Every queued candidate ranks below the shown block, so the
+            # promoted game goes last
+            self._rows.append(promoted[0])
+            self._scores.append(promoted[1])
+
+    def exclude_names(self, names: Iterable[str], name_positions: Dict[str, np.ndarray]) -> None:
+        """Remove the games called ``names`` that aren't excluded yet."""
+        for name in set(names) - self.excluded_names:
+            for row in name_positions.get(name, ()):
+                self.remove(row)
+            self.excluded_names.add(name)
+
+
+def get_ranked_candidates(
+    key: Hashable,
+    build: Callable[[], RankedCandidates],
+    excluded_names: Iterable[str],
+    name_positions: Dict[str, np.ndarray],
+) -> RankedCandidates:
+    """Candidates of the filter state ``key``, built once and kept in session state.
+
+    ``excluded_names`` (the blacklist) is applied incrementally; if a name
+    was dropped from it since the last call, the candidates are rebuilt.
+    """
+    excluded_names = set(excluded_names)
+    cached = st.session_state.get(_CACHE_KEY)
+    if cached is None or cached[0] != key or not cached[1].excluded_names <= excluded_names:
+        cached = (key, build())
+        st.session_state[_CACHE_KEY] = cached
+    candidates = cached[1]
+    candidates.exclude_names(excluded_names, name_positions)
+    return candidates
+
+
+@dataclass(frozen=True)
+class Ranking:
+    """Catalog positions of the games matching one filter state, best first,
+    with their scores. Shared between sessions, so the arrays are read-only."""
+
+    rows: np.ndarray
+    scores: np.ndarray
+
+    def __post_init__(self) -> None:
+        for values in (self.rows, self.scores):
+            values.flags.writeable = False
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.scores.nbytes
+
+
+class RankingCache:
+    """Thread-safe LRU of :class:`Ranking` values with hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, Ranking]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Ranking]) -> Ranking:
+        """The ranking for ``key``, computing and storing it on a miss."""
+        with self._lock:
+            ranking = self._entries.get(key)
+            if ranking is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return ranking
+            self.misses += 1
+        # Computed outside the lock so other sessions aren't blocked; two
+        # sessions missing the same key at once both compute it
+        ranking = compute()
+        with self._lock:
+            self._entries[key] = ranking
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return ranking
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current size, for the diagnostics panel."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "kb": round(sum(r.nbytes for r in self._entries.values()) / 1024, 1),
+            }
+
+
+RANKING_CACHE = RankingCache(RANKING_CACHE_SIZE)
+
+
+def ranking_key(filter_index: Any, catalog_key: str, max_min_bet: float, min_rtp: float, game_type: str,
+                advantage: str, volatility: str, search_query: str, session_bankroll: float,
+                casino: Optional[str] = None) -> Tuple:
+    """Cache key of one filter state.
+
+    The range sliders are keyed by how many games they let through, so any
+    two limits between the same catalog values share an entry. The session
+    bankroll is keyed exactly: the max bet, and with it the bet comfort term
+    and the min-bet penalty, scale with it, so any rounding could change the
+    scores. The casino is only part of the key when it has an availability
+    list.
+    """
+    return (
+        catalog_key,
+        len(filter_index.min_bet.at_most(max_min_bet)),
+        len(filter_index.rtp.at_least(min_rtp)),
+        game_type,
+        advantage,
+        volatility,
+        search_query.lower(),
+        float(session_bankroll),
+        casino if casino in filter_index.casino_bits else None,
+    )
+
+
+def ranking_cache_stats() -> Dict[str, Any]:
+    return RANKING_CACHE.stats()
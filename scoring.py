@@ -0,0 +1,243 @@
+"""
+Vectorized game scoring for the Profit Hopper application.
+
+The Game Plan tab used to rebuild every normalized column with pandas
+arithmetic on each rerun. This module splits that work in two:
+
+* :func:`build_game_features` normalizes the catalog once into a contiguous
+  ``float64`` matrix (one row per game, one column per static factor).
+* :func:`score_games` scores any subset of rows with a single matrix-vector
+  product, then applies the bankroll-dependent bet comfort term and the
+  min-bet / volatility penalty masks. :func:`score_matrix` does the same
+  for many bankroll strategies at once, and :func:`rank_games` /
+  :func:`rank_order` turn scores into a play order.
+
+:func:`get_game_features` memoizes the matrix per loaded catalog so that
+widget interactions only pay for the product and the masks.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import catalog_hash
+
+# Column order of the static feature matrix. ``rtp`` is rescaled from the
+# 85-99.9 slider range, ``bonus_frequency`` is already 0-1, advantage play is
+# out of 5 and volatility is inverted so that calmer games score higher.
+FEATURE_COLUMNS = (
+    "rtp_normalized",
+    "bonus_normalized",
+    "app_normalized",
+    "volatility_normalized",
+)
+FEATURE_WEIGHTS = np.array([0.35, 0.20, 0.20, 0.15])
+BET_COMFORT_WEIGHT = 0.10
+SCORE_SCALE = 10
+
+RTP_FLOOR = 85.0
+RTP_CEILING = 99.9
+
+
+@dataclass(frozen=True)
+class GameFeatures:
+    """Normalized, read-only view of a game catalog used for scoring.
+
+    Attributes
+    ----------
+    matrix : numpy.ndarray
+        C-contiguous ``(n_games, len(FEATURE_COLUMNS))`` array of the static
+        normalized factors.
+    min_bet : numpy.ndarray
+        Raw minimum bet per game, needed for the bet comfort term and the
+        min-bet penalty.
+    volatility : numpy.ndarray
+        Raw 1-5 volatility per game, needed for the volatility penalty.
+    """
+
+    matrix: np.ndarray
+    min_bet: np.ndarray
+    volatility: np.ndarray
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    values.setflags(write=False)
+    return values
+
+
+def build_game_features(game_df: pd.DataFrame) -> GameFeatures:
+    """Normalize ``game_df`` into a :class:`GameFeatures` matrix.
+
+    Rows of the result line up with the positional rows of ``game_df``.
+    """
+    rtp = game_df["rtp"].to_numpy(dtype=np.float64)
+    bonus = game_df["bonus_frequency"].to_numpy(dtype=np.float64)
+    advantage = game_df["advantage_play_potential"].to_numpy(dtype=np.float64)
+    volatility = game_df["volatility"].to_numpy(dtype=np.float64)
+
+    matrix = np.empty((len(game_df), len(FEATURE_COLUMNS)), dtype=np.float64)
+    matrix[:, 0] = (rtp - RTP_FLOOR) / (RTP_CEILING - RTP_FLOOR)
+    matrix[:, 1] = bonus
+    matrix[:, 2] = advantage / 5
+    matrix[:, 3] = (5 - volatility) / 4
+
+    return GameFeatures(
+        matrix=_read_only(matrix),
+        min_bet=_read_only(game_df["min_bet"].to_numpy(dtype=np.float64, copy=True)),
+        volatility=_read_only(volatility.copy()),
+    )
+
+
+@st.cache_resource(max_entries=4)
+def _cached_game_features(catalog_key: str, _game_df: pd.DataFrame) -> GameFeatures:
+    return build_game_features(_game_df)
+
+
+def get_game_features(game_df: pd.DataFrame) -> GameFeatures:
+    """Return the feature matrix for ``game_df``, built once per catalog."""
+    return _cached_game_features(catalog_hash(game_df), game_df)
+
+
+def min_bet_threshold_factor(strategy_type: str) -> float:
+    """Fraction of ``max_bet`` above which a game's min bet is penalized."""
+    return 0.75 if strategy_type == "Aggressive" else 0.5
+
+
+def score_matrix(
+    features: GameFeatures,
+    session_bankrolls: Sequence[float],
+    max_bets: Sequence[float],
+    strategy_types: Sequence[str],
+    rows: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Score games for many bankroll strategies at once.
+
+    The static part (one matrix-vector product per game) is shared; the bet
+    comfort term and the penalty masks are broadcast over a
+    ``(n_strategies, n_games)`` grid.
+
+    Parameters
+    ----------
+    features : GameFeatures
+        Output of :func:`build_game_features` / :func:`get_game_features`.
+    session_bankrolls, max_bets, strategy_types : sequence
+        One entry per strategy (see ``strategy.bankroll_strategies``).
+    rows : numpy.ndarray, optional
+        Positional indices into the catalog to score.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``(n_strategies, n_games)`` scores on a 0-10 scale; columns are
+        aligned with ``rows``.
+    """
+    if rows is None:
+        matrix, min_bet, volatility = features.matrix, features.min_bet, features.volatility
+    else:
+        matrix = features.matrix[rows]
+        min_bet = features.min_bet[rows]
+        volatility = features.volatility[rows]
+
+    bankrolls = np.asarray(session_bankrolls, dtype=np.float64)[:, None]
+    max_bets = np.asarray(max_bets, dtype=np.float64)[:, None]
+    factors = np.where(np.asarray(strategy_types, dtype=object) == "Aggressive", 0.75, 0.5)[:, None]
+
+    bet_comfort = np.clip((max_bets - min_bet) / max_bets, 0, 1)
+    scores = (matrix @ FEATURE_WEIGHTS + bet_comfort * BET_COMFORT_WEIGHT) * SCORE_SCALE
+
+    # Penalize games that don't fit the bankroll strategy, harder for small
+    # bankrolls.
+    bankroll_penalty_factor = np.where(bankrolls < 20, 1.5, 1.0)
+    scores *= np.where(min_bet > max_bets * factors, 0.6 * bankroll_penalty_factor, 1.0)
+    scores *= np.where((bankrolls < 50) & (volatility >= 4), 0.7, 1.0)
+    return scores
+
+
+def score_games(
+    features: GameFeatures,
+    session_bankroll: float,
+    max_bet: float,
+    strategy_type: str,
+    rows: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Score the games at positional ``rows`` (all games when ``None``).
+
+    Parameters
+    ----------
+    features : GameFeatures
+        Output of :func:`build_game_features` / :func:`get_game_features`.
+    session_bankroll : float
+        Bankroll available for a single session.
+    max_bet : float
+        Maximum bet for the session's strategy tier.
+    strategy_type : str
+        Name of the strategy tier (``"Conservative"`` ... ``"Aggressive"``).
+    rows : numpy.ndarray, optional
+        Positional indices into the catalog to score.
+
+    Returns
+    -------
+    numpy.ndarray
+        Scores on a 0-10 scale, aligned with ``rows``.
+    """
+    return score_matrix(features, [session_bankroll], [max_bet], [strategy_type], rows)[0]
+
+
+def rank_order(scores: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+    """Indices that sort ``scores`` best first along the last axis.
+
+    Ties keep their original order and NaN scores come last, as in a full
+    sort. With ``limit`` only the best ``limit`` are selected
+    (``numpy.partition``) and sorted, which is O(n) instead of a full sort
+    when ``limit`` is small.
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    if limit is None or limit >= n:
+        return np.argsort(-scores, axis=-1, kind="stable")
+    if limit <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    # argpartition picks arbitrarily among games tied with the limit-th
+    # score, so select explicitly: everything above it, then the earliest
+    # of the tied ones. Keys are negated scores; partition and sort put NaN
+    # last, and a NaN limit-th key means the row has fewer valid scores
+    # than ``limit``: then the valid ones are "above" and NaN are "tied"
+    keys = -scores
+    kth = np.partition(keys, limit - 1, axis=-1)[..., limit - 1:limit]
+    missing = np.isnan(keys)
+    short = np.isnan(kth)
+    above = np.where(short, ~missing, keys < kth)
+    tied = np.where(short, missing, keys == kth)
+    selected = above | (tied & (np.cumsum(tied, axis=-1) <= limit - above.sum(axis=-1, keepdims=True)))
+    candidates = np.nonzero(selected)[-1].reshape(scores.shape[:-1] + (limit,))
+    # Candidates are in position order; a stable sort by score keeps ties so
+    order = np.argsort(np.take_along_axis(keys, candidates, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def rank_games(
+    features: GameFeatures,
+    session_bankroll: float,
+    max_bet: float,
+    strategy_type: str,
+    rows: Optional[np.ndarray] = None,
+    limit: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(rows, scores)`` of the best games, best first.
+
+    ``rows`` defaults to the whole catalog; ``limit`` keeps only the top
+    games.
+    """
+    if rows is None:
+        rows = np.arange(len(features))
+    scores = score_games(features, session_bankroll, max_bet, strategy_type, rows)
+    order = rank_order(scores, limit)
+    return rows[order], scores[order]
@@ -0,0 +1,129 @@
+"""
+N-gram index for the "Search Game Name" box.
+
+:func:`build_search_index` maps every 1-, 2- and 3-character substring of
+the lowercased game names to the sorted row positions that contain it. A
+substring query then costs a handful of posting-list intersections instead
+of a regex scan over the whole catalog:
+
+* queries of up to three characters are answered by a single posting list;
+* longer queries intersect the posting lists of their trigrams (rarest
+  first) and only verify the surviving candidates.
+
+:meth:`SearchIndex.fuzzy` ranks names by trigram similarity, which gives
+typo-tolerant suggestions when an exact substring search finds nothing; it
+can be limited to the rows that pass the other filters, so suggestions are
+ranked among the games that can actually be shown.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import catalog_hash
+
+MAX_GRAM = 3
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _grams(text: str, size: int) -> List[str]:
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """Posting lists over lowercased game names. Build with :func:`build_search_index`."""
+
+    names: np.ndarray
+    postings: Dict[str, np.ndarray]
+    trigram_counts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str) -> np.ndarray:
+        """Return the sorted row positions whose name contains ``query``.
+
+        Matching is a case-insensitive literal substring match.
+        """
+        query = query.lower()
+        if not query:
+            return np.arange(len(self.names), dtype=np.int32)
+        if len(query) <= MAX_GRAM:
+            return self.postings.get(query, _EMPTY)
+
+        lists = []
+        for gram in set(_grams(query, MAX_GRAM)):
+            posting = self.postings.get(gram)
+            if posting is None:
+                return _EMPTY
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+
+        # Sharing every trigram doesn't guarantee they are contiguous
+        return candidates[np.char.find(self.names[candidates], query) >= 0]
+
+    def fuzzy(self, query: str, limit: int = 10, min_similarity: float = 0.25,
+              rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return up to ``limit`` row positions ranked by trigram similarity.
+
+        Similarity is the Jaccard index of the trigram sets of the query and
+        the name; rows below ``min_similarity`` are left out. With ``rows``
+        (sorted positions, e.g. the filtered games) only those are ranked.
+        """
+        query_grams = set(_grams(query.lower(), MAX_GRAM))
+        postings = [self.postings[g] for g in query_grams if g in self.postings]
+        if not postings:
+            return _EMPTY
+
+        matches = np.concatenate(postings)
+        if rows is not None:
+            matches = matches[np.isin(matches, rows, assume_unique=False)]
+        rows, shared = np.unique(matches, return_counts=True)
+        similarity = shared / (len(query_grams) + self.trigram_counts[rows] - shared)
+        keep = similarity >= min_similarity
+        rows, similarity = rows[keep], similarity[keep]
+        if len(rows) > limit:
+            top = np.argpartition(-similarity, limit - 1)[:limit]
+            rows, similarity = rows[top], similarity[top]
+        return rows[np.argsort(-similarity, kind="stable")]
+
+
+def build_search_index(game_df: pd.DataFrame) -> SearchIndex:
+    """Build a :class:`SearchIndex` over the positional rows of ``game_df``."""
+    names = [str(name).lower() for name in game_df["game_name"]]
+    postings: Dict[str, List[int]] = {}
+    trigram_counts = np.zeros(len(names), dtype=np.int32)
+    for row, name in enumerate(names):
+        for size in range(1, MAX_GRAM + 1):
+            grams = set(_grams(name, size))
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+            if size == MAX_GRAM:
+                trigram_counts[row] = len(grams)
+
+    return SearchIndex(
+        names=np.array(names, dtype=str),
+        postings={gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()},
+        trigram_counts=trigram_counts,
+    )
+
+
+@st.cache_resource(max_entries=4)
+def _cached_search_index(catalog_key: str, _game_df: pd.DataFrame) -> SearchIndex:
+    return build_search_index(_game_df)
+
+
+def get_search_index(game_df: pd.DataFrame) -> SearchIndex:
+    """Return the search index for ``game_df``, built once per catalog."""
+    return _cached_search_index(catalog_hash(game_df), game_df)
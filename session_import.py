@@ -0,0 +1,220 @@
+"""
+Bulk import of historical sessions from CSV or JSON Lines files.
+
+:func:`read_session_file` loads the whole file into a DataFrame, remembering
+the line each row came from. :func:`validate_sessions` then checks every
+row at once with vectorized pandas operations (dates, ``money_in`` /
+``money_out`` amounts, game names, trip ids), computes profits and the
+per-trip totals in the same pass, and returns an :class:`ImportResult`
+with the clean sessions and a line-numbered error report.
+
+Committing the result (one database transaction plus one bulk update of the
+in-memory log) is done by ``session_manager.import_sessions``.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+from dataclasses import dataclass
+from typing import IO, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from session_store import SESSION_FIELDS
+from utils import normalize_column_name
+
+REQUIRED_COLUMNS = ("date", "game", "money_in", "money_out")
+
+# Accepted spellings of each column, after normalize_column_name()
+COLUMN_ALIASES = {
+    "trip_id": ["trip_id", "trip"],
+    "date": ["date", "session_date", "played_on"],
+    "casino": ["casino", "location"],
+    "game": ["game", "game_name", "game_played", "name"],
+    "money_in": ["money_in", "buy_in", "cash_in", "in"],
+    "money_out": ["money_out", "cash_out", "out"],
+    "notes": ["notes", "note", "session_notes", "comments"],
+}
+
+
+@dataclass
+class ImportResult:
+    """Outcome of :func:`validate_sessions`.
+
+    Attributes
+    ----------
+    sessions : pandas.DataFrame
+        Valid rows in :data:`session_store.SESSION_FIELDS` order, plus the
+        source ``line``.
+    errors : pandas.DataFrame
+        One row per rejected line: ``line`` and an ``error`` description.
+    trip_totals : pandas.DataFrame
+        Per-trip ``sessions``, ``profit``, ``money_in``, ``money_out``,
+        ``last_date`` and ``casino`` (of the last row) of the valid rows,
+        indexed by ``trip_id``.
+    """
+
+    sessions: pd.DataFrame
+    errors: pd.DataFrame
+    trip_totals: pd.DataFrame
+
+    @property
+    def ok(self) -> bool:
+        return self.errors.empty
+
+
+def read_jsonl(text: str) -> pd.DataFrame:
+    """Parse JSON Lines text into a frame, skipping blank lines.
+
+    A ``line`` column records the 1-based line of every record. If any line
+    isn't a JSON object, every record is parsed on its own and the broken
+    ones become rows with ``_invalid`` set.
+    """
+    lines = text.splitlines()
+    numbered = [(number, line) for number, line in enumerate(lines, start=1) if line.strip()]
+    if not numbered:
+        return pd.DataFrame({"line": pd.Series(dtype=int)})
+    try:
+        df = pd.read_json(io.StringIO("\n".join(line for _, line in numbered)), lines=True,
+                          dtype=False, convert_dates=False)
+    except (ValueError, TypeError):
+        # At least one line is broken: parse line by line to report which
+        records = []
+        for number, line in numbered:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            records.append(record if isinstance(record, dict) else {"_invalid": True})
+        df = pd.DataFrame.from_records(records)
+    df["line"] = [number for number, _ in numbered]
+    return df
+
+
+def read_session_file(file: Union[str, IO], name: Optional[str] = None) -> pd.DataFrame:
+    """Read a ``.csv`` or ``.jsonl`` / ``.json`` session file.
+
+    Columns are normalized and mapped through :data:`COLUMN_ALIASES`, and a
+    ``line`` column records the 1-based source line of every row (the CSV
+    header is line 1).
+    """
+    name = name or (file if isinstance(file, str) else getattr(file, "name", ""))
+    if str(name).lower().endswith((".jsonl", ".json", ".ndjson")):
+        raw = file.read() if hasattr(file, "read") else open(file, "rb").read()
+        df = read_jsonl(raw.decode("utf-8-sig") if isinstance(raw, bytes) else raw)
+    else:
+        df = pd.read_csv(file, dtype=str, keep_default_na=False, skip_blank_lines=False)
+        df["line"] = np.arange(len(df)) + 2
+
+    df.columns = [col if col == "line" else normalize_column_name(str(col)) for col in df.columns]
+    for standard, variants in COLUMN_ALIASES.items():
+        for variant in variants:
+            if variant in df.columns:
+                df[standard] = df[variant]
+                break
+    return df
+
+
+def _blank(values: pd.Series) -> pd.Series:
+    return values.isna() | (values.astype(str).str.strip() == "")
+
+
+def validate_sessions(
+    df: pd.DataFrame,
+    default_trip_id: int,
+    default_casino: str,
+    known_games: Optional[Iterable[str]] = None,
+) -> ImportResult:
+    """Validate every row of ``df`` at once and split it into sessions and errors.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Output of :func:`read_session_file`.
+    default_trip_id : int
+        Trip for rows without a ``trip_id``.
+    default_casino : str
+        Casino for rows without one.
+    known_games : iterable of str, optional
+        When given, games outside this set are rejected.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        errors = pd.DataFrame({"line": [1], "error": [f"Missing required columns: {', '.join(missing)}"]})
+        return ImportResult(pd.DataFrame(columns=list(SESSION_FIELDS) + ["line"]), errors, _trip_totals(None))
+
+    messages = np.full(len(df), "", dtype=object)
+    unreadable = df["_invalid"].fillna(False).astype(bool).to_numpy() if "_invalid" in df.columns \
+        else np.zeros(len(df), dtype=bool)
+
+    def check(mask: pd.Series, message: str) -> None:
+        nonlocal messages
+        messages = messages + np.where(np.asarray(mask, dtype=bool) & ~unreadable, "; " + message, "")
+
+    # ISO dates parse on the fast path; anything else gets a second, lenient pass
+    raw_dates = df["date"].where(~_blank(df["date"]))
+    dates = pd.to_datetime(raw_dates, errors="coerce", format="%Y-%m-%d")
+    retry = dates.isna() & raw_dates.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(raw_dates[retry], errors="coerce", format="mixed")
+    check(dates.isna(), "invalid date")
+
+    money = {}
+    for col in ("money_in", "money_out"):
+        values = pd.to_numeric(df[col], errors="coerce")
+        check(values.isna(), f"{col} is not a number")
+        check(values < 0, f"{col} is negative")
+        money[col] = values
+
+    games = df["game"].where(~_blank(df["game"])).astype(object)
+    check(games.isna(), "game is empty")
+    if known_games is not None:
+        check(games.notna() & ~games.isin(set(known_games)), "unknown game")
+
+    if "trip_id" in df.columns:
+        trip_blank = _blank(df["trip_id"])
+        trip_ids = pd.to_numeric(df["trip_id"].where(~trip_blank), errors="coerce")
+        check(~trip_blank & (trip_ids.isna() | (trip_ids % 1 != 0) | (trip_ids < 1)), "invalid trip_id")
+        trip_ids = trip_ids.fillna(default_trip_id)
+    else:
+        trip_ids = pd.Series(default_trip_id, index=df.index)
+
+    messages = pd.Series(np.where(unreadable, "; not a JSON object", messages), index=df.index).str[2:]
+    bad = messages != ""
+
+    casino = df["casino"].where(~_blank(df["casino"]), default_casino) if "casino" in df.columns \
+        else pd.Series(default_casino, index=df.index)
+    notes = df["notes"].fillna("").astype(str) if "notes" in df.columns else pd.Series("", index=df.index)
+
+    good = ~bad
+    sessions = pd.DataFrame({
+        "trip_id": trip_ids[good].astype(int),
+        "date": dates[good].dt.strftime("%Y-%m-%d"),
+        "casino": casino[good].astype(str),
+        "game": games[good].astype(str).str.strip(),
+        "money_in": money["money_in"][good].astype(float),
+        "money_out": money["money_out"][good].astype(float),
+        "notes": notes[good],
+        "line": df["line"][good],
+    })
+    sessions["profit"] = sessions["money_out"] - sessions["money_in"]
+    sessions = sessions[list(SESSION_FIELDS) + ["line"]].reset_index(drop=True)
+
+    errors = pd.DataFrame({"line": df["line"][bad], "error": messages[bad]}).reset_index(drop=True)
+    return ImportResult(sessions, errors, _trip_totals(sessions))
+
+
+def _trip_totals(sessions: Optional[pd.DataFrame]) -> pd.DataFrame:
+    columns = ["sessions", "profit", "money_in", "money_out", "last_date", "casino"]
+    if sessions is None or sessions.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name="trip_id"))
+    return sessions.groupby("trip_id").agg(
+        sessions=("profit", "size"),
+        profit=("profit", "sum"),
+        money_in=("money_in", "sum"),
+        money_out=("money_out", "sum"),
+        last_date=("date", "max"),
+        casino=("casino", "last"),
+    )
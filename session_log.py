@@ -0,0 +1,133 @@
+"""
+Trip-partitioned, date-ordered session log.
+
+``st.session_state.session_log`` used to be a flat list of session dicts that
+every view filtered by ``trip_id`` and re-sorted by date. :class:`SessionLog`
+keeps the same data partitioned by trip instead: each trip owns a
+:class:`TripBlock` that stores its sessions column by column, kept in date
+order as they are inserted. "Sessions for this trip", "all trips" and the
+newest-first display are then direct lookups.
+
+The class still behaves like the old list where the rest of the app relies
+on it: ``append``, ``len`` and iteration (trip by trip, oldest first).
+
+Every append (or bulk ``extend``) bumps :attr:`SessionLog.version` and records which trip it
+touched, so derived views (see ``analytics``) can tell in O(1) whether
+anything changed and recompute only the affected trips.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from session_store import SESSION_FIELDS
+
+
+class TripBlock:
+    """The sessions of one trip, stored as one list per field, sorted by date."""
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, List[Any]] = {field: [] for field in SESSION_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.columns["date"])
+
+    def insert(self, session: Dict[str, Any]) -> None:
+        # Sessions on the same date keep their insertion order
+        position = bisect_right(self.columns["date"], session["date"])
+        for field, values in self.columns.items():
+            values.insert(position, session.get(field))
+
+    def insert_many(self, sessions: Sequence[Dict[str, Any]]) -> None:
+        """Insert many sessions with one stable sort instead of one insert each."""
+        dates = self.columns["date"]
+        start = max(len(dates) - 1, 0)
+        for field, values in self.columns.items():
+            values.extend(session.get(field) for session in sessions)
+        # Only the appended dates (and the last existing one) can be out of order
+        tail = dates[start:]
+        if any(a > b for a, b in zip(tail, tail[1:])):
+            order = sorted(range(len(dates)), key=dates.__getitem__)
+            for field, values in self.columns.items():
+                self.columns[field] = [values[i] for i in order]
+
+    def rows(self, descending: bool = False) -> List[Dict[str, Any]]:
+        """Return the sessions as dicts, oldest first unless ``descending``."""
+        rows = [dict(zip(SESSION_FIELDS, values)) for values in zip(*self.columns.values())]
+        if descending:
+            rows.reverse()
+        return rows
+
+
+class SessionLog:
+    """Session dicts partitioned by ``trip_id``."""
+
+    def __init__(self, sessions: Iterable[Dict[str, Any]] = ()) -> None:
+        self._blocks: Dict[Any, TripBlock] = {}
+        self._trip_versions: Dict[Any, int] = {}
+        self._size = 0
+        self.version = 0
+        self.extend(sessions)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for trip_id in self.trip_ids():
+            yield from self._blocks[trip_id].rows()
+
+    def __repr__(self) -> str:
+        return f"SessionLog({len(self)} sessions in {len(self._blocks)} trips)"
+
+    def append(self, session: Dict[str, Any]) -> None:
+        block = self._blocks.get(session["trip_id"])
+        if block is None:
+            block = self._blocks[session["trip_id"]] = TripBlock()
+        block.insert(session)
+        self._size += 1
+        self.version += 1
+        self._trip_versions[session["trip_id"]] = self.version
+
+    def extend(self, sessions: Iterable[Dict[str, Any]]) -> None:
+        # Bulk path for imports/hydration: one sort per trip, one version bump
+        by_trip: Dict[Any, List[Dict[str, Any]]] = {}
+        for session in sessions:
+            by_trip.setdefault(session["trip_id"], []).append(session)
+        if not by_trip:
+            return
+        self.version += 1
+        for trip_id, trip_sessions in by_trip.items():
+            block = self._blocks.get(trip_id)
+            if block is None:
+                block = self._blocks[trip_id] = TripBlock()
+            block.insert_many(trip_sessions)
+            self._size += len(trip_sessions)
+            self._trip_versions[trip_id] = self.version
+
+    def trip_ids(self) -> List[Any]:
+        """Trips that have at least one session, in ascending order."""
+        return sorted(self._blocks)
+
+    def block(self, trip_id: Any) -> Optional[TripBlock]:
+        """Columnar block of ``trip_id``, or ``None`` if it has no sessions."""
+        return self._blocks.get(trip_id)
+
+    def for_trip(self, trip_id: Any, descending: bool = False) -> List[Dict[str, Any]]:
+        """Sessions of ``trip_id`` in date order (newest first if ``descending``)."""
+        block = self._blocks.get(trip_id)
+        return block.rows(descending) if block is not None else []
+
+    def trips_changed_since(self, version: int) -> List[Any]:
+        """Trips that received a session after ``version``."""
+        return [trip_id for trip_id, changed in self._trip_versions.items() if changed > version]
+
+    def to_frame(self, fields: Sequence[str] = SESSION_FIELDS) -> pd.DataFrame:
+        """Concatenate the trip blocks into one columnar DataFrame."""
+        blocks = [self._blocks[trip_id] for trip_id in self.trip_ids()]
+        return pd.DataFrame({
+            field: [value for block in blocks for value in block.columns[field]]
+            for field in fields
+        }, columns=list(fields))
@@ -1,10 +1,16 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
-from utils import get_csv_download_link
-from trip_manager import get_current_trip_sessions, get_current_bankroll
+from datetime import datetime, timedelta
+from exporter import EXPORT_FORMATS, available_formats, export_file_name, export_sessions
+from session_import import read_session_file, validate_sessions
+from session_store import SESSION_FIELDS
+from trip_manager import (get_current_trip_sessions, get_current_bankroll, get_user_key, merge_trip_stats,
+                          persist_import, persist_session, update_trip_stats)
 from ui_templates import trip_info_box  # Changed import
 
+# Fragments showing anything derived from the recorded sessions; keys of the
+# @st.fragment functions in app.py and trip_manager.render_trip_summary
+SESSION_FRAGMENTS = ["header_summary", "trip_summary", "game_plan", "session_tracker", "trip_analytics"]
+
 def save_session(session_date, game_played, money_in, money_out, session_notes):
     profit = money_out - money_in
     new_session = {
@@ -18,8 +24,9 @@ def save_session(session_date, game_played, money_in, money_out, session_notes):
         "notes": session_notes
     }
     
-    # Update session log
+    # Update session log and the running trip aggregates
     st.session_state.session_log.append(new_session)
+    update_trip_stats(new_session)
     
     # Update trip bankroll
     current_trip_id = st.session_state.current_trip_id
@@ -29,9 +36,114 @@ def save_session(session_date, game_played, money_in, money_out, session_notes):
         )
     st.session_state.trip_bankrolls[current_trip_id] += profit
     
-    # Force immediate rerun to update all displays
+    # Queue the session for the session database
+    persist_session(new_session)
+    st.session_state.last_session_added = datetime.now()
+
+def submit_session_form():
+    # on_click callback of the form's submit button: rerun only the fragments
+    # that show session-derived data, not the whole script
+    form = st.session_state
+    if form.session_game == "Select Game":
+        st.session_state.session_form_warning = "Please select a game"
+        st.rerun("session_tracker")
+    save_session(form.session_date, form.session_game, form.session_money_in,
+                 form.session_money_out, form.session_notes)
+    st.rerun(SESSION_FRAGMENTS)
+
+def import_sessions(result):
+    # One pass over the validated rows: bankrolls from the per-trip totals,
+    # a single database transaction, then one bulk update of the session log
+    starting = st.session_state.trip_settings['starting_bankroll']
+    totals = result.trip_totals.to_dict('index')
+    trips = {
+        trip_id: (row['casino'], st.session_state.trip_bankrolls.get(trip_id, starting) + row['profit'])
+        for trip_id, row in totals.items()
+    }
+    sessions = result.sessions[list(SESSION_FIELDS)].to_dict('records')
+    persist_import(sessions, trips)
+    
+    st.session_state.session_log.extend(sessions)
+    merge_trip_stats(totals)
+    for trip_id, (_, bankroll) in trips.items():
+        st.session_state.trip_bankrolls[trip_id] = bankroll
     st.session_state.last_session_added = datetime.now()
-    st.rerun()
+
+def render_import_controls(game_df):
+    # A fresh uploader key after each import so the same file isn't offered twice
+    generation = st.session_state.get('import_generation', 0)
+    uploaded = st.file_uploader("Session file (CSV or JSON Lines)", type=["csv", "jsonl", "json"],
+                                key=f"import_file_{generation}")
+    known_only = st.checkbox("Only accept games in the catalog", value=False, key="import_known_games")
+    if uploaded is None:
+        st.caption("Columns: date, game, money_in, money_out; optional trip_id, casino, notes. "
+                   "Rows without a trip_id go to the current trip.")
+        return
+    
+    try:
+        raw = read_session_file(uploaded, uploaded.name)
+    except (ValueError, UnicodeDecodeError) as exc:
+        st.error(f"Could not read {uploaded.name}: {exc}")
+        return
+    result = validate_sessions(
+        raw,
+        st.session_state.current_trip_id,
+        st.session_state.trip_settings['casino'],
+        known_games=game_df['game_name'] if known_only and not game_df.empty else None,
+    )
+    
+    valid = len(result.sessions)
+    st.markdown(f"**{valid:,}** valid session(s), **{len(result.errors):,}** rejected, "
+                f"**{len(result.trip_totals)}** trip(s), net ${result.sessions['profit'].sum():+,.2f}")
+    if not result.ok:
+        st.warning("Rejected rows (line numbers refer to the uploaded file):")
+        st.dataframe(result.errors, hide_index=True, width="stretch")
+    
+    if st.session_state.get('import_error'):
+        st.error(f"Import failed, nothing was saved: {st.session_state.pop('import_error')}")
+    if valid:
+        st.button(f"📥 Import {valid:,} Session(s)", key="import_button",
+                  on_click=submit_import, args=(result, generation))
+
+def submit_import(result, generation):
+    try:
+        import_sessions(result)
+    except Exception as exc:
+        st.session_state.import_error = str(exc)
+        st.rerun("session_tracker")
+    st.session_state.import_generation = generation + 1
+    st.rerun(SESSION_FRAGMENTS)
+
+def render_export_controls():
+    col1, col2 = st.columns(2)
+    with col1:
+        scope = st.radio("Sessions", ["Current trip", "All trips", "Date range"],
+                         horizontal=True, key="export_scope")
+    with col2:
+        fmt = st.selectbox("Format", available_formats(),
+                           format_func=lambda f: EXPORT_FORMATS[f][0], key="export_format")
+    
+    trip_id = st.session_state.current_trip_id if scope == "Current trip" else None
+    start_date = end_date = None
+    if scope == "Date range":
+        today = datetime.today().date()
+        dates = st.date_input("📅 Date Range", value=(today - timedelta(days=30), today),
+                              key="export_dates")
+        if dates:
+            start_date = dates[0].strftime("%Y-%m-%d")
+            end_date = dates[-1].strftime("%Y-%m-%d")
+    
+    # The file is only built when clicked, streamed from the session database
+    # in chunks and served from its own URL rather than inlined in the page
+    user_key = get_user_key()
+    session_log = st.session_state.session_log
+    st.download_button(
+        "💾 Export Session History",
+        data=lambda: export_sessions(user_key, fmt, trip_id, start_date, end_date, session_log),
+        file_name=export_file_name(fmt, trip_id, start_date, end_date),
+        mime=EXPORT_FORMATS[fmt][1],
+        on_click="ignore",
+    )
 
 def render_session_tracker(game_df, session_bankroll):
     st.info("Track your gambling sessions to monitor performance and bankroll growth")
@@ -52,39 +164,40 @@ def render_session_tracker(game_df, session_bankroll):
         with st.form("session_form", clear_on_submit=True):
             col1, col2 = st.columns(2)
             with col1:
-                session_date = st.date_input("📅 Date", value=datetime.today())
-                money_in = st.number_input("💵 Money In", 
-                                          min_value=0.0, 
-                                          value=float(session_bankroll),
-                                          step=5.0)
+                st.date_input("📅 Date", value=datetime.today(), key="session_date")
+                st.number_input("💵 Money In", 
+                                min_value=0.0, 
+                                value=float(session_bankroll),
+                                step=5.0,
+                                key="session_money_in")
             with col2:
                 game_options = ["Select Game"] + list(game_df['game_name'].unique()) if not game_df.empty else ["Select Game"]
-                game_played = st.selectbox("🎮 Game Played", options=game_options)
-                money_out = st.number_input("💰 Money Out", 
-                                           min_value=0.0, 
-                                           value=0.0,
-                                           step=5.0)
+                st.selectbox("🎮 Game Played", options=game_options, key="session_game")
+                st.number_input("💰 Money Out", 
+                                min_value=0.0, 
+                                value=0.0,
+                                step=5.0,
+                                key="session_money_out")
             
-            session_notes = st.text_area("📝 Session Notes", placeholder="Record any observations, strategies, or important events during the session...")
+            st.text_area("📝 Session Notes", placeholder="Record any observations, strategies, or important events during the session...",
+                         key="session_notes")
             
-            submitted = st.form_submit_button("💾 Save Session")
+            st.form_submit_button("💾 Save Session", on_click=submit_session_form)
             
-            if submitted:
-                if game_played == "Select Game":
-                    st.warning("Please select a game")
-                else:
-                    save_session(session_date, game_played, money_in, money_out, session_notes)
+            if st.session_state.get('session_form_warning'):
+                st.warning(st.session_state.pop('session_form_warning'))
+    
+    with st.expander("📥 Import Sessions"):
+        render_import_controls(game_df)
     
     # Display current trip sessions
-    current_trip_sessions = get_current_trip_sessions()
+    # Already partitioned by trip and kept in date order, newest first here
+    current_trip_sessions = get_current_trip_sessions(descending=True)
     
     if current_trip_sessions:
         st.subheader(f"Trip #{st.session_state.current_trip_id} Sessions")
         
-        # Sort sessions by date descending
-        sorted_sessions = sorted(current_trip_sessions, key=lambda x: x['date'], reverse=True)
-        
-        for session in sorted_sessions:
+        for session in current_trip_sessions:
             profit = session['profit']
             profit_class = "positive-profit" if profit >= 0 else "negative-profit"
             
@@ -105,11 +218,8 @@ def render_session_tracker(game_df, session_bankroll):
             </div>
             """
             st.markdown(session_card, unsafe_allow_html=True)
-        
-        # Export sessions to CSV
-        st.subheader("Export Data")
-        if st.button("💾 Export Session History to CSV"):
-            session_df = pd.DataFrame(current_trip_sessions)
-            st.markdown(get_csv_download_link(session_df, f"trip_{st.session_state.current_trip_id}_sessions.csv"), unsafe_allow_html=True)
     else:
-        st.info("No sessions recorded for this trip yet. Add your first session above.")
\ No newline at end of file
+        st.info("No sessions recorded for this trip yet. Add your first session above.")
+    
+    st.subheader("Export Data")
+    render_export_controls()
\ No newline at end of file
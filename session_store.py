@@ -0,0 +1,270 @@
+"""
+Durable SQLite storage for trips and recorded sessions.
+
+``st.session_state`` only lives as long as the browser tab, so every trip and
+session is also written to a SQLite database (``profit_hopper.db`` next to
+this module, or ``PROFIT_HOPPER_DB``). The store is built for many
+concurrent app sessions in one server process:
+
+* one connection per process, in WAL mode so reads never wait on writes;
+* writes are queued and a single writer thread commits them in batches, one
+  transaction and one ``executemany`` per statement per batch, so hundreds
+  of sessions saving at once turn into a few short transactions;
+* the insert/upsert statements are fixed strings, so SQLite's statement
+  cache prepares each of them once per connection;
+* a returning user's history is loaded lazily with one query over the
+  ``(user_key, trip_id, date)`` index.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get(
+    "PROFIT_HOPPER_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "profit_hopper.db"),
+)
+MAX_BATCH_SIZE = 500
+
+SESSION_FIELDS = ("trip_id", "date", "casino", "game", "money_in", "money_out", "profit", "notes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trips (
+    user_key TEXT NOT NULL,
+    trip_id INTEGER NOT NULL,
+    casino TEXT,
+    starting_bankroll REAL,
+    bankroll REAL NOT NULL,
+    PRIMARY KEY (user_key, trip_id)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user_key TEXT NOT NULL,
+    trip_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    casino TEXT,
+    game TEXT,
+    money_in REAL NOT NULL,
+    money_out REAL NOT NULL,
+    profit REAL NOT NULL,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_user_trip_date ON sessions (user_key, trip_id, date);
+"""
+
+_INSERT_SESSION = (
+    "INSERT INTO sessions (user_key, trip_id, date, casino, game, money_in, money_out, profit, notes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_UPSERT_TRIP = (
+    "INSERT INTO trips (user_key, trip_id, casino, starting_bankroll, bankroll) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (user_key, trip_id) DO UPDATE SET "
+    "casino = COALESCE(excluded.casino, trips.casino), "
+    "starting_bankroll = COALESCE(trips.starting_bankroll, excluded.starting_bankroll), "
+    "bankroll = excluded.bankroll"
+)
+_SELECT_SESSIONS = (
+    "SELECT trip_id, date, casino, game, money_in, money_out, profit, notes FROM sessions "
+    "WHERE user_key = ? ORDER BY trip_id, date, id"
+)
+_SELECT_TRIPS = "SELECT trip_id, casino, starting_bankroll, bankroll FROM trips WHERE user_key = ? ORDER BY trip_id"
+
+_SELECT_SESSION_PAGE = (
+    "SELECT trip_id, date, casino, game, money_in, money_out, profit, notes, id FROM sessions "
+    "WHERE user_key = ? AND (trip_id, date, id) > (?, ?, ?) {filters}"
+    "ORDER BY trip_id, date, id LIMIT ?"
+)
+
+_STOP = object()
+
+
+def session_row(user_key: str, session: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Parameters of :data:`_INSERT_SESSION` for a session dict."""
+    return (user_key,) + tuple(session.get(field) for field in SESSION_FIELDS)
+
+
+class SessionStore:
+    """Process-wide handle on the session database. Use :func:`get_session_store`."""
+
+    def __init__(self, path: str = DB_PATH) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="session-store-writer", daemon=True)
+        self._writer.start()
+
+    # -- writes ---------------------------------------------------------------
+
+    def record_session(
+        self,
+        user_key: str,
+        session: Dict[str, Any],
+        trip_bankroll: float,
+        starting_bankroll: Optional[float] = None,
+    ) -> None:
+        """Queue a recorded session and the resulting trip bankroll.
+
+        ``starting_bankroll`` is only stored if the trip has none yet.
+        """
+        self._queue.put(("session", user_key, session, trip_bankroll, starting_bankroll))
+
+    def record_trip(
+        self,
+        user_key: str,
+        trip_id: int,
+        casino: Optional[str],
+        starting_bankroll: Optional[float],
+        bankroll: float,
+    ) -> None:
+        """Queue a trip row insert/update."""
+        self._queue.put(("trip", user_key, (user_key, trip_id, casino, starting_bankroll, bankroll)))
+
+    def write_batch(self, sessions: List[Tuple[Any, ...]], trips: List[Tuple[Any, ...]]) -> None:
+        """Commit session and trip rows in one transaction, synchronously."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if sessions:
+                    self._conn.executemany(_INSERT_SESSION, sessions)
+                if trips:
+                    self._conn.executemany(_UPSERT_TRIP, trips)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while len(batch) < MAX_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            sessions: List[Tuple[Any, ...]] = []
+            trips: Dict[Tuple[str, int], Tuple[Any, ...]] = {}
+            stop = False
+            for entry in batch:
+                if entry is _STOP:
+                    stop = True
+                elif entry[0] == "session":
+                    _, user_key, session, bankroll, starting_bankroll = entry
+                    sessions.append(session_row(user_key, session))
+                    key = (user_key, session["trip_id"])
+                    previous = trips.get(key)
+                    if previous is not None and previous[3] is not None:
+                        starting_bankroll = previous[3]
+                    trips[key] = (user_key, session["trip_id"], session.get("casino"),
+                                  starting_bankroll, bankroll)
+                else:
+                    _, user_key, row = entry
+                    trips[(user_key, row[1])] = row
+
+            try:
+                self.write_batch(sessions, list(trips.values()))
+            except Exception:
+                logger.exception("Failed to write %d session(s) to %s", len(sessions), self.path)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self) -> None:
+        """Block until every queued write has been committed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending writes, stop the writer thread and close the connection."""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    # -- reads ----------------------------------------------------------------
+
+    def load_history(self, user_key: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Return ``(sessions, trips)`` for ``user_key``.
+
+        Sessions come back ordered by trip and date, as dicts shaped like the
+        entries of ``st.session_state.session_log``.
+        """
+        with self._lock:
+            session_rows = self._conn.execute(_SELECT_SESSIONS, (user_key,)).fetchall()
+            trip_rows = self._conn.execute(_SELECT_TRIPS, (user_key,)).fetchall()
+        sessions = [dict(zip(SESSION_FIELDS, row)) for row in session_rows]
+        trips = [
+            dict(zip(("trip_id", "casino", "starting_bankroll", "bankroll"), row))
+            for row in trip_rows
+        ]
+        return sessions, trips
+
+    def iter_sessions(
+        self,
+        user_key: str,
+        trip_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        chunk_size: int = 5000,
+    ) -> Iterator[List[Tuple[Any, ...]]]:
+        """Yield a user's sessions in chunks of at most ``chunk_size`` rows.
+
+        Rows are tuples in :data:`SESSION_FIELDS` order, sorted by trip and
+        date, optionally limited to one trip and/or an inclusive
+        ``YYYY-MM-DD`` date range. Each chunk is a separate keyset-paginated
+        query, so the connection is never held between chunks and memory
+        stays bounded by ``chunk_size``.
+        """
+        filters, params = [], []
+        if trip_id is not None:
+            filters.append("AND trip_id = ? ")
+            params.append(trip_id)
+        if start_date is not None:
+            filters.append("AND date >= ? ")
+            params.append(start_date)
+        if end_date is not None:
+            filters.append("AND date <= ? ")
+            params.append(end_date)
+        sql = _SELECT_SESSION_PAGE.format(filters="".join(filters))
+
+        after: Tuple[Any, ...] = (-1, "", -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, (user_key, *after, *params, chunk_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1]
+            after = (last[0], last[1], last[-1])
+            yield [row[:-1] for row in rows]
+            if len(rows) < chunk_size:
+                return
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide :class:`SessionStore`, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+            atexit.register(_store.close)
+        return _store
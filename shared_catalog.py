@@ -0,0 +1,194 @@
+"""
+Game catalog shared between Streamlit worker processes.
+
+``st.cache_data`` keeps a private copy of the catalog in every server
+process and hands each caller another unpickled copy. Here the compacted
+catalog is instead published once per machine as read-only ``.npy`` files,
+and every process maps them with ``numpy.load(mmap_mode="r")``: the numeric
+columns and the category codes of categorical columns are views of the same
+page-cache pages in every worker. Text columns (the game names) are decoded
+into each process, since pandas strings can't live in a shared mapping.
+
+Layout, under ``<CACHE_DIR>/shared`` (see ``catalog_cache.CACHE_DIR``)::
+
+    CURRENT                  # JSON pointer: version, content hash, published_at
+    catalog_<hash>/meta.json # column names, kinds, categories, DataFrame attrs
+    catalog_<hash>/<i>.npy   # one array per column
+
+:func:`publish_catalog` writes a version into a temporary directory, renames
+it into place and then atomically replaces ``CURRENT``. :func:`attach_catalog`
+stats ``CURRENT`` on every call and, when it points at a new version, maps
+that version and swaps it in for the whole process; callers holding the old
+DataFrame keep a valid mapping until they drop it. The previous version is
+kept on disk for workers that are still switching over.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from catalog_cache import CACHE_DIR, _atomic_write
+
+logger = logging.getLogger(__name__)
+
+SHARED_DIR = os.environ.get("PROFIT_HOPPER_SHARED_DIR", os.path.join(CACHE_DIR, "shared"))
+POINTER_NAME = "CURRENT"
+META_NAME = "meta.json"
+KEEP_VERSIONS = 2
+
+# Bump whenever the on-disk layout changes
+SHARED_FORMAT = 1
+
+_attached: Dict[str, Any] = {"stat": None, "pointer": None, "games": None}
+_attach_lock = threading.Lock()
+
+
+def version_name(content_hash: str) -> str:
+    return f"catalog_{content_hash[:16]}"
+
+
+def _write_version(games: pd.DataFrame, path: str) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=directory, prefix=".tmp_")
+    try:
+        columns = []
+        for i, col in enumerate(games.columns):
+            series = games[col]
+            entry: Dict[str, Any] = {"name": col}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                entry.update(kind="category", categories=series.cat.categories.tolist(),
+                             ordered=bool(series.cat.ordered))
+                values = series.cat.codes.to_numpy()
+            elif pd.api.types.is_numeric_dtype(series.dtype):
+                entry["kind"] = "numeric"
+                values = series.to_numpy()
+            else:
+                entry["kind"] = "text"
+                nulls = series.isna().to_numpy()
+                if nulls.any():
+                    entry["nulls"] = np.flatnonzero(nulls).tolist()
+                values = np.array(series.fillna("").astype(str).tolist(), dtype=str)
+            np.save(os.path.join(tmp_path, f"{i}.npy"), values, allow_pickle=False)
+            columns.append(entry)
+
+        meta = {"format": SHARED_FORMAT, "length": len(games), "columns": columns, "attrs": games.attrs}
+        with open(os.path.join(tmp_path, META_NAME), "w") as f:
+            json.dump(meta, f)
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another process published the same version first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(os.path.join(path, META_NAME)):
+            raise
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def _remove_old_versions(keep: str, directory: str) -> None:
+    versions = sorted(
+        (entry for entry in os.scandir(directory)
+         if entry.is_dir() and entry.name.startswith("catalog_") and entry.name != keep),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    # Mapped files stay readable after unlinking, so workers that haven't
+    # switched yet are unaffected
+    for entry in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def publish_catalog(games: pd.DataFrame, content_hash: str, directory: Optional[str] = None) -> str:
+    """Publish ``games`` as the current shared catalog and return its version.
+
+    Publishing a version that is already current only refreshes
+    ``published_at``.
+    """
+    directory = directory or SHARED_DIR
+    version = version_name(content_hash)
+    path = os.path.join(directory, version)
+    if not os.path.exists(os.path.join(path, META_NAME)):
+        _write_version(games, path)
+        logger.info("Published shared catalog %s (%d games)", version, len(games))
+    pointer = {"version": version, "content_hash": content_hash, "published_at": time.time()}
+    _atomic_write(os.path.join(directory, POINTER_NAME), lambda fh: fh.write(json.dumps(pointer).encode()))
+    _remove_old_versions(version, directory)
+    return version
+
+
+def read_pointer(directory: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The current version pointer, or ``None`` if nothing is published."""
+    try:
+        with open(os.path.join(directory or SHARED_DIR, POINTER_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _open_version(path: str) -> pd.DataFrame:
+    with open(os.path.join(path, META_NAME)) as f:
+        meta = json.load(f)
+    if meta.get("format") != SHARED_FORMAT:
+        raise ValueError(f"Shared catalog {path} has format {meta.get('format')}, expected {SHARED_FORMAT}")
+
+    data = {}
+    for i, entry in enumerate(meta["columns"]):
+        # Plain ndarray views of the mapping (not np.memmap), so pandas
+        # results don't inherit the subclass
+        values = np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r", allow_pickle=False).view(np.ndarray)
+        if entry["kind"] == "category":
+            data[entry["name"]] = pd.Categorical.from_codes(values, entry["categories"], ordered=entry["ordered"])
+        elif entry["kind"] == "text":
+            series = pd.Series(values, dtype="str")
+            if entry.get("nulls"):
+                series[entry["nulls"]] = None
+            data[entry["name"]] = series
+        else:
+            data[entry["name"]] = values
+    games = pd.DataFrame(data, copy=False)
+    games.attrs.update(meta["attrs"])
+    return games
+
+
+def attach_catalog(directory: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """The current shared catalog, mapped zero-copy, or ``None`` if none is published.
+
+    The same DataFrame is returned to every caller in the process until a
+    new version is published; treat it as read-only.
+    """
+    pointer_path = os.path.join(directory or SHARED_DIR, POINTER_NAME)
+    try:
+        stat = os.stat(pointer_path)
+    except OSError:
+        return None
+    key = (pointer_path, stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    with _attach_lock:
+        if _attached["stat"] == key:
+            return _attached["games"]
+        pointer = read_pointer(directory)
+        if pointer is None:
+            return _attached["games"]
+        previous = _attached["pointer"]
+        if previous is None or previous["version"] != pointer["version"] or _attached["games"] is None:
+            games = _open_version(os.path.join(directory or SHARED_DIR, pointer["version"]))
+            _attached["games"] = games
+            logger.info("Attached shared catalog %s", pointer["version"])
+        _attached.update(stat=key, pointer=pointer)
+        return _attached["games"]
+
+
+def attached_pointer() -> Optional[Dict[str, Any]]:
+    """Pointer of the version this process is attached to."""
+    return _attached["pointer"]
@@ -0,0 +1,238 @@
+"""
+Monte Carlo risk-of-ruin simulation for recommended games.
+
+Each game is modelled from its catalog ratings as a simple two-outcome slot:
+
+* a regular hit, whose chance falls as volatility rises (see
+  :data:`HIT_RATE_BY_VOLATILITY`);
+* a bonus round, triggered ``bonus_frequency * BONUS_TRIGGER_SCALE`` of the
+  time and paying :data:`BONUS_RTP_SHARE` of the game's return.
+
+Win sizes are exponentially distributed and scaled so that the expected
+return per spin equals the game's RTP. :func:`simulate_sessions` plays all
+``trials`` sessions of a game at once as a ``trials x spins`` NumPy array,
+stops each session when it hits the stop loss or can no longer cover a bet,
+and summarizes the outcomes per game. :func:`simulate_scenarios` does the
+same for every game across several bankroll scenarios.
+
+Each (game, scenario) pair is one task for :func:`parallel.run_tasks`, with
+its own spawned seed, so results for a fixed seed are the same on the
+serial, thread and process backends.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import catalog_hash
+from parallel import run_tasks
+
+HIT_RATE_BY_VOLATILITY = np.array([0.45, 0.45, 0.38, 0.30, 0.22, 0.15])  # index = volatility 0-5
+BONUS_TRIGGER_SCALE = 0.05
+BONUS_RTP_SHARE = 0.25
+
+DEFAULT_TRIALS = 1000
+MAX_SPINS = 1000
+
+RESULT_COLUMNS = [
+    "stop_loss_probability",
+    "median_spins",
+    "profit_p10",
+    "profit_p50",
+    "profit_p90",
+]
+SCENARIO_COLUMNS = ["session_bankroll", "bet_unit", "stop_loss"]
+
+
+def _spin_model(rtp: np.ndarray, volatility: np.ndarray, bonus_frequency: np.ndarray):
+    """Per-game hit/bonus probabilities and mean win sizes (in bets)."""
+    rtp = np.nan_to_num(rtp, nan=90.0) / 100
+    volatility = np.clip(np.nan_to_num(volatility, nan=3), 1, 5).round().astype(np.intp)
+    hit_rate = HIT_RATE_BY_VOLATILITY[volatility]
+    bonus_rate = np.clip(np.nan_to_num(bonus_frequency, nan=0.0), 0, 1) * BONUS_TRIGGER_SCALE
+
+    bonus_share = np.where(bonus_rate > 0, BONUS_RTP_SHARE, 0.0)
+    hit_mean = rtp * (1 - bonus_share) / hit_rate
+    bonus_mean = np.divide(rtp * bonus_share, bonus_rate, out=np.zeros_like(rtp), where=bonus_rate > 0)
+    return hit_rate, bonus_rate, hit_mean, bonus_mean
+
+
+def _simulate_game(task: Tuple[float, ...], seed: np.random.SeedSequence) -> np.ndarray:
+    """Play ``trials`` sessions of one game and summarize them.
+
+    ``task`` is ``(hit_rate, bonus_rate, hit_mean, bonus_mean, bet,
+    session_bankroll, stop_loss, trials, spins)``.
+    """
+    hit_rate, bonus_rate, hit_mean, bonus_mean, bet, session_bankroll, stop_loss, trials, spins = task
+    rng = np.random.default_rng(seed)
+    shape = (int(trials), int(spins))
+
+    draw = rng.random(shape, dtype=np.float32)
+    win_mean = np.where(draw < hit_rate, hit_mean, np.where(draw >= 1 - bonus_rate, bonus_mean, 0.0))
+    payout = rng.standard_exponential(shape, dtype=np.float32) * win_mean.astype(np.float32)
+
+    balance = np.cumsum((payout - 1) * np.float32(bet), axis=1)
+
+    # A session ends at its stop loss, or when the bankroll can't cover a bet
+    hit_stop = balance <= -stop_loss
+    ended = hit_stop | (session_bankroll + balance < bet)
+    any_end = ended.any(axis=1)
+    end_spin = np.where(any_end, ended.argmax(axis=1), shape[1] - 1)
+
+    rows = np.arange(shape[0])
+    profit = balance[rows, end_spin]
+    stopped = hit_stop[rows, end_spin] & any_end
+
+    p10, p50, p90 = np.percentile(profit, [10, 50, 90])
+    return np.array([stopped.mean(), np.median(end_spin + 1), p10, p50, p90])
+
+
+def _game_tasks(
+    games: pd.DataFrame,
+    scenarios: Sequence[Tuple[float, float, float]],
+    trials: int,
+    max_spins: int,
+) -> List[Tuple[float, ...]]:
+    hit_rate, bonus_rate, hit_mean, bonus_mean = _spin_model(
+        games["rtp"].to_numpy(dtype=np.float64),
+        games["volatility"].to_numpy(dtype=np.float64),
+        games["bonus_frequency"].to_numpy(dtype=np.float64),
+    )
+    min_bet = games["min_bet"].to_numpy(dtype=np.float64)
+
+    tasks = []
+    for session_bankroll, bet_unit, stop_loss in scenarios:
+        spins = int(min(max(session_bankroll / bet_unit, 1), max_spins))
+        bets = np.maximum(bet_unit, min_bet)
+        tasks.extend(
+            (hit_rate[i], bonus_rate[i], hit_mean[i], bonus_mean[i], bets[i],
+             session_bankroll, stop_loss, trials, spins)
+            for i in range(len(games))
+        )
+    return tasks
+
+
+def simulate_sessions(
+    games: pd.DataFrame,
+    session_bankroll: float,
+    bet_unit: float,
+    stop_loss: float,
+    trials: int = DEFAULT_TRIALS,
+    max_spins: int = MAX_SPINS,
+    seed: Optional[int] = 0,
+    backend: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Simulate ``trials`` sessions for every game in ``games``.
+
+    Parameters
+    ----------
+    games : pandas.DataFrame
+        Catalog rows with ``rtp``, ``volatility``, ``bonus_frequency`` and
+        ``min_bet`` columns.
+    session_bankroll : float
+        Money brought to each session.
+    bet_unit : float
+        Bet per spin; raised to the game's minimum bet where necessary.
+    stop_loss : float
+        Loss at which the player walks away.
+    trials : int
+        Sessions simulated per game.
+    max_spins : int
+        Cap on the spins per session (the session otherwise lasts
+        ``session_bankroll / bet_unit`` spins, as in the app's estimate).
+    seed : int, optional
+        Seed for reproducible results; ``None`` draws fresh entropy.
+    backend, max_workers
+        Execution backend and pool size, see :func:`parallel.run_tasks`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Indexed like ``games`` with the columns in :data:`RESULT_COLUMNS`:
+        probability of hitting the stop loss, median session length in spins
+        and the 10th/50th/90th percentile session profit.
+    """
+    if games.empty or bet_unit <= 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS, index=games.index, dtype=float)
+
+    tasks = _game_tasks(games, [(session_bankroll, bet_unit, stop_loss)], trials, max_spins)
+    results = run_tasks(_simulate_game, tasks, seed=seed, backend=backend, max_workers=max_workers)
+    return pd.DataFrame(np.vstack(results), columns=RESULT_COLUMNS, index=games.index)
+
+
+def simulate_scenarios(
+    games: pd.DataFrame,
+    scenarios: Sequence[Tuple[float, float, float]],
+    trials: int = DEFAULT_TRIALS,
+    max_spins: int = MAX_SPINS,
+    seed: Optional[int] = 0,
+    backend: Optional[str] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Simulate every game in ``games`` under each bankroll scenario.
+
+    ``scenarios`` is a sequence of ``(session_bankroll, bet_unit, stop_loss)``
+    tuples. The ``games x scenarios`` simulations are independent tasks, so
+    large batches spread across all workers of the chosen backend.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per (scenario, game) with a ``(scenario, game index)``
+        MultiIndex, the :data:`SCENARIO_COLUMNS` and the
+        :data:`RESULT_COLUMNS` of :func:`simulate_sessions`. Scenarios with a
+        bet unit of zero or less keep their position and get NaN results.
+    """
+    scenarios = [tuple(scenario) for scenario in scenarios]
+    index = pd.MultiIndex.from_product(
+        [range(len(scenarios)), games.index], names=["scenario", games.index.name or "game"]
+    )
+    result = pd.DataFrame(np.nan, columns=SCENARIO_COLUMNS + RESULT_COLUMNS, index=index)
+    if games.empty or not scenarios:
+        return result
+    result[SCENARIO_COLUMNS] = np.repeat(np.asarray(scenarios, dtype=np.float64), len(games), axis=0)
+
+    # Scenarios without a positive bet unit can't be played; their result
+    # rows stay NaN, as in simulate_sessions
+    valid = [i for i, scenario in enumerate(scenarios) if scenario[1] > 0]
+    if valid:
+        tasks = _game_tasks(games, [scenarios[i] for i in valid], trials, max_spins)
+        results = run_tasks(_simulate_game, tasks, seed=seed, backend=backend, max_workers=max_workers)
+        positions = (np.asarray(valid)[:, None] * len(games) + np.arange(len(games))).ravel()
+        result.iloc[positions, len(SCENARIO_COLUMNS):] = np.vstack(results)
+    return result
+
+
+@st.cache_data(max_entries=64)
+def _cached_session_risk(
+    catalog_key: str,
+    rows: Tuple[int, ...],
+    session_bankroll: float,
+    bet_unit: float,
+    stop_loss: float,
+    _game_df: pd.DataFrame,
+) -> pd.DataFrame:
+    return simulate_sessions(_game_df.iloc[list(rows)], session_bankroll, bet_unit, stop_loss)
+
+
+def get_session_risk(
+    game_df: pd.DataFrame,
+    rows: np.ndarray,
+    session_bankroll: float,
+    bet_unit: float,
+    stop_loss: float,
+) -> pd.DataFrame:
+    """Memoized :func:`simulate_sessions` for positional ``rows`` of the catalog."""
+    return _cached_session_risk(
+        catalog_hash(game_df),
+        tuple(int(row) for row in rows),
+        float(session_bankroll),
+        float(bet_unit),
+        float(stop_loss),
+        game_df,
+    )
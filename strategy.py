@@ -0,0 +1,153 @@
+"""
+Bankroll strategy tiers, usable outside the Streamlit script.
+
+A session bankroll falls into one of four tiers (Conservative below $20,
+Moderate below $100, Standard below $500, Aggressive from $500), and the
+tier sets the max bet, stop loss and bet unit as fractions of the bankroll,
+with a per-tier floor on the max bet and bet unit.
+
+:func:`bankroll_strategy` evaluates one bankroll; :func:`bankroll_strategies`
+evaluates an array of them at once by looking each bankroll's tier up with
+``numpy.searchsorted`` over :data:`TIER_BOUNDARIES` and indexing per-tier
+parameter arrays. :func:`session_bankroll_for` splits a trip bankroll over
+the remaining sessions the same way the sidebar does.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class StrategyTier:
+    """Bet sizing rules for bankrolls below ``upper``."""
+
+    name: str
+    upper: float
+    max_bet_pct: float
+    stop_loss_pct: float
+    bet_unit_pct: float
+    max_bet_floor: float = 0.0
+    bet_unit_floor: float = 0.0
+
+
+TIERS: Tuple[StrategyTier, ...] = (
+    StrategyTier("Conservative", 20.0, 0.10, 0.40, 0.02, max_bet_floor=0.01, bet_unit_floor=0.01),
+    StrategyTier("Moderate", 100.0, 0.15, 0.50, 0.03, bet_unit_floor=0.05),
+    StrategyTier("Standard", 500.0, 0.25, 0.60, 0.05, bet_unit_floor=0.10),
+    StrategyTier("Aggressive", np.inf, 0.30, 0.70, 0.06, bet_unit_floor=0.25),
+)
+TIER_NAMES = tuple(tier.name for tier in TIERS)
+# Upper bounds of every tier but the last; a bankroll equal to a bound
+# belongs to the next tier up
+TIER_BOUNDARIES = np.array([tier.upper for tier in TIERS[:-1]])
+
+# Per-session bankroll cap once the trip bankroll is large
+SESSION_BANKROLL_CAP = 500.0
+SESSION_CAP_TRIP_BANKROLL = 1000.0
+
+_MAX_BET_PCT = np.array([tier.max_bet_pct for tier in TIERS])
+_STOP_LOSS_PCT = np.array([tier.stop_loss_pct for tier in TIERS])
+_BET_UNIT_PCT = np.array([tier.bet_unit_pct for tier in TIERS])
+_MAX_BET_FLOOR = np.array([tier.max_bet_floor for tier in TIERS])
+_BET_UNIT_FLOOR = np.array([tier.bet_unit_floor for tier in TIERS])
+
+
+@dataclass(frozen=True)
+class BankrollStrategy:
+    """Bet sizing for one session bankroll."""
+
+    strategy_type: str
+    max_bet: float
+    stop_loss: float
+    bet_unit: float
+    session_bankroll: float
+
+    @property
+    def estimated_spins(self) -> int:
+        """Spins the session bankroll lasts at the bet unit."""
+        return int(self.session_bankroll / self.bet_unit) if self.bet_unit > 0 else 0
+
+
+@dataclass(frozen=True)
+class StrategyBatch:
+    """Bet sizing for many session bankrolls, as aligned arrays.
+
+    Attributes
+    ----------
+    tier : numpy.ndarray
+        Index into :data:`TIERS` per bankroll.
+    session_bankroll, max_bet, stop_loss, bet_unit : numpy.ndarray
+        ``float64`` arrays aligned with ``tier``.
+    """
+
+    tier: np.ndarray
+    session_bankroll: np.ndarray
+    max_bet: np.ndarray
+    stop_loss: np.ndarray
+    bet_unit: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.tier)
+
+    @property
+    def strategy_types(self) -> np.ndarray:
+        return np.asarray(TIER_NAMES, dtype=object)[self.tier]
+
+    def __getitem__(self, i: int) -> BankrollStrategy:
+        return BankrollStrategy(
+            TIER_NAMES[self.tier[i]],
+            float(self.max_bet[i]),
+            float(self.stop_loss[i]),
+            float(self.bet_unit[i]),
+            float(self.session_bankroll[i]),
+        )
+
+
+def tier_index(session_bankrolls: Sequence[float]) -> np.ndarray:
+    """Index into :data:`TIERS` of each bankroll."""
+    return np.searchsorted(TIER_BOUNDARIES, np.asarray(session_bankrolls, dtype=np.float64), side="right")
+
+
+def bankroll_strategies(session_bankrolls: Sequence[float]) -> StrategyBatch:
+    """Vectorized :func:`bankroll_strategy` over an array of bankrolls."""
+    bankrolls = np.asarray(session_bankrolls, dtype=np.float64)
+    tier = tier_index(bankrolls)
+    return StrategyBatch(
+        tier=tier,
+        session_bankroll=bankrolls,
+        max_bet=np.maximum(_MAX_BET_FLOOR[tier], bankrolls * _MAX_BET_PCT[tier]),
+        stop_loss=bankrolls * _STOP_LOSS_PCT[tier],
+        bet_unit=np.maximum(_BET_UNIT_FLOOR[tier], bankrolls * _BET_UNIT_PCT[tier]),
+    )
+
+
+def bankroll_strategy(session_bankroll: float) -> BankrollStrategy:
+    """Strategy tier, max bet, stop loss and bet unit for one session bankroll."""
+    for tier in TIERS:
+        if session_bankroll < tier.upper:
+            break
+    return BankrollStrategy(
+        tier.name,
+        max(tier.max_bet_floor, session_bankroll * tier.max_bet_pct),
+        session_bankroll * tier.stop_loss_pct,
+        max(tier.bet_unit_floor, session_bankroll * tier.bet_unit_pct),
+        session_bankroll,
+    )
+
+
+def session_bankroll_for(current_bankroll, num_sessions, completed_sessions=0):
+    """Split a trip bankroll evenly over the sessions still to play.
+
+    Works on scalars and, elementwise, on arrays. Large bankrolls (over
+    :data:`SESSION_CAP_TRIP_BANKROLL`) are capped at
+    :data:`SESSION_BANKROLL_CAP` per session.
+    """
+    remaining = np.maximum(1, np.asarray(num_sessions) - np.asarray(completed_sessions))
+    proportional = np.asarray(current_bankroll, dtype=np.float64) / remaining
+    capped = (np.asarray(current_bankroll) > SESSION_CAP_TRIP_BANKROLL) & (proportional > SESSION_BANKROLL_CAP)
+    result = np.where(capped, SESSION_BANKROLL_CAP, proportional)
+    return float(result) if result.ndim == 0 else result
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit.logger  # noqa: E402
+
+# Bare mode: keep Streamlit's "no runtime" warnings out of the test output
+streamlit.logger.set_log_level("error")
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+import catalog_cache
+from catalog_cache import fetch_catalog, read_manifest, snapshot_name
+
+
+def normalize(raw):
+    return raw.rename(columns=str.lower)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "games.csv"
+    path.write_text("Name,RTP\nBuffalo,96.5\n")
+    return path
+
+
+def snapshots(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".npz"))
+
+
+def test_snapshot_is_served_within_max_age(source, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    df, first = fetch_catalog(str(source), normalize, cache_dir=cache_dir)
+    source.write_text("Name,RTP\nBuffalo,90.0\n")
+    cached, second = fetch_catalog(str(source), normalize, cache_dir=cache_dir)
+    assert second == first
+    pd.testing.assert_frame_equal(cached, df)
+
+
+def test_previous_snapshot_is_kept(source, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    hashes = []
+    for rtp in (96.5, 95.0, 94.0):
+        source.write_text(f"Name,RTP\nBuffalo,{rtp}\n")
+        hashes.append(fetch_catalog(str(source), normalize, max_age=0, cache_dir=cache_dir)[1])
+    assert snapshots(cache_dir) == sorted(snapshot_name(h) for h in hashes[1:])
+
+
+def test_load_is_retried_when_the_snapshot_was_replaced(source, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    fetch_catalog(str(source), normalize, cache_dir=cache_dir)
+    read_snapshot, calls = catalog_cache.read_snapshot, []
+
+    def racing_read_snapshot(path, columns=None):
+        if not calls:
+            # Another process publishes a new catalog and removes this snapshot
+            source.write_text("Name,RTP\nBuffalo,91.0\n")
+            fetch_catalog(str(source), normalize, max_age=0, cache_dir=cache_dir)
+            os.unlink(path)
+        calls.append(path)
+        return read_snapshot(path, columns)
+
+    monkeypatch.setattr(catalog_cache, "read_snapshot", racing_read_snapshot)
+    df, content_hash = fetch_catalog(str(source), normalize, cache_dir=cache_dir)
+    assert df["rtp"].tolist() == [91.0]
+    assert content_hash == read_manifest(cache_dir)["content_hash"]
+    assert len(calls) == 2
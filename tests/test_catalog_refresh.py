@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import catalog_refresh
+import shared_catalog
+from catalog_refresh import CatalogRefresher
+from shared_catalog import POINTER_NAME, publish_catalog
+
+
+@pytest.fixture(autouse=True)
+def detached(monkeypatch):
+    # Each test publishes into its own directory; start unattached
+    monkeypatch.setattr(shared_catalog, "_attached", {"stat": None, "pointer": None, "games": None})
+
+
+def make_catalog(version):
+    games = pd.DataFrame({"game_name": ["Game 1", "Game 2"], "rtp": [95.0, 96.0 + version]})
+    games.attrs["catalog_hash"] = f"{version:x}".ljust(64, "0")
+    return games
+
+
+class CountingLoad:
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("catalog unreachable")
+        return make_catalog(self.calls)
+
+
+def age_pointer(directory, seconds):
+    path = os.path.join(directory, POINTER_NAME)
+    with open(path) as f:
+        pointer = json.load(f)
+    pointer["published_at"] -= seconds
+    with open(path, "w") as f:
+        json.dump(pointer, f)
+
+
+def wait_idle(refresher):
+    if refresher._future is not None:
+        try:
+            refresher._future.result(timeout=10)
+        except Exception:
+            pass
+
+
+def test_cold_start_loads_once(tmp_path):
+    load = CountingLoad()
+    refresher = CatalogRefresher(load, ttl=60, directory=str(tmp_path))
+    games = refresher.get()
+    assert load.calls == 1
+    assert games["rtp"].tolist() == [95.0, 97.0]
+    refresher.get()
+    assert load.calls == 1
+
+
+def test_stale_copy_is_served_while_one_refresh_runs(tmp_path):
+    publish_catalog(make_catalog(0), make_catalog(0).attrs["catalog_hash"], str(tmp_path))
+    age_pointer(str(tmp_path), 120)
+    load = CountingLoad(delay=0.2)
+    refresher = CatalogRefresher(load, ttl=60, directory=str(tmp_path))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(refresher.get())) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(games["rtp"].tolist() == [95.0, 96.0] for games in results)
+    wait_idle(refresher)
+    assert load.calls == 1
+    assert refresher.get()["rtp"].tolist() == [95.0, 97.0]
+
+
+def test_failed_refresh_keeps_the_last_good_copy(tmp_path):
+    publish_catalog(make_catalog(0), make_catalog(0).attrs["catalog_hash"], str(tmp_path))
+    age_pointer(str(tmp_path), 120)
+    load = CountingLoad(fail=True)
+    refresher = CatalogRefresher(load, ttl=60, retry_delay=60, directory=str(tmp_path))
+    assert refresher.get()["rtp"].tolist() == [95.0, 96.0]
+    wait_idle(refresher)
+    refresher.get()
+    wait_idle(refresher)
+    assert load.calls == 1  # retry delayed
+    assert refresher.status()["failures"] == 1
+    assert "catalog unreachable" in refresher.status()["last_error"]
+
+
+def test_unpublishable_refresh_serves_private_copy_without_reloading(tmp_path, monkeypatch):
+    publish_catalog(make_catalog(0), make_catalog(0).attrs["catalog_hash"], str(tmp_path))
+    age_pointer(str(tmp_path), 120)
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("read-only file system")
+    monkeypatch.setattr(catalog_refresh, "publish_catalog", read_only)
+
+    load = CountingLoad()
+    refresher = CatalogRefresher(load, ttl=60, retry_delay=0, directory=str(tmp_path))
+    assert refresher.get()["rtp"].tolist() == [95.0, 96.0]
+    wait_idle(refresher)
+    for _ in range(5):
+        games = refresher.get()
+        wait_idle(refresher)
+    assert games["rtp"].tolist() == [95.0, 97.0]
+    assert load.calls == 1
+
+
+@pytest.mark.parametrize("stale", [False, True])
+def test_claim_held_elsewhere_skips_refresh(tmp_path, stale):
+    publish_catalog(make_catalog(0), make_catalog(0).attrs["catalog_hash"], str(tmp_path))
+    age_pointer(str(tmp_path), 120)
+    claim = os.path.join(str(tmp_path), catalog_refresh.CLAIM_NAME)
+    with open(claim, "w") as f:
+        f.write("12345")
+    if stale:
+        old = time.time() - catalog_refresh.CLAIM_TIMEOUT - 1
+        os.utime(claim, (old, old))
+    load = CountingLoad()
+    refresher = CatalogRefresher(load, ttl=60, directory=str(tmp_path))
+    refresher.get()
+    wait_idle(refresher)
+    assert load.calls == (1 if stale else 0)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import catalog_cache
+import data_loader
+from catalog_cache import RAW_BYTES_ATTR
+
+CSV = """Game Name,RTP,minbet,app,Vol,bonus_freq,Category,Tips,Extra Notes
+Buffalo,96.5,0.4,4.5,,0.2,Slot,Chase the stampede,long unused column text
+Buffalo,94.0,1,2,3,0.1,Slot,Different machine,long unused column text
+Double Diamond,95.1,1,,5,0.05,Slot,,long unused column text
+Broken,,1,3,3,0.1,Slot,x,long unused column text
+"""
+
+
+@pytest.fixture
+def catalog_url(tmp_path, monkeypatch):
+    path = tmp_path / "games.csv"
+    path.write_text(CSV)
+    monkeypatch.setattr(catalog_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(data_loader, "CATALOG_URL", str(path))
+    monkeypatch.delenv("PROFIT_HOPPER_CATALOG_SOURCES", raising=False)
+    data_loader.load_game_tips.clear()
+    return str(path)
+
+
+def test_normalize_applies_aliases_and_drops_rows_without_rtp(catalog_url):
+    df = data_loader.normalize_game_data(pd.read_csv(catalog_url))
+    assert list(df.columns) == data_loader.CATALOG_COLUMNS
+    assert df["game_name"].tolist() == ["Buffalo", "Buffalo", "Double Diamond"]
+    assert df["min_bet"].tolist() == [0.4, 1.0, 1.0]
+
+
+def test_missing_required_columns():
+    with pytest.raises(data_loader.MissingColumnsError, match="min_bet"):
+        data_loader.normalize_game_data(pd.DataFrame({"rtp": [95.0]}))
+
+
+def test_compaction_keeps_fractional_ratings_and_fills_missing_with_neutral(catalog_url):
+    games = data_loader.read_game_data(catalog_url)
+    assert games["advantage_play_potential"].tolist() == [4.5, 2.0, 3.0]
+    assert games["volatility"].tolist() == [3.0, 3.0, 5.0]
+    assert games["rtp"].dtype == np.float32
+    assert "tips" not in games.columns
+
+
+def test_bytes_per_game_before_is_the_raw_csv(catalog_url):
+    raw = pd.read_csv(catalog_url)
+    games = data_loader.read_game_data(catalog_url)
+    expected = raw.memory_usage(index=True, deep=True).sum() / len(raw)
+    assert games.attrs["bytes_per_game"]["before"] == pytest.approx(expected)
+    # Served from the snapshot the second time; the raw size comes from the manifest
+    games = data_loader.read_game_data(catalog_url)
+    assert games.attrs["bytes_per_game"]["before"] == pytest.approx(expected)
+
+
+def test_tips_are_kept_per_row_for_duplicate_names(catalog_url):
+    games = data_loader.read_game_data(catalog_url)
+    assert [data_loader.get_game_tip(games, row) for row in range(3)] == [
+        "Chase the stampede", "Different machine", "No tips available"]
+
+
+def test_tips_of_another_catalog_version_are_not_served(catalog_url):
+    games = data_loader.read_game_data(catalog_url)
+    games.attrs[data_loader.CATALOG_HASH_ATTR] = "0" * 64
+    assert data_loader.get_game_tip(games, 0) == "No tips available"
+
+
+def test_fetch_catalog_reports_raw_size(catalog_url, tmp_path):
+    df, _ = catalog_cache.fetch_catalog(catalog_url, data_loader.normalize_game_data,
+                                        cache_dir=str(tmp_path / "other"))
+    assert df.attrs[RAW_BYTES_ATTR] > 0
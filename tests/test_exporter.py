@@ -0,0 +1,105 @@
+import gzip
+import io
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+from streamlit.runtime.media_file_manager import convert_data_to_bytes_and_infer_mime
+
+import exporter
+from session_log import SessionLog
+from session_store import SessionStore, session_row
+
+
+def make_session(trip_id, date, profit=10.0):
+    return {"trip_id": trip_id, "date": date, "casino": "Delta Downs", "game": "Game 1",
+            "money_in": 20.0, "money_out": 20.0 + profit, "profit": profit, "notes": ""}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(exporter, "get_session_store", lambda: store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def unavailable_store(monkeypatch):
+    def fail():
+        raise sqlite3.OperationalError("unable to open database file")
+    monkeypatch.setattr(exporter, "get_session_store", fail)
+
+
+def download_bytes(data):
+    # What st.download_button does with the callable's result
+    content, _ = convert_data_to_bytes_and_infer_mime(data, unsupported_error=TypeError(type(data)))
+    return content
+
+
+@pytest.mark.parametrize("fmt", exporter.available_formats())
+def test_export_is_accepted_by_download_button(store, fmt):
+    store.write_batch([session_row("user", make_session(1, "2024-01-02"))], [])
+    content = download_bytes(exporter.export_sessions("user", fmt))
+    assert content
+    if fmt == "csv":
+        assert pd.read_csv(io.BytesIO(content))["date"].tolist() == ["2024-01-02"]
+    elif fmt == "csv.gz":
+        assert b"2024-01-02" in gzip.decompress(content)
+    elif fmt == "jsonl":
+        assert json.loads(content.splitlines()[0])["trip_id"] == 1
+
+
+def test_export_filters_trip_and_dates(store):
+    sessions = [make_session(1, "2024-01-02"), make_session(1, "2024-02-02"), make_session(2, "2024-01-05")]
+    store.write_batch([session_row("user", s) for s in sessions], [])
+    content = download_bytes(exporter.export_sessions("user", "csv", trip_id=1, end_date="2024-01-31"))
+    exported = pd.read_csv(io.BytesIO(content))
+    assert exported[["trip_id", "date"]].values.tolist() == [[1, "2024-01-02"]]
+
+
+def test_empty_export_has_header(store):
+    content = download_bytes(exporter.export_sessions("nobody", "csv"))
+    assert content.decode().strip() == ",".join(exporter.SESSION_FIELDS)
+
+
+def test_falls_back_to_session_log(unavailable_store):
+    log = SessionLog([make_session(1, "2024-01-02"), make_session(1, "2024-01-09"),
+                      make_session(2, "2024-01-03")])
+    content = download_bytes(exporter.export_sessions("user", "csv", trip_id=1, start_date="2024-01-05",
+                                                      session_log=log))
+    exported = pd.read_csv(io.BytesIO(content))
+    assert exported[["trip_id", "date"]].values.tolist() == [[1, "2024-01-09"]]
+
+
+def test_unavailable_store_without_log_exports_header(unavailable_store):
+    content = download_bytes(exporter.export_sessions("user", "csv"))
+    assert content.decode().strip() == ",".join(exporter.SESSION_FIELDS)
+
+
+def test_parquet_schema_is_fixed_across_chunks():
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    # Whole-number amounts and no notes in the first chunk
+    first = pd.DataFrame([make_session(1, "2024-01-02")] * 2).assign(notes=None, money_in=20, money_out=30,
+                                                                     profit=10)
+    second = pd.DataFrame([dict(make_session(2, "2024-01-03"), money_in=1.5, notes="cold machine")])
+    out = io.BytesIO()
+    assert exporter.write_export([first, second], "parquet", out) == 3
+    out.seek(0)
+    table = pq.read_table(out)
+    assert table.schema == exporter.parquet_schema()
+    assert table.column("notes").to_pylist() == [None, None, "cold machine"]
+    assert table.column("money_in").to_pylist() == [20.0, 20.0, 1.5]
+
+
+def test_empty_parquet_export_has_schema():
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    out = io.BytesIO()
+    assert exporter.write_export([], "parquet", out) == 0
+    out.seek(0)
+    assert pq.read_table(out).schema == exporter.parquet_schema()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filter_index import ALL, ADVANTAGE_BUCKETS, VOLATILITY_BUCKETS, build_filter_index
+
+
+@pytest.fixture(scope="module")
+def games():
+    rng = np.random.default_rng(11)
+    n = 2000
+    return pd.DataFrame({
+        "game_name": [f"Game {i % 1900}" for i in range(n)],  # some duplicate names
+        "type": rng.choice(["Slot", "Video Poker", "Table"], size=n),
+        "rtp": rng.choice(np.round(np.linspace(85, 99.9, 60), 2), size=n).astype(np.float32),
+        "min_bet": rng.choice([0.01, 0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 100], size=n).astype(np.float32),
+        "advantage_play_potential": rng.integers(1, 6, size=n).astype(np.int8),
+        "volatility": rng.integers(1, 6, size=n).astype(np.int8),
+        "casinos": pd.Categorical(rng.choice(["", "Delta Downs", "L'Auberge", "Delta Downs|L'Auberge"], size=n)),
+    })
+
+
+def brute_force(games, max_min_bet, min_rtp, game_type=ALL, advantage=ALL, volatility=ALL, exclude=(),
+                casino=None):
+    # Same comparisons as the index: the limits are cast to the column dtypes
+    mask = games["min_bet"].to_numpy() <= np.float32(max_min_bet)
+    mask &= games["rtp"].to_numpy() >= np.float32(min_rtp)
+    if game_type != ALL:
+        mask &= games["type"].to_numpy() == game_type
+    for choice, buckets, col in ((advantage, ADVANTAGE_BUCKETS, "advantage_play_potential"),
+                                 (volatility, VOLATILITY_BUCKETS, "volatility")):
+        if choice != ALL:
+            low, high = buckets[choice]
+            mask &= games[col].between(low, high).to_numpy()
+    if casino is not None:
+        mask &= games["casinos"].astype(str).str.split("|").apply(lambda listed: casino in listed).to_numpy()
+    mask &= ~games["game_name"].isin(list(exclude)).to_numpy()
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize("max_min_bet, min_rtp", [
+    (np.inf, -np.inf),   # everything
+    (25.0, 92.0),        # dense path
+    (0.1, 85.0),         # selective min bet
+    (100.0, 99.5),       # selective RTP
+    (0.01, 99.9),        # both selective
+    (0.0, 85.0),         # nothing
+])
+@pytest.mark.parametrize("filters", [
+    {},
+    {"game_type": "Slot"},
+    {"advantage": "High (4-5)", "volatility": "Low (1-2)"},
+    {"game_type": "Table", "exclude": ("Game 3", "Game 1500", "Missing")},
+    {"casino": "Delta Downs"},
+])
+def test_query_matches_brute_force(games, max_min_bet, min_rtp, filters):
+    index = build_filter_index(games)
+    exclude = filters.get("exclude", ())
+    kwargs = {key: value for key, value in filters.items() if key != "exclude"}
+    rows = index.query(max_min_bet, min_rtp, exclude_names=exclude, **kwargs)
+    np.testing.assert_array_equal(rows, brute_force(games, max_min_bet, min_rtp, exclude=exclude, **kwargs))
+
+
+def test_float32_boundaries_are_inclusive():
+    games = pd.DataFrame({
+        "game_name": ["a", "b", "c"],
+        "type": ["Slot"] * 3,
+        "rtp": np.array([92.1, 92.3, 95.0], dtype=np.float32),
+        "min_bet": np.array([0.3, 0.25, 1.0], dtype=np.float32),
+        "advantage_play_potential": np.array([3, 3, 3], dtype=np.int8),
+        "volatility": np.array([3, 3, 3], dtype=np.int8),
+    })
+    index = build_filter_index(games)
+    # 0.3 and 92.3 aren't exact in float32; the slider values still match them
+    assert index.query(0.3, 92.1).tolist() == [0, 1]
+    assert index.query(0.25, 92.1).tolist() == [1]
+    assert index.query(1.0, 92.3).tolist() == [1, 2]
+
+
+def test_unknown_label_matches_nothing(games):
+    index = build_filter_index(games)
+    assert index.query(np.inf, -np.inf, game_type="Keno").size == 0
+
+
+def test_casino_without_list_is_not_filtered(games):
+    index = build_filter_index(games)
+    np.testing.assert_array_equal(index.query(25.0, 92.0, casino="Elsewhere"), index.query(25.0, 92.0))
+
+
+def test_range_bitsets_are_cached_and_bounded(games):
+    index = build_filter_index(games)
+    first = index.query(25.0, 90.0)
+    cached = len(index._range_bits)
+    np.testing.assert_array_equal(index.query(25.0, 90.0), first)
+    assert len(index._range_bits) == cached
+    for limit in np.linspace(85.0, 88.0, 200):
+        index.query(100.0, limit)
+    assert len(index._range_bits) <= 64
+
+
+def test_name_positions_cover_duplicates(games):
+    index = build_filter_index(games)
+    assert index.name_positions["Game 5"].tolist() == [5, 1905]
+
+
+def test_fractional_ratings_use_the_rounded_bucket():
+    games = pd.DataFrame({
+        "game_name": ["a", "b", "c"],
+        "type": ["Slot"] * 3,
+        "rtp": np.array([95.0, 95.0, 95.0], dtype=np.float32),
+        "min_bet": np.array([1.0, 1.0, 1.0], dtype=np.float32),
+        "advantage_play_potential": np.array([3.6, 3.2, 1.4], dtype=np.float32),
+        "volatility": np.array([2.4, 4.5, 5.0], dtype=np.float32),
+    })
+    index = build_filter_index(games)
+    assert index.query(np.inf, -np.inf, advantage="High (4-5)").tolist() == [0]
+    assert index.query(np.inf, -np.inf, advantage="Medium (3)").tolist() == [1]
+    assert index.query(np.inf, -np.inf, volatility="Low (1-2)").tolist() == [0]
+    assert index.query(np.inf, -np.inf, volatility="High (4-5)").tolist() == [1, 2]
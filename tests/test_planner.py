@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import planner
+from planner import Catalog, plan_profiles, read_profiles
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    rng = np.random.default_rng(3)
+    n = 400
+    return Catalog(pd.DataFrame({
+        "game_name": [f"Game {i}" for i in range(n)],
+        "type": rng.choice(["Slot", "Video Poker"], size=n),
+        "rtp": rng.uniform(85, 99, size=n).astype(np.float32),
+        "min_bet": rng.choice([0.01, 0.25, 1, 5, 25], size=n).astype(np.float32),
+        "advantage_play_potential": rng.integers(1, 6, size=n).astype(np.float32),
+        "volatility": rng.integers(1, 6, size=n).astype(np.float32),
+        "bonus_frequency": rng.uniform(0, 1, size=n).astype(np.float32),
+    }))
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    path = tmp_path / "profiles.jsonl"
+    path.write_text('{"id": "a", "bankroll": 500}\n\n'
+                    '{"id": "b", "bankroll": 2000, "type": "Slot", "exclude": "Game 1|Game 2"}\n'
+                    '{"id": "c", "bankroll": 80, "sessions": 4, "rtp": 97}\n')
+    return read_profiles(str(path))
+
+
+def test_read_profiles_fills_defaults(profiles):
+    assert profiles["id"].tolist() == ["a", "b", "c"]
+    assert profiles["num_sessions"].tolist() == [10, 10, 4]
+    assert profiles["min_rtp"].tolist() == [92.0, 92.0, 97.0]
+
+
+def test_read_profiles_rejects_non_objects(tmp_path):
+    path = tmp_path / "broken.jsonl"
+    path.write_text('{"bankroll": 1}\n[1, 2]\n')
+    with pytest.raises(ValueError, match="JSON object"):
+        read_profiles(str(path))
+
+
+def test_plans_respect_filters(catalog, profiles):
+    plans = list(plan_profiles(catalog, profiles))
+    assert [plan["id"] for plan in plans] == ["a", "b", "c"]
+    games = catalog.game_df.set_index("game_name")
+    for plan, profile in zip(plans, profiles.itertuples()):
+        order = plan["play_order"]
+        assert len(order) == min(profile.num_sessions, plan["eligible_games"])
+        assert all(games.loc[game["game_name"], "rtp"] >= np.float32(profile.min_rtp) for game in order)
+        assert all(game["min_bet"] <= plan["strategy"]["max_bet"] for game in order)
+    assert {game["type"] for game in plans[1]["play_order"]} == {"Slot"}
+    assert not {"Game 1", "Game 2"} & {game["game_name"] for game in plans[1]["play_order"]}
+
+
+def test_batch_size_is_capped_by_catalog_size(catalog, profiles, monkeypatch):
+    expected = list(plan_profiles(catalog, profiles, batch_size=256))
+    plan_batch, batches = planner.plan_batch, []
+
+    def recording_plan_batch(catalog, batch):
+        batches.append(len(batch))
+        return plan_batch(catalog, batch)
+
+    monkeypatch.setattr(planner, "MAX_BATCH_CELLS", len(catalog) * 2)
+    monkeypatch.setattr(planner, "plan_batch", recording_plan_batch)
+    assert list(plan_profiles(catalog, profiles, batch_size=256)) == expected
+    assert batches == [2, 1]
+
+
+def test_blank_ids_default_to_the_row_number(catalog, tmp_path):
+    path = tmp_path / "profiles.jsonl"
+    path.write_text('{"id": "a", "bankroll": 500}\n{"bankroll": 300}\n{"id": "", "bankroll": 100}\n')
+    profiles = read_profiles(str(path))
+    assert profiles["id"].tolist() == ["a", 2, 3]
+    assert [plan["id"] for plan in plan_profiles(catalog, profiles)] == ["a", 2, 3]
+
+
+def test_csv_blank_ids_default_to_the_row_number(catalog, tmp_path):
+    path = tmp_path / "profiles.csv"
+    path.write_text("id,bankroll\n7,500\n,300\n")
+    profiles = read_profiles(str(path))
+    assert [plan["id"] for plan in plan_profiles(catalog, profiles)] == ["7", 2]
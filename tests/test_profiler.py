@@ -0,0 +1,59 @@
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+import profiler
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "LOG_PATH", str(tmp_path / "profile_log.json"))
+    monkeypatch.delenv(profiler.ENV_VAR, raising=False)
+    monkeypatch.delenv(profiler.KEY_ENV_VAR, raising=False)
+    yield
+    profiler._abandon_rerun()
+
+
+def with_query(monkeypatch, **params):
+    monkeypatch.setattr(profiler, "st", SimpleNamespace(query_params=params))
+
+
+def test_query_param_is_ignored_without_a_key(monkeypatch):
+    with_query(monkeypatch, profile="memory")
+    assert profiler.profiling_mode() is None
+    assert profiler.start_rerun() is None
+
+
+def test_query_param_needs_the_matching_key(monkeypatch):
+    monkeypatch.setenv(profiler.KEY_ENV_VAR, "s3cret")
+    with_query(monkeypatch, profile="cprofile", profile_key="guess")
+    assert profiler.profiling_mode() is None
+    with_query(monkeypatch, profile="cprofile", profile_key="s3cret")
+    assert profiler.profiling_mode() == "cprofile"
+
+
+def test_env_var_enables_profiling_for_everyone(monkeypatch):
+    monkeypatch.setenv(profiler.ENV_VAR, "1")
+    with_query(monkeypatch)
+    assert profiler.profiling_mode() == "time"
+
+
+def test_tracemalloc_stops_after_the_last_memory_rerun():
+    assert not tracemalloc.is_tracing()
+    profiler.start_rerun(mode="memory")
+    with profiler.stage("work"):
+        data = [0] * 1000
+    assert tracemalloc.is_tracing()
+    profile = profiler.finish_rerun()
+    assert profile.peak_kb is not None and profile.stages[0].alloc_kb is not None
+    assert not tracemalloc.is_tracing()
+    del data
+
+
+def test_abandoned_memory_rerun_releases_tracemalloc():
+    profiler.start_rerun(mode="memory")
+    assert tracemalloc.is_tracing()
+    # The next run on this thread starts without finishing the cut-short one
+    assert profiler.start_rerun() is None
+    assert not tracemalloc.is_tracing()
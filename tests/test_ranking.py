@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from ranking import RankedCandidates, Ranking, RankingCache, ranking_key
+
+
+def full_ranking(rows, scores, removed=()):
+    keep = ~np.isin(rows, list(removed))
+    rows, scores = rows[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order]
+
+
+@pytest.fixture
+def candidates_data():
+    rng = np.random.default_rng(3)
+    rows = np.sort(rng.choice(500, size=120, replace=False))
+    scores = rng.integers(0, 20, size=120).astype(float)  # plenty of ties
+    return rows, scores
+
+
+@pytest.mark.parametrize("ranked", [False, True])
+def test_removal_promotes_next_best(candidates_data, ranked):
+    rows, scores = candidates_data
+    if ranked:
+        order = np.argsort(-scores, kind="stable")
+        candidates = RankedCandidates(rows[order], scores[order], size=10, refill=4, ranked=True)
+    else:
+        candidates = RankedCandidates(rows, scores, size=10, refill=4)
+    np.testing.assert_array_equal(candidates.rows, full_ranking(rows, scores)[:10])
+
+    rng = np.random.default_rng(5)
+    removed = set()
+    for row in rng.choice(rows, size=60, replace=False):
+        candidates.remove(row)
+        removed.add(int(row))
+        np.testing.assert_array_equal(candidates.rows, full_ranking(rows, scores, removed)[:10])
+        assert len(candidates) == len(rows) - len(removed)
+
+
+def test_scores_follow_rows(candidates_data):
+    rows, scores = candidates_data
+    candidates = RankedCandidates(rows, scores, size=5)
+    candidates.remove(candidates.rows[0])
+    lookup = dict(zip(rows.tolist(), scores.tolist()))
+    assert candidates.scores.tolist() == [lookup[row] for row in candidates.rows.tolist()]
+
+
+def test_rows_outside_the_candidates_are_ignored():
+    candidates = RankedCandidates(np.array([2, 5, 9]), np.array([1.0, 3.0, 2.0]), size=2)
+    for row in (0, 4, 11):
+        candidates.remove(row)
+    assert len(candidates) == 3
+    assert candidates.rows.tolist() == [5, 9]
+    assert 4 not in candidates and 5 in candidates
+
+
+def test_exclude_names_only_counts_candidates():
+    candidates = RankedCandidates(np.array([0, 1, 2]), np.array([1.0, 2.0, 3.0]), size=2)
+    name_positions = {"a": np.array([0]), "x": np.array([7]), "y": np.array([8, 9])}
+    candidates.exclude_names({"x", "y"}, name_positions)
+    assert len(candidates) == 3
+    candidates.exclude_names({"x", "y", "a"}, name_positions)
+    assert len(candidates) == 2
+    assert candidates.rows.tolist() == [2, 1]
+    assert candidates.remaining_rows().tolist() == [1, 2]
+
+
+def test_removing_every_candidate_empties_the_block():
+    candidates = RankedCandidates(np.array([3, 4]), np.array([1.0, 2.0]), size=1)
+    candidates.remove(4)
+    assert candidates.rows.tolist() == [3]
+    candidates.remove(3)
+    assert len(candidates) == 0
+    assert candidates.rows.tolist() == []
+
+
+def test_ranking_cache_lru():
+    cache = RankingCache(2)
+    make = lambda: Ranking(np.arange(3), np.zeros(3))  # noqa: E731
+    for key in ("a", "b", "a", "c"):
+        cache.get_or_compute(key, make)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (1, 3, 1, 2)
+    cache.get_or_compute("b", make)
+    assert cache.stats()["misses"] == 4  # "b" was the least recently used
+
+
+
+class FakeIndex:
+    class Column:
+        def __init__(self, values):
+            self.values = np.sort(values)
+
+        def at_most(self, limit):
+            return self.values[self.values <= limit]
+
+        def at_least(self, limit):
+            return self.values[self.values >= limit]
+
+    def __init__(self):
+        self.min_bet = self.Column(np.array([0.5, 1.0, 5.0]))
+        self.rtp = self.Column(np.array([90.0, 95.0]))
+        self.casino_bits = {"Delta Downs": np.array([1], dtype=np.uint8)}
+
+
+def test_ranking_key_shares_slider_values_between_catalog_values():
+    index = FakeIndex()
+    key = ranking_key(index, "hash", 2.0, 91.0, "All", "All", "All", "Cash", 100.0)
+    assert key == ranking_key(index, "hash", 4.99, 95.0, "All", "All", "All", "cash", 100.0)
+    assert key != ranking_key(index, "hash", 5.0, 95.0, "All", "All", "All", "cash", 100.0)
+
+
+def test_ranking_key_keeps_the_exact_session_bankroll():
+    # Rounding $147 down to $140 would lower the max bet and penalize games
+    # with min bets between the two thresholds
+    index = FakeIndex()
+    assert (ranking_key(index, "hash", 5.0, 90.0, "All", "All", "All", "", 147.0)
+            != ranking_key(index, "hash", 5.0, 90.0, "All", "All", "All", "", 140.0))
+
+
+def test_ranking_key_only_includes_casinos_with_lists():
+    index = FakeIndex()
+    args = (index, "hash", 5.0, 90.0, "All", "All", "All", "", 50.0)
+    assert ranking_key(*args, casino="Elsewhere") == ranking_key(*args)
+    assert ranking_key(*args, casino="Delta Downs") != ranking_key(*args)
+
+
+def test_nan_scores_are_promoted_last():
+    scores = np.array([np.nan, 4.0, np.nan, 2.0, 3.0, np.nan, 1.0])
+    ranked = RankedCandidates(np.arange(7), scores, size=2, refill=2)
+    assert ranked.rows.tolist() == [1, 4]
+    promoted = []
+    for _ in range(5):
+        ranked.remove(ranked.rows[0])
+        promoted.append(int(ranked.rows[-1]))
+    assert promoted == [3, 6, 0, 2, 5]
+    assert np.isnan(ranked.scores[-1])
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import build_game_features, rank_games, rank_order, score_games, score_matrix
+
+
+def reference_order(scores):
+    return np.argsort(-scores, kind="stable")
+
+
+@pytest.mark.parametrize("limit", [1, 3, 5, 8, 10, None])
+def test_rank_order_matches_stable_sort_with_ties(limit):
+    scores = np.array([5.0, 7.0, 5.0, 9.0, 7.0, 5.0, 1.0, 7.0, 5.0, 9.0])
+    expected = reference_order(scores)[:limit]
+    np.testing.assert_array_equal(rank_order(scores, limit), expected)
+
+
+def test_rank_order_ties_at_the_cutoff_keep_earliest_positions():
+    scores = np.array([1.0, 2.0, 2.0, 2.0, 2.0, 0.0])
+    np.testing.assert_array_equal(rank_order(scores, 2), [1, 2])
+
+
+def test_rank_order_random_ties_match_full_sort():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        scores = rng.integers(0, 5, size=40).astype(float)
+        limit = int(rng.integers(1, 40))
+        np.testing.assert_array_equal(rank_order(scores, limit), reference_order(scores)[:limit])
+
+
+def test_rank_order_rows_of_a_matrix():
+    scores = np.array([[1.0, 3.0, 3.0, 2.0], [4.0, 4.0, 0.0, 4.0]])
+    np.testing.assert_array_equal(rank_order(scores, 2), [[1, 2], [0, 1]])
+
+
+def test_rank_order_empty_limit():
+    assert rank_order(np.array([1.0, 2.0]), 0).shape == (0,)
+
+
+@pytest.fixture
+def features():
+    games = pd.DataFrame({
+        "rtp": [96.0, 92.0, 98.0, 94.0],
+        "bonus_frequency": [0.2, 0.4, 0.1, 0.3],
+        "advantage_play_potential": [3, 5, 2, 4],
+        "volatility": [3, 5, 1, 2],
+        "min_bet": [0.5, 5.0, 1.0, 20.0],
+    })
+    return build_game_features(games)
+
+
+def test_score_matrix_rows_match_score_games(features):
+    bankrolls, max_bets, types = [15.0, 60.0, 300.0], [0.75, 7.5, 45.0], ["Conservative", "Moderate", "Aggressive"]
+    matrix = score_matrix(features, bankrolls, max_bets, types)
+    for i in range(3):
+        np.testing.assert_allclose(matrix[i], score_games(features, bankrolls[i], max_bets[i], types[i]))
+
+
+def test_rank_games_returns_rows_best_first(features):
+    rows, scores = rank_games(features, 60.0, 7.5, "Moderate", rows=np.array([0, 1, 3]), limit=2)
+    assert set(rows) <= {0, 1, 3}
+    assert len(rows) == 2
+    assert scores[0] >= scores[1]
+
+
+def test_rank_order_puts_nan_last():
+    scores = np.array([np.nan, 3.0, np.nan, 5.0, 3.0, np.nan])
+    for limit in range(1, 7):
+        np.testing.assert_array_equal(rank_order(scores, limit), reference_order(scores)[:limit])
+
+
+def test_rank_order_rows_with_fewer_valid_scores_than_limit():
+    scores = np.full((18, 40), np.nan)
+    scores[::2, :5] = np.arange(5.0)
+    order = rank_order(scores, 30)
+    assert order.shape == (18, 30)
+    for row, expected in zip(order, scores):
+        np.testing.assert_array_equal(row, reference_order(expected)[:30])
+
+
+def test_rank_games_with_missing_bonus_frequency():
+    games = pd.DataFrame({
+        "rtp": [96.0, 92.0, 98.0, 94.0],
+        "bonus_frequency": [np.nan, 0.4, np.nan, 0.3],
+        "advantage_play_potential": [3, 5, 2, 4],
+        "volatility": [3, 5, 1, 2],
+        "min_bet": [0.5, 1.0, 1.0, 2.0],
+    })
+    features = build_game_features(games)
+    rows, scores = rank_games(features, 100.0, 5.0, "Moderate", limit=3)
+    full_rows, _ = rank_games(features, 100.0, 5.0, "Moderate")
+    np.testing.assert_array_equal(rows, full_rows[:3])
+    assert sorted(rows[:2].tolist()) == [1, 3]
+    assert np.isnan(scores[-1])
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from search_index import build_search_index
+
+
+@pytest.fixture(scope="module")
+def index():
+    names = ["Buffalo Gold", "Cleopatra", "Buffalo Grand", "Double Diamond", "Triple Diamond",
+             "Lightning Link", "Dragon Link", "Golden Dragon", "buffalo", "Quick Hit"]
+    return build_search_index(pd.DataFrame({"game_name": names}))
+
+
+def brute_force(index, query):
+    return [i for i, name in enumerate(index.names) if query.lower() in name]
+
+
+@pytest.mark.parametrize("query", ["b", "BU", "fal", "Buffalo", "buffalo g", "diamond", "link", "dragon",
+                                   "on li", "xyz", "gold dragon", "Quick Hits"])
+def test_search_matches_substring_scan(index, query):
+    assert index.search(query).tolist() == brute_force(index, query)
+
+
+def test_search_checks_trigram_contiguity():
+    # Shares every trigram of "abcab" without containing it
+    index = build_search_index(pd.DataFrame({"game_name": ["abc cab bca", "abcab"]}))
+    assert index.search("abcab").tolist() == [1]
+
+
+def test_empty_query_matches_everything(index):
+    assert index.search("").tolist() == list(range(len(index)))
+
+
+def test_fuzzy_ranks_by_similarity(index):
+    rows = index.fuzzy("bufalo gold")
+    assert rows[0] == 0
+    assert set(rows[:3].tolist()) >= {0}
+    assert 1 not in rows.tolist()
+
+
+def test_fuzzy_no_shared_trigrams(index):
+    assert index.fuzzy("zzzz").size == 0
+
+
+def test_fuzzy_is_limited_to_the_given_rows(index):
+    assert index.fuzzy("double diamnd", limit=1).tolist() == [3]
+    # Top match filtered out: the next best among the allowed rows is returned
+    assert index.fuzzy("double diamnd", limit=1, rows=np.array([4, 5, 6])).tolist() == [4]
+    assert index.fuzzy("double diamnd", rows=np.array([0, 1])).size == 0
@@ -0,0 +1,78 @@
+import io
+
+import pandas as pd
+
+from session_import import read_jsonl, read_session_file, validate_sessions
+from session_store import SESSION_FIELDS
+
+
+def read_csv(text):
+    return read_session_file(io.StringIO(text), name="sessions.csv")
+
+
+def test_valid_rows_become_sessions():
+    df = read_csv("Date,Game Name,Buy In,Cash Out,Trip\n2024-01-02,Game 1,20,35,2\n03/04/2024,Game 2,10,0,\n")
+    result = validate_sessions(df, default_trip_id=1, default_casino="Delta Downs")
+    assert result.ok
+    assert list(result.sessions.columns) == list(SESSION_FIELDS) + ["line"]
+    assert result.sessions["date"].tolist() == ["2024-01-02", "2024-03-04"]
+    assert result.sessions["trip_id"].tolist() == [2, 1]
+    assert result.sessions["profit"].tolist() == [15.0, -10.0]
+    assert result.sessions["casino"].tolist() == ["Delta Downs", "Delta Downs"]
+    assert result.sessions["line"].tolist() == [2, 3]
+
+
+def test_errors_are_reported_per_line():
+    df = read_csv("date,game,money_in,money_out,trip_id\n"
+                  "2024-01-02,Game 1,20,35,1\n"
+                  "not a date,Game 1,20,35,1\n"
+                  "2024-01-02,,-5,abc,1\n"
+                  "2024-01-02,Game 1,20,35,0\n")
+    result = validate_sessions(df, default_trip_id=1, default_casino="")
+    assert result.sessions["line"].tolist() == [2]
+    errors = dict(zip(result.errors["line"], result.errors["error"]))
+    assert errors[3] == "invalid date"
+    assert errors[4] == "money_in is negative; money_out is not a number; game is empty"
+    assert errors[5] == "invalid trip_id"
+
+
+def test_unknown_games_are_rejected_when_known_games_given():
+    df = read_csv("date,game,money_in,money_out\n2024-01-02,Game 1,20,35\n2024-01-02,Nope,20,35\n")
+    result = validate_sessions(df, 1, "", known_games={"Game 1"})
+    assert result.errors.to_dict("records") == [{"line": 3, "error": "unknown game"}]
+
+
+def test_missing_columns():
+    result = validate_sessions(read_csv("date,game\n2024-01-02,Game 1\n"), 1, "")
+    assert not result.ok
+    assert result.sessions.empty
+    assert result.errors["error"].iloc[0] == "Missing required columns: money_in, money_out"
+
+
+def test_jsonl_reports_broken_lines():
+    text = ('{"date": "2024-01-02", "game": "Game 1", "money_in": 20, "money_out": 30}\n'
+            "\n"
+            "{broken\n")
+    df = read_session_file(io.StringIO(text), name="sessions.jsonl")
+    result = validate_sessions(df, 1, "")
+    assert result.sessions["line"].tolist() == [1]
+    assert result.errors.to_dict("records") == [{"line": 3, "error": "not a JSON object"}]
+
+
+def test_trip_totals():
+    df = read_csv("date,game,money_in,money_out,trip_id,casino\n"
+                  "2024-01-02,Game 1,20,35,1,A\n"
+                  "2024-01-05,Game 2,20,10,1,B\n"
+                  "2024-01-03,Game 3,50,50,2,C\n")
+    totals = validate_sessions(df, 1, "").trip_totals
+    assert totals.loc[1, "sessions"] == 2
+    assert totals.loc[1, "profit"] == 5.0
+    assert totals.loc[1, "last_date"] == "2024-01-05"
+    assert totals.loc[2, "casino"] == "C"
+    assert isinstance(totals, pd.DataFrame)
+
+
+def test_read_jsonl_marks_lines_that_are_not_objects():
+    df = read_jsonl('{"a": 1}\n\n[1, 2]\n3\n')
+    assert df["line"].tolist() == [1, 3, 4]
+    assert df["_invalid"].fillna(False).tolist() == [False, True, True]
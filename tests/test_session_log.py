@@ -0,0 +1,98 @@
+from session_log import SessionLog, TripBlock
+
+
+def make_session(date, trip_id=1, game="Game 1", profit=0.0):
+    return {"trip_id": trip_id, "date": date, "casino": "Delta Downs", "game": game,
+            "money_in": 20.0, "money_out": 20.0 + profit, "profit": profit, "notes": ""}
+
+
+def dates(rows):
+    return [row["date"] for row in rows]
+
+
+def test_insert_keeps_date_order():
+    block = TripBlock()
+    for date in ["2024-02-01", "2024-01-01", "2024-03-01", "2024-01-15"]:
+        block.insert(make_session(date))
+    assert block.columns["date"] == ["2024-01-01", "2024-01-15", "2024-02-01", "2024-03-01"]
+
+
+def test_insert_same_date_keeps_insertion_order():
+    block = TripBlock()
+    for game in ["first", "second", "third"]:
+        block.insert(make_session("2024-01-01", game=game))
+    assert block.columns["game"] == ["first", "second", "third"]
+
+
+def test_insert_many_sorts_unsorted_import_into_empty_block():
+    block = TripBlock()
+    block.insert_many([make_session("2024-03-05"), make_session("2024-01-01"), make_session("2024-02-01")])
+    assert block.columns["date"] == ["2024-01-01", "2024-02-01", "2024-03-05"]
+
+
+def test_insert_many_sorts_against_existing_sessions():
+    block = TripBlock()
+    block.insert_many([make_session("2024-01-10"), make_session("2024-01-20")])
+    block.insert_many([make_session("2024-01-25"), make_session("2024-01-15")])
+    assert block.columns["date"] == ["2024-01-10", "2024-01-15", "2024-01-20", "2024-01-25"]
+
+
+def test_insert_many_is_stable_and_aligns_columns():
+    block = TripBlock()
+    block.insert(make_session("2024-01-02", game="existing"))
+    block.insert_many([make_session("2024-01-03", game="c"), make_session("2024-01-02", game="b"),
+                       make_session("2024-01-01", game="a")])
+    assert block.columns["game"] == ["a", "existing", "b", "c"]
+    assert block.columns["date"] == ["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03"]
+
+
+def test_insert_after_insert_many_bisects_correctly():
+    block = TripBlock()
+    block.insert_many([make_session("2024-03-05"), make_session("2024-01-01")])
+    block.insert(make_session("2024-02-01"))
+    assert block.columns["date"] == ["2024-01-01", "2024-02-01", "2024-03-05"]
+
+
+def test_descending_rows():
+    block = TripBlock()
+    block.insert_many([make_session("2024-01-01"), make_session("2024-01-03"), make_session("2024-01-02")])
+    assert dates(block.rows(descending=True)) == ["2024-01-03", "2024-01-02", "2024-01-01"]
+    assert dates(block.rows()) == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+
+def test_session_log_partitions_by_trip():
+    log = SessionLog([make_session("2024-01-02", trip_id=2), make_session("2024-01-05", trip_id=1),
+                      make_session("2024-01-01", trip_id=1)])
+    log.append(make_session("2024-01-03", trip_id=1))
+    assert len(log) == 4
+    assert log.trip_ids() == [1, 2]
+    assert dates(log.for_trip(1, descending=True)) == ["2024-01-05", "2024-01-03", "2024-01-01"]
+    assert [row["trip_id"] for row in log] == [1, 1, 1, 2]
+
+
+def test_session_log_versions_track_changed_trips():
+    log = SessionLog([make_session("2024-01-01", trip_id=1)])
+    version = log.version
+    log.extend([make_session("2024-01-02", trip_id=2)])
+    assert log.version > version
+    assert log.trips_changed_since(version) == [2]
+    assert log.trips_changed_since(log.version) == []
+
+
+def test_unknown_trip_has_no_sessions():
+    log = SessionLog([make_session("2024-01-01", trip_id=1)])
+    assert log.block(3) is None
+    assert log.for_trip(3) == []
+    assert log.trips_changed_since(-1) == [1]
+
+
+def test_to_frame_is_ordered_by_trip_then_date():
+    log = SessionLog()
+    log.extend([make_session("2024-01-04", trip_id=2, profit=5.0), make_session("2024-01-02", trip_id=1),
+                make_session("2024-01-01", trip_id=2, profit=-5.0)])
+    frame = log.to_frame()
+    assert frame["trip_id"].tolist() == [1, 2, 2]
+    assert frame["date"].tolist() == ["2024-01-02", "2024-01-01", "2024-01-04"]
+    assert frame["profit"].tolist() == [0.0, -5.0, 5.0]
+    assert log.to_frame(["date"]).columns.tolist() == ["date"]
+    assert SessionLog().to_frame().empty
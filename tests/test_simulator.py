@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator import RESULT_COLUMNS, SCENARIO_COLUMNS, simulate_scenarios, simulate_sessions
+
+
+@pytest.fixture
+def games():
+    return pd.DataFrame({
+        "rtp": [96.0, 92.0, 88.0],
+        "volatility": [2, 3, 5],
+        "bonus_frequency": [0.2, 0.0, 0.4],
+        "min_bet": [0.5, 1.0, 2.0],
+    }, index=pd.Index([10, 11, 12], name="row"))
+
+
+def test_sessions_are_reproducible_across_backends(games):
+    serial = simulate_sessions(games, 100.0, 1.0, 50.0, trials=200, seed=1, backend="serial")
+    thread = simulate_sessions(games, 100.0, 1.0, 50.0, trials=200, seed=1, backend="thread")
+    pd.testing.assert_frame_equal(serial, thread)
+    assert list(serial.columns) == RESULT_COLUMNS
+    assert serial["stop_loss_probability"].between(0, 1).all()
+
+
+def test_invalid_bet_unit_gives_nan_rows(games):
+    result = simulate_sessions(games, 100.0, 0.0, 50.0)
+    assert result.index.equals(games.index)
+    assert result.isna().all().all()
+
+
+def test_scenarios_keep_positions_of_invalid_ones(games):
+    scenarios = [(100.0, 1.0, 50.0), (100.0, 0.0, 50.0), (40.0, 2.0, 20.0)]
+    result = simulate_scenarios(games, scenarios, trials=200, seed=3, backend="serial")
+    assert list(result.columns) == SCENARIO_COLUMNS + RESULT_COLUMNS
+    assert result.index.get_level_values("scenario").unique().tolist() == [0, 1, 2]
+    assert result.loc[1, "bet_unit"].eq(0.0).all()
+    assert result.loc[1, RESULT_COLUMNS].isna().all().all()
+    assert result.loc[[0, 2], RESULT_COLUMNS].notna().all().all()
+    np.testing.assert_array_equal(result.loc[2, SCENARIO_COLUMNS].to_numpy(), np.tile(scenarios[2], (3, 1)))
+
+
+def test_single_scenario_matches_simulate_sessions(games):
+    scenario = (100.0, 1.0, 50.0)
+    combined = simulate_scenarios(games, [scenario, (100.0, -1.0, 50.0)], trials=200, seed=5, backend="serial")
+    alone = simulate_sessions(games, *scenario, trials=200, seed=5, backend="serial")
+    pd.testing.assert_frame_equal(combined.loc[0, RESULT_COLUMNS], alone)
+
+
+def test_no_scenarios(games):
+    assert simulate_scenarios(games, []).empty
@@ -1,9 +1,81 @@
+import logging
+import sqlite3
+import uuid
 import streamlit as st
+from session_store import get_session_store, session_row
+from session_log import SessionLog
+from strategy import session_bankroll_for
+
+logger = logging.getLogger(__name__)
+
+def get_user_key():
+    # Identifies a returning user; kept in the URL so a bookmark restores history
+    if 'user_key' not in st.session_state:
+        user_key = st.query_params.get('user')
+        if not user_key:
+            user_key = uuid.uuid4().hex
+            st.query_params['user'] = user_key
+        st.session_state.user_key = user_key
+    return st.session_state.user_key
+
+def _session_store():
+    try:
+        return get_session_store()
+    except (sqlite3.Error, OSError):
+        logger.exception("Session database unavailable, history won't be saved")
+        return None
+
+def load_trip_history():
+    store = _session_store()
+    if store is None:
+        return [], []
+    try:
+        return store.load_history(get_user_key())
+    except sqlite3.Error:
+        logger.exception("Failed to load session history")
+        return [], []
+
+def persist_session(session):
+    store = _session_store()
+    if store is not None:
+        trip_id = session['trip_id']
+        store.record_session(get_user_key(), session,
+                             st.session_state.trip_bankrolls[trip_id],
+                             st.session_state.trip_settings['starting_bankroll'])
+
+def persist_trip(trip_id):
+    store = _session_store()
+    if store is not None:
+        store.record_trip(get_user_key(), trip_id,
+                          st.session_state.trip_settings['casino'],
+                          st.session_state.trip_settings['starting_bankroll'],
+                          st.session_state.trip_bankrolls[trip_id])
+
+def persist_import(sessions, trips):
+    # Imported sessions and the resulting trip bankrolls in one transaction;
+    # raises so the caller can leave the in-memory state untouched
+    store = _session_store()
+    if store is None:
+        return
+    user_key = get_user_key()
+    store.flush()
+    store.write_batch(
+        [session_row(user_key, session) for session in sessions],
+        [(user_key, trip_id, casino, st.session_state.trip_settings['starting_bankroll'], bankroll)
+         for trip_id, (casino, bankroll) in trips.items()],
+    )
 
 def initialize_trip_state():
-    # Ensure session_log is always initialized
+    # Ensure session_log is always initialized, hydrated once per browser
+    # session from the session database
     if 'session_log' not in st.session_state:
-        st.session_state.session_log = []
+        sessions, trips = load_trip_history()
+        st.session_state.session_log = SessionLog(sessions)
+        if trips:
+            last_trip = trips[-1]
+            st.session_state.trip_bankrolls = {t['trip_id']: t['bankroll'] for t in trips}
+            st.session_state.current_trip_id = last_trip['trip_id']
+            st.session_state.restored_trip = last_trip
     
     # Initialize current trip ID
     if 'current_trip_id' not in st.session_state:
@@ -28,6 +100,16 @@ def initialize_trip_state():
             'starting_bankroll': 100.0,
             'num_sessions': 10
         }
+        # Pick up where a returning user left off
+        restored = st.session_state.get('restored_trip')
+        if restored:
+            if restored['casino']:
+                if restored['casino'] not in st.session_state.casino_list:
+                    st.session_state.casino_list.append(restored['casino'])
+                    st.session_state.casino_list.sort()
+                st.session_state.trip_settings['casino'] = restored['casino']
+            if restored['starting_bankroll'] is not None:
+                st.session_state.trip_settings['starting_bankroll'] = restored['starting_bankroll']
     
     # Initialize trip bankrolls tracking
     if 'trip_bankrolls' not in st.session_state:
@@ -36,44 +118,114 @@ def initialize_trip_state():
     # Initialize game blacklist
     if 'game_blacklist' not in st.session_state:
         st.session_state.game_blacklist = {}
+    
+    # Running per-trip aggregates; rebuilt if they no longer cover the log
+    if ('trip_stats' not in st.session_state or
+            sum(stats['sessions'] for stats in st.session_state.trip_stats.values())
+            != len(st.session_state.session_log)):
+        rebuild_trip_stats()
 
-def get_current_trip_sessions():
-    return [s for s in st.session_state.session_log 
-            if s['trip_id'] == st.session_state.current_trip_id]
+def _empty_trip_stats():
+    return {'profit': 0.0, 'sessions': 0, 'money_in': 0.0, 'money_out': 0.0, 'last_date': None}
 
-def get_trip_profit(trip_id=None):
+def _add_to_trip_stats(trip_stats, session):
+    stats = trip_stats.setdefault(session['trip_id'], _empty_trip_stats())
+    stats['profit'] += session['profit']
+    stats['sessions'] += 1
+    stats['money_in'] += session['money_in']
+    stats['money_out'] += session['money_out']
+    if stats['last_date'] is None or session['date'] > stats['last_date']:
+        stats['last_date'] = session['date']
+
+def compute_trip_stats(session_log):
+    trip_stats = {}
+    for session in session_log:
+        _add_to_trip_stats(trip_stats, session)
+    return trip_stats
+
+def rebuild_trip_stats():
+    st.session_state.trip_stats = compute_trip_stats(st.session_state.session_log)
+
+def update_trip_stats(session):
+    # Called once per recorded session so the getters below never rescan the log
+    _add_to_trip_stats(st.session_state.trip_stats, session)
+
+def merge_trip_stats(trip_totals):
+    # Folds in per-trip totals computed in bulk (see session_import)
+    for trip_id, totals in trip_totals.items():
+        stats = st.session_state.trip_stats.setdefault(trip_id, _empty_trip_stats())
+        for key in ('profit', 'sessions', 'money_in', 'money_out'):
+            stats[key] += totals[key]
+        if stats['last_date'] is None or totals['last_date'] > stats['last_date']:
+            stats['last_date'] = totals['last_date']
+
+def check_trip_stats(repair=True):
+    # Consistency check against the raw log; optionally rebuilds on mismatch
+    expected = compute_trip_stats(st.session_state.session_log)
+    actual = st.session_state.trip_stats
+    consistent = expected.keys() == actual.keys() and all(
+        expected[tid]['sessions'] == actual[tid]['sessions'] and
+        expected[tid]['last_date'] == actual[tid]['last_date'] and
+        all(abs(expected[tid][key] - actual[tid][key]) < 1e-6
+            for key in ('profit', 'money_in', 'money_out'))
+        for tid in expected
+    )
+    if not consistent:
+        logger.warning("Trip aggregates out of sync with the session log")
+        if repair:
+            st.session_state.trip_stats = expected
+    return consistent
+
+def get_trip_stats(trip_id=None):
     trip_id = trip_id or st.session_state.current_trip_id
-    sessions = [s for s in st.session_state.session_log 
-               if s['trip_id'] == trip_id]
-    return sum(s['profit'] for s in sessions)
+    return st.session_state.trip_stats.get(trip_id) or _empty_trip_stats()
+
+def get_current_trip_sessions(descending=False):
+    return st.session_state.session_log.for_trip(st.session_state.current_trip_id, descending)
+
+def get_trip_profit(trip_id=None):
+    return get_trip_stats(trip_id)['profit']
 
 def get_current_bankroll():
-    # Always calculate from scratch
     starting = st.session_state.trip_settings['starting_bankroll']
     return starting + get_trip_profit()
 
 def get_session_bankroll():
-    current_bankroll = get_current_bankroll()
-    completed_sessions = len(get_current_trip_sessions())
-    remaining_sessions = max(1, st.session_state.trip_settings['num_sessions'] - completed_sessions)
-    proportional_bankroll = current_bankroll / remaining_sessions
-    
-    # Cap session bankroll at $500 for large bankrolls
-    if current_bankroll > 1000 and proportional_bankroll > 500:
-        return 500.0
-    return proportional_bankroll
+    # Even split over the remaining sessions, capped at $500 for large bankrolls
+    return session_bankroll_for(get_current_bankroll(),
+                                st.session_state.trip_settings['num_sessions'],
+                                get_trip_stats()['sessions'])
 
 def blacklist_game(game_name):
     trip_id = st.session_state.current_trip_id
     if trip_id not in st.session_state.game_blacklist:
         st.session_state.game_blacklist[trip_id] = set()
     st.session_state.game_blacklist[trip_id].add(game_name)
-    st.rerun()
+
+def replace_unavailable_game(key):
+    # on_change callback of the "Not Available" picker inside the game plan
+    # fragment; only that fragment reruns afterwards
+    game_name = st.session_state.get(key)
+    if game_name:
+        blacklist_game(game_name)
+        st.session_state.replaced_game = game_name
+        st.session_state[key] = None
 
 def get_blacklisted_games():
     trip_id = st.session_state.current_trip_id
     return st.session_state.game_blacklist.get(trip_id, set())
 
+@st.fragment(key="trip_summary")
+def render_trip_summary():
+    st.subheader("Trip Summary")
+    trip_stats = get_trip_stats()
+    current_bankroll = get_current_bankroll()
+    
+    st.markdown(f"**Casino:** {st.session_state.trip_settings['casino']}")
+    st.markdown(f"**Starting Bankroll:** ${st.session_state.trip_settings['starting_bankroll']:,.2f}")
+    st.markdown(f"**Current Bankroll:** ${current_bankroll:,.2f}")
+    st.markdown(f"**Sessions Completed:** {trip_stats['sessions']}/{st.session_state.trip_settings['num_sessions']}")
+
 def render_sidebar():
     with st.sidebar:
         st.header("Trip Settings")
@@ -121,26 +273,20 @@ def render_sidebar():
         # New trip button
         if st.button("Start New Trip"):
             st.session_state.current_trip_id += 1
-            st.session_state.session_log = []
+            st.session_state.session_log = SessionLog()
+            rebuild_trip_stats()
             # Initialize bankroll for new trip
             st.session_state.trip_bankrolls[st.session_state.current_trip_id] = (
                 st.session_state.trip_settings['starting_bankroll']
             )
+            persist_trip(st.session_state.current_trip_id)
             st.success(f"Started new trip! Trip ID: {st.session_state.current_trip_id}")
             st.rerun()
         
         st.markdown("---")
         
-        # Trip summary
-        st.subheader("Trip Summary")
-        trip_sessions = get_current_trip_sessions()
-        trip_profit = get_trip_profit()
-        current_bankroll = get_current_bankroll()
-        
-        st.markdown(f"**Casino:** {st.session_state.trip_settings['casino']}")
-        st.markdown(f"**Starting Bankroll:** ${st.session_state.trip_settings['starting_bankroll']:,.2f}")
-        st.markdown(f"**Current Bankroll:** ${current_bankroll:,.2f}")
-        st.markdown(f"**Sessions Completed:** {len(trip_sessions)}/{st.session_state.trip_settings['num_sessions']}")
+        # Trip summary, rerun on its own when a session is recorded
+        render_trip_summary()
         
         st.markdown("---")
         st.warning("""
@@ -260,4 +260,63 @@ def trip_info_box(trip_id, casino, starting_bankroll, current_bankroll):
             <span class="{profit_class}">Profit/Loss: ${profit:+,.2f}</span>
         </div>
     </div>
-    """
\ No newline at end of file
+    """
+
+def session_risk_details(stop_loss_probability, median_spins, profit_p10, profit_p50, profit_p90):
+    return f"""
+    <div class="ph-game-detail">
+        <strong>🛑 Stop-Loss Risk:</strong> {stop_loss_probability:.0%} | <strong>⏱️ Median Spins:</strong> {median_spins:.0f}
+    </div>
+    <div class="ph-game-detail">
+        <strong>📊 Session Profit (P10 / P50 / P90):</strong> ${profit_p10:+,.2f} / ${profit_p50:+,.2f} / ${profit_p90:+,.2f}
+    </div>
+    """
+
+def game_card(game_name, score, game_type, min_bet, advantage, volatility, bonus_frequency, rtp, tip,
+              risk_html="", play_order=None):
+    # One card of the recommendation grid; play_order adds the numbered plan badge
+    if play_order is None:
+        card_open = '<div class="ph-game-card">'
+        badge = ""
+    else:
+        card_open = '<div class="ph-game-card" style="border-left: 6px solid #1976d2; position:relative;">'
+        badge = f"""
+        <div style="position:absolute; top:10px; right:10px; background:#1976d2; color:white;
+                    border-radius:50%; width:30px; height:30px; display:flex;
+                    align-items:center; justify-content:center; font-weight:bold;">
+            {play_order}
+        </div>"""
+    return f"""
+    {card_open}{badge}
+        <div class="ph-game-title">🎰 {game_name} <span style="font-size:0.9rem; color:#27ae60;">⭐ Score: {score:.1f}/10</span></div>
+        <div class="ph-game-detail">
+            <strong>🗂️ Type:</strong> {game_type}
+        </div>
+        <div class="ph-game-detail">
+            <strong>💸 Min Bet:</strong> ${min_bet:,.2f}
+        </div>
+        <div class="ph-game-detail">
+            <strong>🧠 Advantage Play:</strong> {advantage}
+        </div>
+        <div class="ph-game-detail">
+            <strong>🎲 Volatility:</strong> {volatility}
+        </div>
+        <div class="ph-game-detail">
+            <strong>🎁 Bonus Frequency:</strong> {bonus_frequency}
+        </div>
+        <div class="ph-game-detail">
+            <strong>🔢 RTP:</strong> {rtp:.2f}%
+        </div>
+        <div class="ph-game-detail">
+            <strong>💡 Tips:</strong> {tip}
+        </div>
+        {risk_html}
+    </div>
+    """
+
+def game_grid(cards):
+    # All cards as one HTML block for a single st.markdown call. Lines are
+    # unindented and blank lines dropped so Markdown never ends the HTML
+    # block early or turns an indented card into a code block.
+    lines = (line.strip() for card in cards for line in card.splitlines())
+    return '<div class="ph-game-grid">\n' + "\n".join(line for line in lines if line) + '\n</div>'
@@ -1,43 +1,65 @@
 import re
-import base64
+import numpy as np
 import pandas as pd
 
+# Label lookup arrays indexed by the 1-5 scale value; slot 0 is "Unknown"
+ADVANTAGE_LABELS = np.array([
+    "Unknown",
+    "⭐️ Minimal advantage potential",
+    "⭐️⭐️ Low advantage value",
+    "⭐️⭐️⭐️ Moderate advantage play value",
+    "⭐️⭐️⭐️⭐️ Strong potential for skilled players",
+    "⭐️⭐️⭐️⭐️⭐️ Excellent advantage opportunities",
+], dtype=object)
+
+VOLATILITY_LABELS = np.array([
+    "Unknown",
+    "📈 Very low volatility (frequent small wins)",
+    "📈 Low volatility",
+    "📊 Medium volatility",
+    "📉 High volatility",
+    "📉 Very high volatility (rare big wins)",
+], dtype=object)
+
+# Bonus frequency buckets: np.digitize(value, BONUS_FREQ_BINS) indexes the labels
+BONUS_FREQ_BINS = np.array([0.1, 0.2, 0.3, 0.4])
+BONUS_FREQ_LABELS = np.array([
+    "🎁 Very rare bonuses",
+    "🎁 Rare bonuses",
+    "🎁 Occasional bonuses",
+    "🎁🎁 Frequent bonus features",
+    "🎁🎁🎁 Very frequent bonuses",
+], dtype=object)
+
+def _scale_codes(values):
+    # 1-5 scale values -> label codes, anything else -> 0 ("Unknown")
+    values = np.asarray(values, dtype=float)
+    codes = np.zeros(values.shape, dtype=np.int8)
+    valid = np.isin(values, np.arange(1, 6))
+    codes[valid] = values[valid]
+    return codes
+
+def _bonus_codes(values):
+    values = np.nan_to_num(np.asarray(values, dtype=float), nan=0.0)
+    return np.digitize(values, BONUS_FREQ_BINS).astype(np.int8)
+
+def advantage_labels(values):
+    return pd.Categorical.from_codes(_scale_codes(values), categories=ADVANTAGE_LABELS)
+
+def volatility_labels(values):
+    return pd.Categorical.from_codes(_scale_codes(values), categories=VOLATILITY_LABELS)
+
+def bonus_freq_labels(values):
+    return pd.Categorical.from_codes(_bonus_codes(values), categories=BONUS_FREQ_LABELS)
+
 def map_advantage(value):
-    mapping = {
-        5: "⭐️⭐️⭐️⭐️⭐️ Excellent advantage opportunities",
-        4: "⭐️⭐️⭐️⭐️ Strong potential for skilled players",
-        3: "⭐️⭐️⭐️ Moderate advantage play value",
-        2: "⭐️⭐️ Low advantage value",
-        1: "⭐️ Minimal advantage potential"
-    }
-    return mapping.get(value, "Unknown")
+    return ADVANTAGE_LABELS[_scale_codes(value)]
 
 def map_volatility(value):
-    mapping = {
-        1: "📈 Very low volatility (frequent small wins)",
-        2: "📈 Low volatility",
-        3: "📊 Medium volatility",
-        4: "📉 High volatility",
-        5: "📉 Very high volatility (rare big wins)"
-    }
-    return mapping.get(value, "Unknown")
+    return VOLATILITY_LABELS[_scale_codes(value)]
 
 def map_bonus_freq(value):
-    if value >= 0.4:
-        return "🎁🎁🎁 Very frequent bonuses"
-    elif value >= 0.3:
-        return "🎁🎁 Frequent bonus features"
-    elif value >= 0.2:
-        return "🎁 Occasional bonuses"
-    elif value >= 0.1:
-        return "🎁 Rare bonuses"
-    else:
-        return "🎁 Very rare bonuses"
+    return BONUS_FREQ_LABELS[_bonus_codes(value)]
 
 def normalize_column_name(name):
     return re.sub(r'\W+', '_', name.lower().strip())
-
-def get_csv_download_link(df, filename):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    return f'<a href="data:file/csv;base64,{b64}" download="{filename}">Download CSV</a>'
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Bankroll what-if sweeps.
+
+Scores a set of games against a whole range of session bankrolls in one
+call instead of one script rerun per bankroll:
+
+* :func:`sweep_bankrolls` builds the bankroll grid: log-spaced points plus,
+  for every tier boundary in range, the boundary itself and the cent below
+  it, so each tier change shows up as two adjacent rows;
+* :func:`what_if_sweep` turns the grid into strategies with
+  ``strategy.bankroll_strategies``, scores every (bankroll, game) pair with
+  one ``scoring.score_matrix`` broadcast and selects each bankroll's top
+  games with ``scoring.rank_order``;
+* :meth:`WhatIfSweep.play_order_table` lays the plans out side by side with
+  the number of plan positions that changed from the previous bankroll.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from scoring import GameFeatures, rank_order, score_matrix
+from strategy import TIER_BOUNDARIES, StrategyBatch, bankroll_strategies
+
+DEFAULT_STEPS = 12
+BOUNDARY_OFFSET = 0.01
+
+
+def sweep_bankrolls(
+    low: float,
+    high: float,
+    steps: int = DEFAULT_STEPS,
+    include: Iterable[float] = (),
+) -> np.ndarray:
+    """Sorted, de-duplicated session bankrolls from ``low`` to ``high``.
+
+    ``include`` adds extra values (e.g. the current session bankroll) when
+    they fall inside the range.
+    """
+    low = max(float(low), BOUNDARY_OFFSET)
+    high = max(float(high), low)
+    edges = TIER_BOUNDARIES[(TIER_BOUNDARIES > low) & (TIER_BOUNDARIES <= high)]
+    extra = np.asarray(list(include), dtype=np.float64)
+    extra = extra[(extra >= low) & (extra <= high)]
+    points = np.concatenate([np.geomspace(low, high, max(2, steps)), edges - BOUNDARY_OFFSET, edges, extra])
+    return np.unique(np.round(points, 2))
+
+
+@dataclass(frozen=True)
+class WhatIfSweep:
+    """Scores and play orders of the same games over many bankrolls.
+
+    Attributes
+    ----------
+    strategies : strategy.StrategyBatch
+        One strategy per swept bankroll, in increasing bankroll order.
+    rows : numpy.ndarray
+        Catalog positions of the scored games.
+    scores : numpy.ndarray
+        ``(n_bankrolls, n_games)`` scores, columns aligned with ``rows``.
+    order : numpy.ndarray
+        ``(n_bankrolls, limit)`` column indices of each bankroll's top games,
+        best first.
+    """
+
+    strategies: StrategyBatch
+    rows: np.ndarray
+    scores: np.ndarray
+    order: np.ndarray
+
+    @property
+    def bankrolls(self) -> np.ndarray:
+        return self.strategies.session_bankroll
+
+    def top_rows(self) -> np.ndarray:
+        """Catalog positions of each bankroll's play order."""
+        return self.rows[self.order]
+
+    def changes(self) -> np.ndarray:
+        """Plan positions that differ from the previous bankroll's plan."""
+        top = self.top_rows()
+        return np.concatenate([[0], (top[1:] != top[:-1]).sum(axis=1)])
+
+    def play_order_table(self, names: np.ndarray, current: Optional[float] = None) -> pd.DataFrame:
+        """One row per bankroll: tier, max bet, changes and the games in order.
+
+        ``names`` are the catalog's game names by position; the row of the
+        ``current`` bankroll is marked.
+        """
+        labels = [
+            f"${bankroll:,.2f}" + (" (current)" if current is not None and np.isclose(bankroll, current) else "")
+            for bankroll in self.bankrolls
+        ]
+        table = pd.DataFrame({
+            "Strategy": self.strategies.strategy_types,
+            "Max Bet": np.round(self.strategies.max_bet, 2),
+            "Changes": self.changes(),
+        }, index=pd.Index(labels, name="Session Bankroll"))
+        plans = pd.DataFrame(np.asarray(names)[self.top_rows()], index=table.index,
+                             columns=[f"#{i}" for i in range(1, self.order.shape[1] + 1)])
+        return pd.concat([table, plans], axis=1)
+
+
+def what_if_sweep(
+    features: GameFeatures,
+    rows: np.ndarray,
+    session_bankrolls: np.ndarray,
+    limit: int,
+) -> WhatIfSweep:
+    """Score the games at ``rows`` for every bankroll and rank the top ``limit``.
+
+    Parameters
+    ----------
+    features : scoring.GameFeatures
+        Feature matrix of the catalog.
+    rows : numpy.ndarray
+        Catalog positions of the games to score, in catalog order so ties
+        rank as they do in the Game Plan.
+    session_bankrolls : numpy.ndarray
+        Bankrolls to sweep, e.g. from :func:`sweep_bankrolls`.
+    limit : int
+        Games per play order.
+    """
+    strategies = bankroll_strategies(session_bankrolls)
+    scores = score_matrix(features, strategies.session_bankroll, strategies.max_bet,
+                          strategies.strategy_types, rows)
+    order = rank_order(scores, limit)[:, :limit]
+    return WhatIfSweep(strategies, np.asarray(rows), scores, order)